@@ -0,0 +1,470 @@
+#!/usr/bin/env python
+# -*-coding:utf-8 -*-
+'''
+@File    :   analysis.py
+@Time    :   2026/10/17
+@Author  :   Taylor Firman
+@Version :   1.0
+@Contact :   tefirman@gmail.com
+@Desc    :   Process-wide cache of pool analysis data for March Madness bracket app
+'''
+
+import itertools
+import json
+import logging
+import threading
+from bisect import bisect_right
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from types import MappingProxyType
+from typing import Dict, List, Mapping, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from cache import LRUCache
+from data import TOURNAMENT
+from snapshot import ANALYSIS_DIR, CSV_TABLES, DISTRIBUTION_FILES, TEXT_FILES, open_snapshot
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TOURNAMENT = TOURNAMENT
+
+# Pool sizes offered in the UI (shipped with analysis data); any size in the supported range can be requested
+POOL_SIZES = ["10", "25", "50", "100"]
+DEFAULT_POOL_SIZE = "100"
+MIN_POOL_SIZE = 2
+# Largest size that on-demand generation still simulates within its bracket budget at the
+# tournament and pool floors (see simulator.on_demand_settings: 39 pools of 50 tournaments)
+MAX_POOL_SIZE = 2000
+
+# Analysis data generated on demand for other pool sizes lives apart from the shipped
+# data (and out of its snapshot), keeping only the most recently used sizes per tournament
+GENERATED_DIR = ANALYSIS_DIR / 'generated'
+GENERATED_POOL_LIMIT = 12
+
+# Enough for every shipped and generated pool size of both tournaments, so generated
+# sizes never evict the shipped bundles that prefetch_analysis_bundles warms
+ANALYSIS_CACHE_SIZE = 2 * (len(POOL_SIZES) + GENERATED_POOL_LIMIT)
+
+# Length of the ranked recommendation lists used by the assessment
+TOP_UPSETS = 10
+TOP_CHAMPIONS = 3
+
+_EMPTY_INDEX = MappingProxyType({})
+
+# Numbers every bundle as it is built, so results derived from a bundle can tell reloads apart
+_bundle_loads = itertools.count(1)
+
+# Default optimal values if files not found
+default_optimal_upset_dict = MappingProxyType({
+    "First Round": {"optimal": 10, "range": (8, 11)},
+    "Second Round": {"optimal": 7, "range": (6, 8)},
+    "Sweet 16": {"optimal": 2, "range": (2, 4)},
+    "Elite 8": {"optimal": 1, "range": (1, 3)},
+    "Final Four": {"optimal": 1, "range": (0, 1)},
+    "Championship": {"optimal": 0, "range": (0, 1)},
+    "Total": {"optimal": 18, "range": (18, 25)}
+})
+
+
+@dataclass(frozen=True, slots=True)
+class DistributionCDF:
+    """
+    Cumulative winning and non-winning bracket shares of one histogram.
+
+    `winners_cdf[i]` is the share of winning brackets below bin_edges[i]
+    (likewise for non-winners), so a lookup is a binary search over the bin
+    edges plus a linear interpolation within the bin.
+    """
+
+    bin_edges: Tuple[float, ...]
+    winners_cdf: Tuple[float, ...]
+    non_winners_cdf: Tuple[float, ...]
+
+    @classmethod
+    def from_histogram(cls, histogram: Dict) -> 'DistributionCDF':
+        """Compile a round's histogram from the distribution JSON layout"""
+        bin_edges = list(histogram['bin_start']) + [histogram['bin_end'][-1]]
+
+        def cumulative(counts) -> Tuple[float, ...]:
+            counts = np.asarray(counts, dtype=np.float64)
+            total = counts.sum()
+            return tuple(np.concatenate([[0.0], np.cumsum(counts) / total]).tolist()) if total > 0 else ()
+
+        return cls(tuple(float(edge) for edge in bin_edges), cumulative(histogram['winners_count']),
+                   cumulative(histogram['non_winners_count']))
+
+    @staticmethod
+    def _lookup(bin_edges: Tuple[float, ...], cdf: Tuple[float, ...], value: float) -> Optional[float]:
+        if not cdf:
+            return None
+        index = bisect_right(bin_edges, value) - 1
+        if index < 0:
+            return 0.0
+        if index >= len(bin_edges) - 1:
+            return 1.0
+        fraction = (value - bin_edges[index]) / (bin_edges[index + 1] - bin_edges[index])
+        return cdf[index] + fraction * (cdf[index + 1] - cdf[index])
+
+    def percentile(self, value: float) -> Dict[str, Optional[float]]:
+        """Share of winning and of non-winning brackets below a value (None without data)"""
+        return {
+            'winners': self._lookup(self.bin_edges, self.winners_cdf, value),
+            'non_winners': self._lookup(self.bin_edges, self.non_winners_cdf, value)
+        }
+
+    @staticmethod
+    def _interpolate_many(cdf: Tuple[float, ...], index: np.ndarray, inside: np.ndarray, fraction: np.ndarray,
+                          last_bin: int) -> Optional[np.ndarray]:
+        if not cdf:
+            return None
+        cdf = np.asarray(cdf)
+        shares = cdf[inside] + fraction * (cdf[inside + 1] - cdf[inside])
+        return np.where(index < 0, 0.0, np.where(index >= last_bin, 1.0, shares))
+
+    def percentiles(self, values: np.ndarray) -> Dict[str, Optional[np.ndarray]]:
+        """Vectorized percentile for an array of values (same interpolation as the scalar lookup)"""
+        values = np.asarray(values, dtype=np.float64)
+        # Both distributions share the bin edges, so the bins are searched once
+        edges = np.asarray(self.bin_edges)
+        index = np.searchsorted(edges, values, side='right') - 1
+        inside = np.clip(index, 0, len(edges) - 2)
+        fraction = (values - edges[inside]) / (edges[inside + 1] - edges[inside])
+        return {
+            'winners': self._interpolate_many(self.winners_cdf, index, inside, fraction, len(edges) - 1),
+            'non_winners': self._interpolate_many(self.non_winners_cdf, index, inside, fraction, len(edges) - 1)
+        }
+
+
+def build_distribution_cdfs(distributions: Optional[Dict[str, Dict]]) -> Mapping[str, DistributionCDF]:
+    """Compile every round of a distribution file's histograms (empty if the file is missing)"""
+    if distributions is None:
+        return _EMPTY_INDEX
+    return MappingProxyType({round_name: DistributionCDF.from_histogram(histogram)
+                             for round_name, histogram in distributions.items()})
+
+
+@dataclass(frozen=True, slots=True)
+class AnalysisBundle:
+    """
+    Immutable set of pool analysis results for one tournament and pool size.
+
+    Bundles are shared by every session using the same pool size, so the
+    DataFrames must be treated as read-only. The lookup indexes and ranked
+    lists are built once at load time so assessments never touch pandas.
+    `load_id` is unique to each load, so caches of assessments can key on
+    it and never serve results computed from data that was since reloaded.
+    """
+
+    tournament: str
+    pool_size: str
+    optimal_upset_df: Optional[pd.DataFrame] = None
+    champion_df: Optional[pd.DataFrame] = None
+    specific_upsets_df: Optional[pd.DataFrame] = None
+    analysis_summary: Optional[str] = None
+    upset_stats_df: Optional[pd.DataFrame] = None
+    log_prob_df: Optional[pd.DataFrame] = None
+    optimal_upset_dict: Mapping[str, Dict] = field(default_factory=lambda: default_optimal_upset_dict)
+    specific_upset_index: Mapping[Tuple[str, str, int], float] = field(default_factory=lambda: _EMPTY_INDEX)
+    top_specific_upsets: Tuple[Dict, ...] = ()
+    champion_index: Mapping[str, float] = field(default_factory=lambda: _EMPTY_INDEX)
+    top_champions: Tuple[Dict, ...] = ()
+    upset_cdfs: Mapping[str, DistributionCDF] = field(default_factory=lambda: _EMPTY_INDEX)
+    log_probability_cdfs: Mapping[str, DistributionCDF] = field(default_factory=lambda: _EMPTY_INDEX)
+    error: Optional[str] = None
+    load_id: int = field(default_factory=lambda: next(_bundle_loads))
+
+
+def get_analysis_dir(tournament: str, pool_size: str) -> Path:
+    """Directory holding the analysis files for a tournament and pool size"""
+    return ANALYSIS_DIR / f'{tournament}_{pool_size}entries'
+
+
+def get_generated_dir(tournament: str, pool_size: str) -> Path:
+    """Directory for a pool size's analysis files generated on demand"""
+    return GENERATED_DIR / f'{tournament}_{pool_size}entries'
+
+
+def find_analysis_dir(tournament: str, pool_size: str) -> Path:
+    """Shipped analysis directory of a pool size, or its generated one if only that exists"""
+    analysis_dir = get_analysis_dir(tournament, pool_size)
+    if not analysis_dir.exists():
+        generated_dir = get_generated_dir(tournament, pool_size)
+        if generated_dir.exists():
+            return generated_dir
+    return analysis_dir
+
+
+def normalize_pool_size(pool_size) -> str:
+    """Pool size as a canonical string key, clamped to the supported range (the default if it is not a number)"""
+    try:
+        size = int(str(pool_size).replace(",", "").strip())
+    except (TypeError, ValueError):
+        return DEFAULT_POOL_SIZE
+    return str(min(max(size, MIN_POOL_SIZE), MAX_POOL_SIZE))
+
+
+def has_analysis_data(pool_size: str, tournament: str = DEFAULT_TOURNAMENT) -> bool:
+    """
+    Whether analysis data exists for a pool size, in the snapshot or as files.
+
+    Analysis directories are renamed into place once all their files are
+    written, so an existing directory always holds complete data.
+    """
+    snapshot = open_snapshot(tournament)
+    if snapshot is not None and pool_size in snapshot.pool_sizes:
+        return True
+    return find_analysis_dir(tournament, pool_size).exists()
+
+
+def build_optimal_upset_dict(optimal_upset_df: Optional[pd.DataFrame]) -> Mapping[str, Dict]:
+    """Build the per-round optimal upset counts and acceptable ranges from the strategy table"""
+    if optimal_upset_df is None:
+        return default_optimal_upset_dict
+
+    optimal_upset_dict = {row['round']: {"optimal": int(row['max_advantage_upsets']),
+                                         "range": (max(0, int(row['max_advantage_upsets'] - 2)),
+                                                   int(row['max_advantage_upsets'] + 2))}
+                          for _, row in optimal_upset_df.iterrows() if row['round'] != 'Total Upsets'}
+    # Add total upsets
+    total_row = optimal_upset_df[optimal_upset_df['round'] == 'Total Upsets']
+    if not total_row.empty:
+        optimal_upset_dict["Total"] = {"optimal": int(total_row['max_advantage_upsets'].iloc[0]),
+                                       "range": (int(total_row['max_advantage_upsets'].iloc[0] - 4),
+                                                 int(total_row['max_advantage_upsets'].iloc[0] + 4))}
+    else:
+        optimal_upset_dict["Total"] = {"optimal": 22, "range": (18, 26)}
+    return MappingProxyType(optimal_upset_dict)
+
+
+def build_freq_diff_index(df: Optional[pd.DataFrame], key_columns: List[str]) -> Mapping:
+    """
+    Map key column values to freq_diff, keeping the first row for duplicate keys.
+
+    Single key columns map plain values, multiple key columns map tuples.
+    """
+    if df is None:
+        return _EMPTY_INDEX
+    columns = [df[column].tolist() for column in key_columns]
+    keys = columns[0] if len(columns) == 1 else zip(*columns)
+    index = {}
+    for key, freq_diff in zip(keys, df['freq_diff'].tolist()):
+        index.setdefault(key, freq_diff)
+    return MappingProxyType(index)
+
+
+def rank_by_freq_diff(df: Optional[pd.DataFrame], columns: List[str], limit: int) -> Tuple[Dict, ...]:
+    """Rows with a positive freq_diff, most valuable first, as dicts of the given columns"""
+    if df is None:
+        return ()
+    ranked = df[df['freq_diff'] > 0].sort_values('freq_diff', ascending=False).head(limit)
+    return tuple(dict(zip(columns + ['freq_diff'], row))
+                 for row in zip(*[ranked[column].tolist() for column in columns + ['freq_diff']]))
+
+
+def read_analysis_bundle(tournament: str, pool_size: str) -> AnalysisBundle:
+    """
+    Load the analysis data for a tournament and pool size.
+
+    Data comes from the tournament's memory-mapped snapshot when one is
+    available and falls back to parsing the CSV files otherwise. Missing files
+    are logged and left as None. Any other error yields a bundle with the
+    default upset targets and the error message.
+
+    Args:
+        tournament: Tournament key ("men" or "women")
+        pool_size: Number of entries in the pool
+
+    Returns:
+        AnalysisBundle holding the loaded data
+    """
+    try:
+        snapshot = open_snapshot(tournament)
+        if snapshot is not None and pool_size in snapshot.pool_sizes:
+            def read_table(table_name: str, description: str) -> Optional[pd.DataFrame]:
+                df = snapshot.dataframe(pool_size, table_name)
+                if df is None:
+                    logger.warning(f"{description} file not found for {pool_size} entries")
+                return df
+
+            def read_text(text_name: str, description: str) -> Optional[str]:
+                text = snapshot.text(pool_size, text_name)
+                if text is None:
+                    logger.warning(f"{description} file not found for {pool_size} entries")
+                return text
+
+            def read_distributions(kind: str, description: str) -> Optional[Dict[str, Dict]]:
+                distributions = snapshot.distributions(pool_size, kind)
+                if distributions is None:
+                    logger.warning(f"{description} file not found for {pool_size} entries")
+                return distributions
+        else:
+            analysis_dir = find_analysis_dir(tournament, pool_size)
+            if not analysis_dir.exists():
+                logger.warning(f"Analysis data directory for {pool_size} entries not found. Please add analysis files.")
+            elif analysis_dir.parent == GENERATED_DIR:
+                # Marks the generated size as recently used, so it is the last to be evicted
+                try:
+                    analysis_dir.touch()
+                except OSError:
+                    pass
+
+            def read_table(table_name: str, description: str) -> Optional[pd.DataFrame]:
+                path = analysis_dir / CSV_TABLES[table_name]
+                if path.exists():
+                    return pd.read_csv(path)
+                logger.warning(f"{description} file not found for {pool_size} entries")
+                return None
+
+            def read_text(text_name: str, description: str) -> Optional[str]:
+                path = analysis_dir / TEXT_FILES[text_name]
+                if path.exists():
+                    with open(path, 'r') as f:
+                        return f.read()
+                logger.warning(f"{description} file not found for {pool_size} entries")
+                return None
+
+            def read_distributions(kind: str, description: str) -> Optional[Dict[str, Dict]]:
+                path = analysis_dir / DISTRIBUTION_FILES[kind]
+                if path.exists():
+                    with open(path, 'r') as f:
+                        return json.load(f)
+                logger.warning(f"{description} file not found for {pool_size} entries")
+                return None
+
+        optimal_upset_df = read_table('optimal_upset_strategy', "Optimal upset strategy")
+        champion_df = read_table('champion_pick_comparison', "Champion pick comparison")
+        specific_upsets_df = read_table('specific_upset_comparison', "Specific upsets")
+        return AnalysisBundle(
+            tournament=tournament,
+            pool_size=pool_size,
+            optimal_upset_df=optimal_upset_df,
+            champion_df=champion_df,
+            specific_upsets_df=specific_upsets_df,
+            analysis_summary=read_text('summary', "Comparative analysis summary"),
+            upset_stats_df=read_table('upset_comparison_statistics', "Upset comparison statistics"),
+            log_prob_df=read_table('log_probability_comparison_statistics', "Log probability comparison statistics"),
+            optimal_upset_dict=build_optimal_upset_dict(optimal_upset_df),
+            specific_upset_index=build_freq_diff_index(specific_upsets_df, ['round', 'team', 'seed']),
+            top_specific_upsets=rank_by_freq_diff(specific_upsets_df, ['round', 'team', 'seed'], TOP_UPSETS),
+            champion_index=build_freq_diff_index(champion_df, ['team']),
+            top_champions=rank_by_freq_diff(champion_df, ['team', 'seed'], TOP_CHAMPIONS),
+            upset_cdfs=build_distribution_cdfs(read_distributions('upset', "Upset distributions")),
+            log_probability_cdfs=build_distribution_cdfs(
+                read_distributions('log_probability', "Log probability distributions"))
+        )
+    except Exception as e:
+        logger.error(f"Error loading analysis data for {pool_size} entries: {str(e)}")
+        return AnalysisBundle(tournament=tournament, pool_size=pool_size, error=str(e))
+
+
+_bundle_cache = LRUCache(ANALYSIS_CACHE_SIZE, name="analysis bundles")
+_pending: Dict[Tuple[str, str], Future] = {}
+_pending_lock = threading.Lock()
+_prefetch_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="analysis-prefetch")
+
+
+def _load_bundle(key: Tuple[str, str]) -> AnalysisBundle:
+    """Read a bundle into the cache, sharing one in-flight read per key between threads"""
+    with _pending_lock:
+        future = _pending.get(key)
+        owner = future is None
+        if owner:
+            future = Future()
+            _pending[key] = future
+
+    if not owner:
+        return future.result()
+
+    try:
+        bundle = read_analysis_bundle(*key)
+        _bundle_cache.put(key, bundle)
+        future.set_result(bundle)
+        return bundle
+    except BaseException as e:
+        future.set_exception(e)
+        raise
+    finally:
+        with _pending_lock:
+            del _pending[key]
+
+
+def get_analysis_bundle(pool_size: str, tournament: str = DEFAULT_TOURNAMENT) -> AnalysisBundle:
+    """
+    Get the shared analysis bundle for a pool size, reading it from disk only on a cache miss.
+
+    Args:
+        pool_size: Number of entries in the pool
+        tournament: Tournament key ("men" or "women")
+
+    Returns:
+        Cached AnalysisBundle
+    """
+    key = (tournament, normalize_pool_size(pool_size))
+    bundle = _bundle_cache.get(key)
+    if bundle is None:
+        logger.info(f"Loading analysis data for {pool_size} entries pool")
+        bundle = _load_bundle(key)
+    return bundle
+
+
+def get_cached_analysis_bundle(pool_size: str, tournament: str = DEFAULT_TOURNAMENT) -> Optional[AnalysisBundle]:
+    """The shared analysis bundle for a pool size if it is already cached (never reads from disk)"""
+    return _bundle_cache.get((tournament, normalize_pool_size(pool_size)))
+
+
+def request_analysis_load(pool_size: str, tournament: str = DEFAULT_TOURNAMENT) -> Future:
+    """
+    Future for the shared analysis bundle of a pool size, read on the prefetch thread on a cache miss.
+
+    Unlike get_analysis_bundle, this never reads from disk on the calling thread,
+    so reactive code and request handlers can poll the future instead of waiting.
+    """
+    key = (tournament, normalize_pool_size(pool_size))
+    bundle = _bundle_cache.get(key)
+    if bundle is not None:
+        future = Future()
+        future.set_result(bundle)
+        return future
+    with _pending_lock:
+        future = _pending.get(key)
+    if future is not None:
+        return future
+    logger.info(f"Loading analysis data for {pool_size} entries pool in the background")
+    return _prefetch_executor.submit(_load_bundle, key)
+
+
+def prefetch_analysis_bundles(tournament: str = DEFAULT_TOURNAMENT,
+                              pool_sizes: Optional[List[str]] = None) -> List[Future]:
+    """
+    Load bundles for the given pool sizes on a background thread.
+
+    Bundles that are already cached or being loaded are skipped.
+
+    Args:
+        tournament: Tournament key ("men" or "women")
+        pool_sizes: Pool sizes to load (defaults to all pool sizes offered in the UI)
+
+    Returns:
+        Futures for the loads that were started
+    """
+    futures = []
+    for pool_size in pool_sizes or POOL_SIZES:
+        key = (tournament, str(pool_size))
+        with _pending_lock:
+            if key in _bundle_cache or key in _pending:
+                continue
+        futures.append(_prefetch_executor.submit(_load_bundle, key))
+    return futures
+
+
+def clear_analysis_cache(tournament: Optional[str] = None) -> int:
+    """Drop cached bundles (for one tournament, or all if omitted) so they are reloaded"""
+    return _bundle_cache.invalidate(None if tournament is None else lambda key: key[0] == tournament)
+
+
+def get_analysis_cache_stats() -> Dict[str, int]:
+    """Hit/miss counters for the analysis bundle cache"""
+    return _bundle_cache.stats()
@@ -0,0 +1,244 @@
+#!/usr/bin/env python
+# -*-coding:utf-8 -*-
+'''
+@File    :   api.py
+@Time    :   2026/10/17
+@Author  :   Taylor Firman
+@Version :   1.0
+@Contact :   tefirman@gmail.com
+@Desc    :   JSON assessment API served next to the Shiny app for March Madness bracket app
+'''
+
+import argparse
+import asyncio
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+import orjson
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.routing import Mount, Route
+
+from analysis import (DEFAULT_POOL_SIZE, POOL_SIZES, get_analysis_bundle, get_cached_analysis_bundle,
+                      has_analysis_data, normalize_pool_size)
+from cache import LRUCache
+from compact_bracket import CompactBracket
+from data import TOURNAMENT, TournamentIndex, get_data_version, get_tournament_index
+from server import analyze_compact_bracket, assessment_key, failed_analysis
+from simulator import request_pool_sample
+
+logger = logging.getLogger(__name__)
+
+# Serialized responses kept for repeated brackets (keyed like the app's assessment cache)
+API_CACHE_SIZE = int(os.environ.get("BRACKET_API_CACHE_SIZE", "4096"))
+
+# Assessments computed at the same time (requests beyond this wait their turn off the event loop)
+API_WORKERS = 4
+
+_response_cache = LRUCache(API_CACHE_SIZE, name="assessment API responses")
+_pending_responses: Dict[tuple, Future] = {}
+_pending_responses_lock = threading.Lock()
+_api_executor = ThreadPoolExecutor(max_workers=API_WORKERS, thread_name_prefix="assessment-api")
+
+
+def parse_bracket(payload: Dict, table: TournamentIndex) -> CompactBracket:
+    """
+    Read the bracket from a request body.
+
+    Accepts either "compact", the 16-byte CompactBracket.to_bytes encoding
+    as 32 hex digits, or "picks", a map of game ids to winner names. Picks
+    that are not valid for their matchup are left undecided, as in the app.
+
+    Raises:
+        ValueError: If neither encoding is present or the compact encoding is malformed
+    """
+    if "compact" in payload:
+        data = bytes.fromhex(str(payload["compact"]))
+        if len(data) != 16:
+            raise ValueError("'compact' must be 32 hex digits (16 bytes)")
+        return CompactBracket.from_winner_slots(CompactBracket.from_bytes(data).winner_slots())
+    if isinstance(payload.get("picks"), dict):
+        return CompactBracket.from_picks(payload["picks"], table)
+    raise ValueError("Request needs a 'compact' bracket (32 hex digits) or a 'picks' map of game ids to team names")
+
+
+def _json(content) -> bytes:
+    return orjson.dumps(content, option=orjson.OPT_SERIALIZE_NUMPY)
+
+
+def _build_response(request_key: tuple) -> Tuple[int, bytes]:
+    """
+    Analyze a bracket and serialize the result, caching successes (runs on the API executor).
+
+    Only pool sizes that already have analysis data are served (404 otherwise):
+    simulating new sizes is left to the app, so requests cannot start it.
+    """
+    tournament, pool_size, compact_bracket = request_key
+    try:
+        if not has_analysis_data(pool_size, tournament):
+            return 404, _json({'error': f"No analysis data for {pool_size}-entry pools "
+                                        f"(available: {', '.join(POOL_SIZES)} and sizes simulated in the app)"})
+        bundle = get_analysis_bundle(pool_size, tournament)
+        # Wait for the pool sample so every response carries a win estimate (and can be cached)
+        request_pool_sample(int(bundle.pool_size), tournament).result()
+        key = assessment_key(compact_bracket, bundle)
+        status, body = 200, _json(analyze_compact_bracket(compact_bracket, bundle))
+        # Only cache results computed from the data version in the key
+        if get_data_version() == key[-1]:
+            _response_cache.put(key, body)
+    except Exception as e:
+        logger.error(f"Error analyzing bracket for the API: {str(e)}")
+        status, body = 500, _json(failed_analysis(str(e)))
+    finally:
+        with _pending_responses_lock:
+            del _pending_responses[request_key]
+    return status, body
+
+
+def request_response(request_key: tuple) -> Future:
+    """Future for a response being built, shared by concurrent requests for the same (tournament, pool size, bracket)"""
+    with _pending_responses_lock:
+        future = _pending_responses.get(request_key)
+        if future is None:
+            future = _api_executor.submit(_build_response, request_key)
+            _pending_responses[request_key] = future
+        return future
+
+
+async def assessment(request: Request) -> Response:
+    """
+    POST /api/assessment: analyze a bracket and return the analyze_bracket result as JSON.
+
+    The body is a JSON object with the bracket ("compact" or "picks", see
+    parse_bracket) and an optional "pool_size", which must have analysis
+    data (404 otherwise). Cached responses are served directly; everything
+    else, including loading the pool size's analysis data, runs on the API
+    executor so the event loop shared with the Shiny sessions never waits.
+    """
+    try:
+        payload = orjson.loads(await request.body())
+        if not isinstance(payload, dict):
+            raise ValueError("Request body must be a JSON object")
+        compact_bracket = parse_bracket(payload, get_tournament_index())
+    except (ValueError, TypeError) as e:
+        return Response(_json({'error': str(e)}), status_code=400, media_type="application/json")
+
+    pool_size = normalize_pool_size(payload.get("pool_size", DEFAULT_POOL_SIZE))
+    # Look up the response cache only if the pool size's bundle is already in memory
+    bundle = get_cached_analysis_bundle(pool_size, TOURNAMENT)
+    if bundle is not None:
+        body = _response_cache.get(assessment_key(compact_bracket, bundle))
+        if body is not None:
+            return Response(body, media_type="application/json", headers={"X-Cache": "hit"})
+    status, body = await asyncio.wrap_future(request_response((TOURNAMENT, pool_size, compact_bracket)))
+    return Response(body, status_code=status, media_type="application/json", headers={"X-Cache": "miss"})
+
+
+async def stats(request: Request) -> Response:
+    """GET /api/stats: response cache counters and assessments in progress"""
+    return Response(_json({
+        'cache': _response_cache.stats(),
+        'pending': len(_pending_responses),
+        'data_version': get_data_version()
+    }), media_type="application/json")
+
+
+routes = [
+    Route("/assessment", assessment, methods=["POST"]),
+    Route("/stats", stats, methods=["GET"])
+]
+
+
+def create_app(shiny_app) -> Starlette:
+    """ASGI app serving the API under /api and the Shiny app everywhere else"""
+    @asynccontextmanager
+    async def lifespan(app: Starlette):
+        # Run the Shiny app's startup and shutdown hooks, which a mounted app would otherwise miss
+        async with shiny_app.starlette_app.router.lifespan_context(shiny_app.starlette_app):
+            yield
+
+    return Starlette(routes=[Mount("/api", routes=routes), Mount("/", app=shiny_app)], lifespan=lifespan)
+
+
+def load_test(url: str, requests_count: int, concurrency: int, distinct: int, pool_size: int,
+              seed: int = 2026) -> Dict:
+    """
+    Fire assessment requests at a running app and summarize the latencies.
+
+    Brackets are drawn from the tournament model with varied upset factors,
+    and requests cycle through `distinct` of them, so the cache hit rate can
+    be dialed from none (distinct >= requests) to nearly all (distinct = 1).
+
+    Args:
+        url: Base URL of the app (e.g. http://127.0.0.1:8000)
+        requests_count: Total requests to send
+        concurrency: Requests in flight at once
+        distinct: Number of different brackets to cycle through
+        pool_size: Pool size sent with every request
+        seed: Random seed for the brackets
+
+    Returns:
+        Dictionary with throughput, latency percentiles (ms), status counts and cache hits
+    """
+    import requests
+    from simulator import draw_upset_factors, get_tournament_model, simulate_brackets
+
+    model = get_tournament_model()
+    rng = np.random.default_rng(seed)
+    brackets = simulate_brackets(model, draw_upset_factors(rng, distinct), rng)
+    bodies = [_json({'compact': CompactBracket.from_winner_slots(row.tolist()).to_bytes().hex(),
+                     'pool_size': pool_size}) for row in brackets]
+    local = threading.local()
+
+    def send(index: int) -> Tuple[float, int, bool]:
+        if not hasattr(local, 'session'):
+            local.session = requests.Session()
+        start = time.perf_counter()
+        response = local.session.post(f"{url}/api/assessment", data=bodies[index % distinct],
+                                      headers={"Content-Type": "application/json"})
+        return time.perf_counter() - start, response.status_code, response.headers.get("X-Cache") == "hit"
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(send, range(requests_count)))
+    elapsed = time.perf_counter() - start
+
+    latencies = np.array([latency for latency, _, _ in results]) * 1000
+    statuses = {}
+    for _, status, _ in results:
+        statuses[status] = statuses.get(status, 0) + 1
+    return {
+        'requests': requests_count,
+        'concurrency': concurrency,
+        'elapsed': elapsed,
+        'requests_per_second': requests_count / elapsed,
+        'latency_ms': {f'p{q}': float(np.percentile(latencies, q)) for q in (50, 90, 99)},
+        'max_latency_ms': float(latencies.max()),
+        'statuses': statuses,
+        'cache_hits': sum(hit for _, _, hit in results)
+    }
+
+
+def main(argv: Optional[Sequence[str]] = None):
+    """Command line entry point for load testing the assessment API of a running app"""
+    parser = argparse.ArgumentParser(description="Load test the assessment API (start the app first with python app.py)")
+    parser.add_argument("--url", default=f"http://127.0.0.1:{os.environ.get('PORT', 8000)}", help="Base URL of the app")
+    parser.add_argument("--requests", type=int, default=1000, help="Total requests to send")
+    parser.add_argument("--concurrency", type=int, default=16, help="Requests in flight at once")
+    parser.add_argument("--distinct", type=int, default=100, help="Different brackets to cycle through")
+    parser.add_argument("--pool-size", type=int, default=int(DEFAULT_POOL_SIZE), help="Entries per pool")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    print(orjson.dumps(load_test(args.url, args.requests, args.concurrency, args.distinct, args.pool_size),
+                       option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS).decode())
+
+
+if __name__ == "__main__":
+    main()
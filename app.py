@@ -11,6 +11,7 @@
 
 from shiny import App
 import logging
+import uvicorn
 from datetime import datetime
 from pathlib import Path
 import os
@@ -18,7 +19,10 @@ import os
 # Import our modular components
 from ui import app_ui
 from server import server
+from api import create_app
 from data import initialize_tournament_data
+from snapshot import ensure_snapshot
+from refresher import start_refresher
 
 # Set up logging configuration
 logs_dir = Path('logs')
@@ -46,8 +50,12 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# Create the app object that shinyapps.io is looking for
-app = App(app_ui, server)
+# Keep tournament data fresh in the background when BRACKET_REFRESH_INTERVAL is set
+start_refresher()
+
+# Create the app object that shinyapps.io is looking for (the Shiny app, with the JSON API under /api)
+shiny_app = App(app_ui, server)
+app = create_app(shiny_app)
 
 def main():
     """Main entry point for the application"""
@@ -56,10 +64,16 @@ def main():
         logger.info("Initializing tournament data...")
         initialize_tournament_data()
         
+        # Compile analysis data into memory-mapped snapshots (rebuilt only when the source files change).
+        # Done here rather than on import, since every server worker imports this module: deployments
+        # that import `app` directly build them beforehand with `python snapshot.py build`
+        for tournament in ["men", "women"]:
+            ensure_snapshot(tournament)
+        
         # Run the app
         logger.info("Starting application...")
         port = int(os.environ.get("PORT", 8000))
-        app.run(host="0.0.0.0", port=port)
+        uvicorn.run(app, host="0.0.0.0", port=port)
         
     except Exception as e:
         logger.error(f"Error running application: {str(e)}", exc_info=True)
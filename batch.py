@@ -0,0 +1,147 @@
+#!/usr/bin/env python
+# -*-coding:utf-8 -*-
+'''
+@File    :   batch.py
+@Time    :   2026/10/17
+@Author  :   Taylor Firman
+@Version :   1.0
+@Contact :   tefirman@gmail.com
+@Desc    :   Headless batch bracket scoring for March Madness bracket app
+'''
+
+import argparse
+import csv
+import gc
+import logging
+import sys
+import time
+from itertools import islice
+from typing import BinaryIO, Dict, Iterable, Iterator, Optional, Sequence, TextIO, Tuple
+
+import numpy as np
+import orjson
+
+from compact_bracket import GAME_IDS, valid_winner_slots
+from data import TOURNAMENT
+from server import analyze_brackets
+from simulator import get_any_analysis_bundle, get_tournament_model, request_pool_sample
+
+logger = logging.getLogger(__name__)
+
+# Brackets scored per vectorized batch (memory stays bounded by this, not by the input size)
+BATCH_SIZE = 1024
+
+# Numpy scalars from the analysis tables serialize as plain numbers, one bracket per line
+_JSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_APPEND_NEWLINE
+
+
+def read_csv_brackets(stream: TextIO) -> Iterator[Tuple[str, Dict[str, str]]]:
+    """Brackets from CSV rows with one column per game id (an optional "id" column names each bracket)"""
+    for number, row in enumerate(csv.DictReader(stream), 1):
+        yield row.get("id") or str(number), row
+
+
+def read_jsonl_brackets(stream: BinaryIO) -> Iterator[Tuple[str, Dict[str, str]]]:
+    """Brackets from JSON lines (read as bytes), either flat picks or {"id": ..., "picks": {...}}"""
+    for number, line in enumerate(stream, 1):
+        if not line.strip():
+            continue
+        record = orjson.loads(line)
+        yield str(record.get("id", number)), record.get("picks", record)
+
+
+def score_brackets(brackets: Iterable[Tuple[str, Dict[str, str]]], pool_size: int, output: BinaryIO,
+                   tournament: str = TOURNAMENT, batch_size: int = BATCH_SIZE) -> Dict:
+    """
+    Analyze brackets in batches and write one JSON line per bracket.
+
+    Picks are keyed by the same game ids the app uses; missing, unknown or
+    invalid picks are left undecided, as in the app. Each line holds the
+    bracket's id and the full analyze_bracket result, with the win estimate
+    scored against the same cached pool sample the app uses.
+
+    Args:
+        brackets: (id, picks) pairs, read lazily
+        pool_size: Number of entries in the pool
+        output: Binary stream the JSON lines are written to (UTF-8)
+        tournament: Tournament key ("men" or "women")
+        batch_size: Brackets analyzed per vectorized batch
+
+    Returns:
+        Dictionary with the number of brackets scored, the elapsed seconds and the rate per second
+    """
+    start = time.perf_counter()
+    bundle = get_any_analysis_bundle(pool_size, tournament)
+    sample = request_pool_sample(int(bundle.pool_size), tournament).result()
+    # Picks resolve against the requested tournament's teams, like the pool sample's
+    table = get_tournament_model(tournament).index
+    slot_of = dict(table.slot_of).get
+    logger.info(f"Loaded analysis data and pool sample for {bundle.pool_size} entries "
+                f"in {time.perf_counter() - start:.2f}s")
+
+    start = time.perf_counter()
+    count = 0
+    brackets = iter(brackets)
+    while True:
+        chunk = list(islice(brackets, batch_size))
+        if not chunk:
+            break
+        picked_slots = [slot_of(name, -1) for _, picks in chunk for name in map(picks.get, GAME_IDS)]
+        slots = valid_winner_slots(np.array(picked_slots, dtype=np.intp).reshape(len(chunk), len(GAME_IDS)))
+        wins = sample.win_probabilities(slots)
+        complete = (slots >= 0).all(axis=1).tolist()
+        win_estimates = [{'win_probability': win_probability, 'std_error': std_error, 'sims': wins['sims'],
+                          'baseline': wins['baseline'], 'complete': is_complete}
+                         for win_probability, std_error, is_complete
+                         in zip(wins['win_probability'].tolist(), wins['std_error'].tolist(), complete)]
+        results = analyze_brackets(slots, bundle, table, win_estimates)
+        output.write(b"".join(orjson.dumps({'id': bracket_id, **result}, option=_JSON_OPTIONS)
+                              for (bracket_id, _), result in zip(chunk, results)))
+        count += len(chunk)
+
+    elapsed = time.perf_counter() - start
+    return {'brackets': count, 'elapsed': elapsed, 'rate': count / elapsed if elapsed > 0 else 0.0}
+
+
+def main(argv: Optional[Sequence[str]] = None):
+    """Command line entry point for scoring a file of brackets"""
+    parser = argparse.ArgumentParser(description="Analyze brackets from a CSV or JSON lines file and write "
+                                                 "one JSON line of results per bracket")
+    parser.add_argument("input", nargs="?", default="-", help="Bracket file (- for standard input)")
+    parser.add_argument("--format", choices=["csv", "jsonl"], help="Input format (defaults to the file extension, "
+                                                                   "or jsonl for standard input)")
+    parser.add_argument("--pool-size", type=int, default=100, help="Entries per pool")
+    parser.add_argument("--tournament", default=TOURNAMENT, choices=["men", "women"], help="Tournament to analyze")
+    parser.add_argument("--output", default="-", help="Results file (- for standard output)")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="Brackets analyzed per batch")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+                        stream=sys.stderr)
+
+    input_format = args.format or ("csv" if args.input.lower().endswith(".csv") else "jsonl")
+    reader = read_csv_brackets if input_format == "csv" else read_jsonl_brackets
+    if input_format == "csv":
+        input_stream = sys.stdin if args.input == "-" else open(args.input, newline="")
+    else:
+        input_stream = sys.stdin.buffer if args.input == "-" else open(args.input, "rb")
+    output_stream = sys.stdout.buffer if args.output == "-" else open(args.output, "wb")
+
+    # Scoring allocates short-lived result dictionaries by the hundred thousand, none of them
+    # in reference cycles: pause the cyclic collector for the run instead of letting it rescan the heap
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        stats = score_brackets(reader(input_stream), args.pool_size, output_stream, args.tournament,
+                               args.batch_size)
+    finally:
+        if gc_enabled:
+            gc.enable()
+        if args.input != "-":
+            input_stream.close()
+        if args.output != "-":
+            output_stream.close()
+    logger.info(f"Scored {stats['brackets']} brackets in {stats['elapsed']:.2f}s ({stats['rate']:.0f} brackets/s)")
+
+
+if __name__ == "__main__":
+    main()
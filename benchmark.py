@@ -0,0 +1,301 @@
+#!/usr/bin/env python
+# -*-coding:utf-8 -*-
+'''
+@File    :   benchmark.py
+@Time    :   2026/10/17
+@Author  :   Taylor Firman
+@Version :   1.0
+@Contact :   tefirman@gmail.com
+@Desc    :   Micro-benchmarks of the server hot paths for March Madness bracket app
+'''
+
+import argparse
+import json
+import logging
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence
+
+from shiny.types import SilentException
+
+from analysis import POOL_SIZES, clear_analysis_cache, get_analysis_dir
+from bracket_state import BracketState
+from compact_bracket import NUM_GAMES, ROUND_OFFSETS
+from data import REGIONS, TOURNAMENT, TournamentIndex, get_tournament_index, load_tournament_teams, set_tournament_teams
+from server import (analyze_bracket, create_bracket_from_picks, format_bracket_assessment, get_matchups_for_round,
+                    load_analysis_data)
+from simulator import request_pool_sample
+
+logger = logging.getLogger(__name__)
+
+TOURNAMENTS = ["men", "women"]
+
+# Fixture brackets: every favorite, every underdog, and favorites through the second round only
+FIXTURES = ["chalk", "upsets", "partial"]
+
+# Timed calls per measurement (after one untimed warm-up call)
+REPEAT = 20
+
+# Median slowdown against a baseline run that counts as a regression
+REGRESSION_THRESHOLD = 1.25
+
+
+class BenchmarkInput:
+    """
+    Stand-in for the Shiny input object.
+
+    Supports input[game_id]() and input.pool_size(); games without a pick
+    raise SilentException, like inputs the page has not reported yet.
+    """
+
+    def __init__(self, picks: Dict[str, str], pool_size: str):
+        self.picks = picks
+        self._pool_size = pool_size
+
+    def __getitem__(self, game_id: str) -> Callable[[], str]:
+        def value() -> str:
+            if game_id not in self.picks:
+                raise SilentException()
+            return self.picks[game_id]
+        return value
+
+    def pool_size(self) -> str:
+        return self._pool_size
+
+
+def fixture_picks(table: TournamentIndex, fixture: str) -> Dict[str, str]:
+    """
+    Picks for one of the fixture brackets.
+
+    Args:
+        table: Index of the tournament teams
+        fixture: "chalk" (the higher seed wins every game), "upsets" (the lower
+            seed wins every game) or "partial" (chalk through the second round,
+            later games undecided)
+
+    Returns:
+        Mapping of game ids to winner names (decided games only)
+    """
+    if fixture not in FIXTURES:
+        raise ValueError(f"Unknown fixture {fixture!r} (expected one of {', '.join(FIXTURES)})")
+    state = BracketState(table)
+    for index in range(ROUND_OFFSETS[3] if fixture == "partial" else NUM_GAMES):
+        first, second = state.matchup(index)
+        favorite = state.default_winner(index)
+        winner = (second if favorite == first else first) if fixture == "upsets" else favorite
+        state.set_pick(index, table.names[winner])
+    return state.to_compact().to_picks(table)
+
+
+def measure(function: Callable[[], object], repeat: int = REPEAT) -> Dict[str, float]:
+    """
+    Time a call and trace the memory it allocates.
+
+    Args:
+        function: Call to measure (run repeat + 2 times)
+        repeat: Number of timed calls, made after one untimed warm-up call
+
+    Returns:
+        Dictionary with latency statistics in milliseconds, plus the peak memory
+        allocated during one traced call and the part of it still held afterwards (KiB)
+    """
+    function()
+    latencies = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    # Traced separately, since tracing slows every allocation down
+    tracemalloc.start()
+    try:
+        function()
+        retained, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'median_ms': statistics.median(latencies),
+        'min_ms': min(latencies),
+        'mean_ms': statistics.fmean(latencies),
+        'max_ms': max(latencies),
+        'peak_kib': peak / 1024,
+        'retained_kib': retained / 1024
+    }
+
+
+def benchmark_analysis_dir(tournament: str, pool_size: str, repeat: int = REPEAT) -> List[Dict]:
+    """
+    Measure the hot paths against one analysis directory.
+
+    load_analysis_data is measured both from disk (cache cleared before each
+    call) and from the bundle cache. get_matchups_for_round is measured as one
+    sweep over every region and round, as a full page render does. The pool
+    sample is built up front, so analyze_bracket includes the win estimate.
+
+    Args:
+        tournament: Tournament key ("men" or "women"), whose teams must be the current tournament data
+        pool_size: Pool size of the analysis directory
+        repeat: Timed calls per measurement
+
+    Returns:
+        One result dictionary per function (and fixture)
+    """
+    results = []
+
+    def record(function: str, fixture: Optional[str], call: Callable[[], object]):
+        results.append({'function': function, 'tournament': tournament, 'pool_size': pool_size,
+                        'fixture': fixture, **measure(call, repeat)})
+
+    def load_from_disk():
+        clear_analysis_cache(tournament)
+        return load_analysis_data(pool_size, tournament)
+
+    record('load_analysis_data', 'disk', load_from_disk)
+    record('load_analysis_data', 'cached', lambda: load_analysis_data(pool_size, tournament))
+
+    bundle = load_analysis_data(pool_size, tournament)['bundle']
+    request_pool_sample(int(pool_size), tournament).result()
+    table = get_tournament_index()
+
+    for fixture in FIXTURES:
+        input = BenchmarkInput(fixture_picks(table, fixture), pool_size)
+        assessment = analyze_bracket(input, bundle)
+        record('create_bracket_from_picks', fixture, lambda: create_bracket_from_picks(input))
+        record('get_matchups_for_round', fixture,
+               lambda: [get_matchups_for_round(input, region, round_num)
+                        for region in REGIONS for round_num in range(1, 5)])
+        record('analyze_bracket', fixture, lambda: analyze_bracket(input, bundle))
+        record('format_bracket_assessment', fixture, lambda: format_bracket_assessment(assessment, input))
+    return results
+
+
+def run_benchmarks(tournaments: Sequence[str] = TOURNAMENTS, pool_sizes: Sequence[str] = POOL_SIZES,
+                   repeat: int = REPEAT) -> List[Dict]:
+    """
+    Benchmark every analysis directory of the given tournaments and pool sizes.
+
+    Each tournament's teams are swapped in as the current tournament data while
+    its directories are measured, and the original teams are restored afterwards.
+
+    Returns:
+        Result dictionaries for all directories (missing directories are skipped with a warning)
+    """
+    original_teams = load_tournament_teams(TOURNAMENT)
+    results = []
+    try:
+        for tournament in tournaments:
+            set_tournament_teams(load_tournament_teams(tournament))
+            for pool_size in pool_sizes:
+                if not get_analysis_dir(tournament, str(pool_size)).exists():
+                    logger.warning(f"No analysis data for {tournament} {pool_size}-entry pools, skipping")
+                    continue
+                start = time.perf_counter()
+                results.extend(benchmark_analysis_dir(tournament, str(pool_size), repeat))
+                logger.info(f"Benchmarked {tournament} {pool_size}-entry pools in {time.perf_counter() - start:.1f}s")
+    finally:
+        set_tournament_teams(original_teams)
+    return results
+
+
+def result_key(result: Dict) -> tuple:
+    """Identity of a measurement, for matching it across runs"""
+    return (result['function'], result['tournament'], result['pool_size'], result['fixture'])
+
+
+def compare_results(results: List[Dict], baseline: List[Dict],
+                    threshold: float = REGRESSION_THRESHOLD) -> List[Dict]:
+    """
+    Compare median latencies with a baseline run.
+
+    Args:
+        results: Results of this run
+        baseline: Results of an earlier run (e.g. another commit)
+        threshold: Ratio of medians above which a measurement counts as a regression
+
+    Returns:
+        One row per measurement present in both runs, with the ratio and a regression flag
+    """
+    baseline_by_key = {result_key(result): result for result in baseline}
+    rows = []
+    for result in results:
+        previous = baseline_by_key.get(result_key(result))
+        if previous is None:
+            continue
+        ratio = result['median_ms'] / previous['median_ms'] if previous['median_ms'] > 0 else float('inf')
+        rows.append({
+            'function': result['function'],
+            'tournament': result['tournament'],
+            'pool_size': result['pool_size'],
+            'fixture': result['fixture'],
+            'baseline_ms': previous['median_ms'],
+            'median_ms': result['median_ms'],
+            'ratio': ratio,
+            'regression': ratio > threshold
+        })
+    return rows
+
+
+def current_commit() -> Optional[str]:
+    """Commit of the working tree, if it is a git checkout"""
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True,
+                              cwd=Path(__file__).parent).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv: Optional[Sequence[str]] = None):
+    """Command line entry point for running the benchmarks and comparing them with an earlier run"""
+    parser = argparse.ArgumentParser(description="Benchmark the server hot paths on fixture brackets for every "
+                                                 "analysis directory and write the results as JSON")
+    parser.add_argument("--tournament", nargs="+", default=TOURNAMENTS, choices=TOURNAMENTS, help="Tournaments to benchmark")
+    parser.add_argument("--pool-size", nargs="+", default=POOL_SIZES, help="Pool sizes to benchmark")
+    parser.add_argument("--repeat", type=int, default=REPEAT, help="Timed calls per measurement")
+    parser.add_argument("--output", default="-", help="Results file (- for standard output)")
+    parser.add_argument("--compare", type=Path, default=None, help="Results file of an earlier run to compare against")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD,
+                        help="Median slowdown that counts as a regression when comparing")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+                        stream=sys.stderr)
+
+    results = run_benchmarks(args.tournament, args.pool_size, args.repeat)
+    report = {
+        'commit': current_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'timestamp': time.time(),
+        'repeat': args.repeat,
+        'results': results
+    }
+
+    regressions = []
+    if args.compare is not None:
+        with open(args.compare, 'r') as f:
+            baseline = json.load(f)
+        report['baseline_commit'] = baseline.get('commit')
+        report['comparison'] = compare_results(results, baseline['results'], args.threshold)
+        regressions = [row for row in report['comparison'] if row['regression']]
+        for row in regressions:
+            logger.warning(f"Regression in {row['function']} ({row['tournament']}, {row['pool_size']} entries, "
+                           f"{row['fixture']}): {row['baseline_ms']:.3f}ms -> {row['median_ms']:.3f}ms "
+                           f"({row['ratio']:.2f}x)")
+
+    text = json.dumps(report, indent=2)
+    if args.output == "-":
+        print(text)
+    else:
+        with open(args.output, 'w') as f:
+            f.write(text + "\n")
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
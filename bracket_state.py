@@ -0,0 +1,138 @@
+#!/usr/bin/env python
+# -*-coding:utf-8 -*-
+'''
+@File    :   bracket_state.py
+@Time    :   2026/10/17
+@Author  :   Taylor Firman
+@Version :   1.0
+@Contact :   tefirman@gmail.com
+@Desc    :   Incremental per-session bracket state for March Madness bracket app
+'''
+
+import logging
+from typing import List, Optional, Tuple
+
+from bigdance.cbb_brackets import Team
+
+from compact_bracket import CompactBracket, FEEDERS, PARENTS, get_round_games
+from data import TournamentIndex
+
+logger = logging.getLogger(__name__)
+
+
+class BracketState:
+    """
+    Mutable view of one user's picks that is updated one game at a time.
+
+    Changing a pick only touches the games along the affected team's path
+    to the championship (at most 6 games), so renderers can read per-game
+    matchups without rebuilding the bracket from all 63 inputs.
+    """
+
+    def __init__(self, table: TournamentIndex, bracket: Optional[CompactBracket] = None):
+        """
+        Args:
+            table: Index of the tournament teams
+            bracket: Optional starting picks (defaults to an empty bracket)
+        """
+        self.table = table
+        self.winners = (bracket or CompactBracket()).winner_slots()
+
+    def matchup(self, index: int) -> Tuple[Optional[int], Optional[int]]:
+        """Team slots playing in a game (None for a team whose feeder game is undecided)"""
+        if index < 32:
+            return (2 * index, 2 * index + 1)
+        first, second = FEEDERS[index]
+        return (self.winners[first], self.winners[second])
+
+    def matchup_teams(self, index: int) -> Tuple[Optional[Team], Optional[Team]]:
+        """Team objects playing in a game"""
+        teams = self.table.teams
+        return tuple(teams[slot] if slot is not None else None for slot in self.matchup(index))
+
+    def winner_name(self, index: int) -> Optional[str]:
+        """Name of the team picked to win a game (None if undecided)"""
+        slot = self.winners[index]
+        return self.table.names[slot] if slot is not None else None
+
+    def default_winner(self, index: int) -> Optional[int]:
+        """Slot of the higher seed in a game, the pick its radio buttons start on (None if the matchup is incomplete)"""
+        first, second = self.matchup(index)
+        if first is None or second is None:
+            return None
+        teams = self.table.teams
+        return first if teams[first].seed < teams[second].seed else second
+
+    def matchups_for_round(self, region: str, round_num: int) -> List[Tuple[Optional[Team], Optional[Team]]]:
+        """Team matchups for a region's games in a round"""
+        return [self.matchup_teams(index) for index in get_round_games(region, round_num)]
+
+    def set_pick(self, index: int, winner_name: Optional[str]) -> List[int]:
+        """
+        Record the winner of a single game and invalidate downstream picks.
+
+        Any later-round pick of the team that no longer advances out of this
+        game is cleared, walking up that team's path until it stops appearing.
+
+        Args:
+            index: Game index in the 63-game layout
+            winner_name: Name of the picked team (None or an invalid team is ignored)
+
+        Returns:
+            Indices of the games whose matchups changed
+        """
+        slot = self.table.slot_of.get(winner_name) if winner_name else None
+        if slot is None or slot not in self.matchup(index):
+            return []
+
+        old_slot = self.winners[index]
+        if old_slot == slot:
+            return []
+        self.winners[index] = slot
+
+        changed = []
+        parent = PARENTS[index]
+        while parent is not None:
+            changed.append(parent)
+            if old_slot is None or self.winners[parent] != old_slot:
+                break
+            self.winners[parent] = None
+            parent = PARENTS[parent]
+        return changed
+
+    def apply_pick(self, index: int, winner_name: Optional[str]) -> List[int]:
+        """
+        Record the winner of a single game and resolve the whole cascade it starts.
+
+        Downstream games left undecided with both teams known get their
+        default pick (the higher seed), as their radio buttons would show it,
+        which may in turn complete the next game's matchup. The result is the
+        same as the client echoing each new default back one round at a time,
+        but settled in a single update.
+
+        Args:
+            index: Game index in the 63-game layout
+            winner_name: Name of the picked team (None or an invalid team is ignored)
+
+        Returns:
+            Indices of the games whose matchups changed, in game order
+        """
+        changed = set(self.set_pick(index, winner_name))
+        pending = sorted(changed)
+        while pending:
+            game = pending.pop(0)
+            if self.winners[game] is not None:
+                continue
+            default = self.default_winner(game)
+            if default is None:
+                continue
+            for parent in self.set_pick(game, self.table.names[default]):
+                if parent not in changed:
+                    changed.add(parent)
+                    pending.append(parent)
+            pending.sort()
+        return sorted(changed)
+
+    def to_compact(self) -> CompactBracket:
+        """Snapshot the current picks as an immutable CompactBracket"""
+        return CompactBracket.from_winner_slots(self.winners)
@@ -0,0 +1,291 @@
+#!/usr/bin/env python
+# -*-coding:utf-8 -*-
+'''
+@File    :   compact_bracket.py
+@Time    :   2026/10/17
+@Author  :   Taylor Firman
+@Version :   1.0
+@Contact :   tefirman@gmail.com
+@Desc    :   Compact 63-bit bracket encoding for March Madness bracket app
+'''
+
+import logging
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
+from bigdance.cbb_brackets import Bracket, Team
+
+from data import REGIONS, TournamentIndex
+
+logger = logging.getLogger(__name__)
+
+ROUND_NAMES = {
+    1: "First Round",
+    2: "Second Round",
+    3: "Sweet 16",
+    4: "Elite 8",
+    5: "Final Four",
+    6: "Championship"
+}
+
+NUM_SLOTS = 64
+NUM_GAMES = 63
+FULL_MASK = (1 << NUM_GAMES) - 1
+
+# Index of the first game of each round in the 63-game layout (round 7 is a sentinel)
+ROUND_OFFSETS = {1: 0, 2: 32, 3: 48, 4: 56, 5: 60, 6: 62, 7: 63}
+
+
+def _build_layout():
+    """Build the game id, round and feeder tables for the 63-game layout"""
+    game_ids = []
+    game_rounds = []
+    for round_num in range(1, 7):
+        if round_num <= 4:
+            games_per_region = 2 ** (4 - round_num)
+            for region in REGIONS:
+                for i in range(games_per_region):
+                    game_ids.append(f"{region.lower()}_round{round_num}_game_{i}")
+                    game_rounds.append(round_num)
+        else:
+            for i in range(2 ** (6 - round_num)):
+                game_ids.append(f"final_round{round_num}_game_{i}")
+                game_rounds.append(round_num)
+
+    feeders = []
+    parents = [None] * NUM_GAMES
+    for index, round_num in enumerate(game_rounds):
+        if round_num == 1:
+            feeders.append(None)
+            continue
+        position = index - ROUND_OFFSETS[round_num]
+        first = ROUND_OFFSETS[round_num - 1] + 2 * position
+        feeders.append((first, first + 1))
+        parents[first] = index
+        parents[first + 1] = index
+
+    return game_ids, game_rounds, feeders, parents
+
+
+# Shiny input id, round number, feeder games and parent game for each game index
+GAME_IDS, GAME_ROUNDS, FEEDERS, PARENTS = _build_layout()
+
+_ROUND_STARTS = np.array([ROUND_OFFSETS[round_num] for round_num in range(1, 7)])
+_FIRST_ROUND_TEAMS = np.arange(NUM_SLOTS).reshape(-1, 2)
+_LATER_FEEDERS = np.array(FEEDERS[ROUND_OFFSETS[2]:])
+GAME_INDEX = {game_id: index for index, game_id in enumerate(GAME_IDS)}
+
+
+def get_round_games(region: str, round_num: int) -> range:
+    """Game indices for a region's games in a round (all games for the Final Four and Championship)"""
+    start, end = ROUND_OFFSETS[round_num], ROUND_OFFSETS[round_num + 1]
+    if round_num > 4:
+        return range(start, end)
+    games_per_region = (end - start) // len(REGIONS)
+    start += games_per_region * REGIONS.index(region.title())
+    return range(start, start + games_per_region)
+
+
+def game_log_probabilities(table: TournamentIndex, brackets: np.ndarray) -> np.ndarray:
+    """
+    Negative log probability of every pick in a batch of brackets.
+
+    Each pick is looked up in the index's log win probability matrix against
+    the opponent it faces in that bracket, so a bracket costs one gather over
+    its 63 games.
+
+    Args:
+        table: Index of the tournament teams
+        brackets: Winner slots of shape (n, 63), negative for undecided games
+
+    Returns:
+        Array of shape (n, 63), zero for games that are undecided or whose matchup is not known yet
+    """
+    brackets = np.asarray(brackets, dtype=np.intp)
+    count = len(brackets)
+    team1 = np.concatenate([np.broadcast_to(_FIRST_ROUND_TEAMS[:, 0], (count, NUM_SLOTS // 2)),
+                            brackets[:, _LATER_FEEDERS[:, 0]]], axis=1)
+    team2 = np.concatenate([np.broadcast_to(_FIRST_ROUND_TEAMS[:, 1], (count, NUM_SLOTS // 2)),
+                            brackets[:, _LATER_FEEDERS[:, 1]]], axis=1)
+    decided = (brackets >= 0) & (team1 >= 0) & (team2 >= 0)
+    losers = np.where(brackets == team1, team2, team1)
+    return np.where(decided, -table.log_win_prob[np.where(decided, brackets, 0), np.where(decided, losers, 0)], 0.0)
+
+
+def valid_winner_slots(brackets: np.ndarray) -> np.ndarray:
+    """
+    Vectorized counterpart of CompactBracket.from_winner_slots for a batch of brackets.
+
+    Picks that are not one of the two teams playing in their game (given the
+    bracket's earlier valid picks) are set to -1, as are negative picks.
+
+    Args:
+        brackets: Winner slots of shape (n, 63), negative for undecided games
+
+    Returns:
+        Array of shape (n, 63) with only valid picks kept
+    """
+    slots = np.array(brackets, dtype=np.intp)
+    first_round = slots[:, :NUM_SLOTS // 2]
+    first_round[(first_round >> 1) != np.arange(NUM_SLOTS // 2)] = -1
+    for round_num in range(2, 7):
+        games = slice(ROUND_OFFSETS[round_num], ROUND_OFFSETS[round_num + 1])
+        feeders = _LATER_FEEDERS[ROUND_OFFSETS[round_num] - ROUND_OFFSETS[2]:ROUND_OFFSETS[round_num + 1] - ROUND_OFFSETS[2]]
+        picks = slots[:, games]
+        valid = (picks >= 0) & ((picks == slots[:, feeders[:, 0]]) | (picks == slots[:, feeders[:, 1]]))
+        slots[:, games] = np.where(valid, picks, -1)
+    return slots
+
+
+def log_probabilities_by_round(table: TournamentIndex, brackets: np.ndarray) -> np.ndarray:
+    """Negative log probability of each round's picks, shape (n, 6), for a batch of brackets"""
+    return np.add.reduceat(game_log_probabilities(table, brackets), _ROUND_STARTS, axis=1)
+
+
+@dataclass(frozen=True, slots=True)
+class CompactBracket:
+    """
+    Immutable bracket value: one pick bit and one decided bit per game.
+
+    Bit g of `picks` is 0 if game g was won by the winner of its first feeder
+    (the upper team in the first round) and 1 if won by the second. Bit g of
+    `mask` is set when game g has been picked. A decided game always has both
+    of its feeder games decided.
+    """
+
+    picks: int = 0
+    mask: int = 0
+
+    @property
+    def is_complete(self) -> bool:
+        """Whether all 63 games have been picked"""
+        return self.mask == FULL_MASK
+
+    def winner_slots(self) -> List[Optional[int]]:
+        """Winning team slot for each of the 63 games (None if undecided)"""
+        picks, mask = self.picks, self.mask
+        slots = [None] * NUM_GAMES
+        for index in range(NUM_GAMES):
+            if not (mask >> index) & 1:
+                continue
+            bit = (picks >> index) & 1
+            if index < 32:
+                slots[index] = 2 * index + bit
+            else:
+                slots[index] = slots[FEEDERS[index][bit]]
+        return slots
+
+    @classmethod
+    def from_winner_slots(cls, slots: List[Optional[int]]) -> 'CompactBracket':
+        """
+        Encode a list of 63 winner slots, dropping any pick that is not one
+        of the two teams actually playing in that game.
+        """
+        picks = 0
+        mask = 0
+        decided = [None] * NUM_GAMES
+        for index in range(NUM_GAMES):
+            slot = slots[index]
+            if slot is None:
+                continue
+            if index < 32:
+                if slot >> 1 != index:
+                    continue
+                bit = slot & 1
+            else:
+                first, second = FEEDERS[index]
+                if decided[first] == slot:
+                    bit = 0
+                elif decided[second] == slot:
+                    bit = 1
+                else:
+                    continue
+            decided[index] = slot
+            mask |= 1 << index
+            picks |= bit << index
+        return cls(picks, mask)
+
+    @classmethod
+    def from_picks(cls, picks: Dict[str, Optional[str]], table: TournamentIndex) -> 'CompactBracket':
+        """
+        Encode a mapping of Shiny game ids ({region}_round{n}_game_{i}) to winner names.
+
+        Picks that are missing, unknown or no longer valid for the current
+        matchup (e.g. stale later-round selections) are left undecided.
+        """
+        slot_of = table.slot_of
+        return cls.from_winner_slots([slot_of.get(picks.get(game_id)) for game_id in GAME_IDS])
+
+    def to_picks(self, table: TournamentIndex) -> Dict[str, str]:
+        """Decode into a mapping of Shiny game ids to winner names (decided games only)"""
+        names = table.names
+        return {GAME_IDS[index]: names[slot]
+                for index, slot in enumerate(self.winner_slots()) if slot is not None}
+
+    @classmethod
+    def from_results(cls, results: Dict[str, Union[List[Team], Team]], table: TournamentIndex) -> 'CompactBracket':
+        """
+        Encode a Bracket.results style dictionary (round name -> list of winning teams).
+
+        Teams can be given as Team objects or names. Since every round r game
+        covers a block of 2**r slots, the game a team won is found from its slot alone.
+        """
+        slots = [None] * NUM_GAMES
+        for round_num, round_name in ROUND_NAMES.items():
+            for team in results.get(round_name, []):
+                name = team if isinstance(team, str) else team.name
+                slot = table.slot_of.get(name)
+                if slot is None:
+                    logger.warning(f"Unknown team {name} in {round_name} results")
+                    continue
+                slots[ROUND_OFFSETS[round_num] + (slot >> round_num)] = slot
+        return cls.from_winner_slots(slots)
+
+    def to_results(self, table: TournamentIndex) -> Dict[str, Union[List[Team], Team]]:
+        """
+        Decode into a Bracket.results style dictionary of Team objects.
+
+        Winners are listed in game order (East, West, South, Midwest within each
+        regional round) and "Champion" is only present once the final is picked.
+        """
+        teams = table.teams
+        slots = self.winner_slots()
+        results = {}
+        for round_num, round_name in ROUND_NAMES.items():
+            results[round_name] = [teams[slot] for slot in slots[ROUND_OFFSETS[round_num]:ROUND_OFFSETS[round_num + 1]]
+                                   if slot is not None]
+        if slots[-1] is not None:
+            results["Champion"] = teams[slots[-1]]
+        return results
+
+    def to_bracket(self, table: TournamentIndex) -> Bracket:
+        """Build a bigdance Bracket populated with these picks"""
+        bracket = Bracket(list(table.teams))
+        bracket.results = self.to_results(table)
+
+        # Mark first round winners on the initial games (used by log probability calculations)
+        slots = self.winner_slots()
+        for game in bracket.games:
+            winner_slot = slots[table.slot_of[game.team1.name] >> 1]
+            if winner_slot is not None:
+                game.winner = table.teams[winner_slot]
+        return bracket
+
+    def log_probability(self, table: TournamentIndex) -> Tuple[float, Dict[str, float]]:
+        """
+        Negative log probability of the picks, in total and by round (same as bigdance's
+        Bracket.calculate_log_probability for complete brackets; undecided games add nothing).
+        """
+        slots = np.array([-1 if slot is None else slot for slot in self.winner_slots()])
+        by_round = log_probabilities_by_round(table, slots[None, :])[0]
+        return float(by_round.sum()), {ROUND_NAMES[round_num]: float(by_round[round_num - 1]) for round_num in range(1, 7)}
+
+    def to_bytes(self) -> bytes:
+        """Pack into 16 bytes (picks then mask, little endian) for bulk storage"""
+        return self.picks.to_bytes(8, "little") + self.mask.to_bytes(8, "little")
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'CompactBracket':
+        """Unpack a bracket stored with to_bytes"""
+        return cls(int.from_bytes(data[:8], "little"), int.from_bytes(data[8:16], "little"))
@@ -9,41 +9,366 @@
 @Desc    :   Tournament data and management for March Madness bracket app
 '''
 
+import argparse
+import json
 import logging
+import os
+import threading
+import time
+from pathlib import Path
+from types import MappingProxyType
+from typing import Callable, Dict, List, Mapping, Optional, Tuple
 # from bigdance.wn_cbb_scraper import Standings
 # from bigdance.bigdance_integration import create_teams_from_standings
-# from bigdance.espn_tc_scraper import get_espn_bracket, extract_entry_bracket
-from bigdance.espn_tc_scraper import ESPNScraper, ESPNBracket
+from bigdance.cbb_brackets import Bracket, Team
 import numpy as np
 
 logger = logging.getLogger(__name__)
 
+# Region order used by the UI game ids and the Final Four pairings (East-West, South-Midwest)
+REGIONS = ["East", "West", "South", "Midwest"]
+
+# Seeds of the 16 slots in each region, from the top of the bracket to the bottom
+SLOT_SEEDS = [1, 16, 8, 9, 5, 12, 4, 13, 6, 11, 3, 14, 7, 10, 2, 15]
+
+# Tournament loaded at startup
+TOURNAMENT = "men"
+# TOURNAMENT = "women"
+
+DATA_DIR = Path(__file__).resolve().parent
+
+# ESPN's regionId order, used to name regions whose labels are not compass points (e.g. "Regional 1 - Spokane")
+ESPN_REGION_ORDER = ["South", "West", "East", "Midwest"]
+
 # # Pulling tournament team data from Warren Nolan for now
 # standings = Standings()
 # actual_bracket = create_teams_from_standings(standings)
 
-# Pulling tournament team data from ESPN
-# bracket_html = get_espn_bracket()
-# actual_bracket = extract_entry_bracket(bracket_html)
-# regions = np.unique([team.region for team in actual_bracket.teams])
+def get_tournament_file(tournament: str) -> Path:
+    """Serialized tournament written by refresh_tournament_data"""
+    return DATA_DIR / f"tournament_data_{tournament}.json"
+
+def get_matchups_file(tournament: str) -> Path:
+    """First round matchups exported from ESPN"""
+    return DATA_DIR / f"first_round_matchups_{tournament}.json"
+
+def seed_based_rating(seed: int) -> float:
+    """Deterministic rating estimate for a team without a scraped rating"""
+    return 2000.0 - 50.0 * seed
+
+def matchup_spread(game: Dict) -> Optional[float]:
+    """
+    Points competitorOne is favored by, from ESPN's odds line (e.g. "AUB -31.5").
+
+    Returns:
+        The spread (negative when competitorTwo is favored), or None for games
+        without a line (e.g. against a First Four winner not yet decided)
+    """
+    odds = game.get("odds")
+    if not odds:
+        return None
+    favorite, _, line = odds.strip().rpartition(" ")
+    try:
+        points = abs(float(line))
+    except ValueError:
+        return None
+    if favorite == game["competitorOne"].get("abbreviation"):
+        return points
+    if favorite == game["competitorTwo"].get("abbreviation"):
+        return -points
+    return None
+
+def teams_from_matchups(matchups: List[Dict]) -> Dict[str, List[Dict]]:
+    """
+    Build the teams dictionary from ESPN first round matchup records.
+
+    Ratings are estimated from the first round point spreads: each game keeps
+    the average seed-based rating of its two seeds, and the spread sets the gap
+    between its teams, at the rating points per point of spread that best fit
+    the seed-based ratings across the games. Same-seed teams are then rated by
+    how heavily they are favored. Teams in games without a line keep their
+    seed-based ratings.
+
+    Args:
+        matchups: List of game dicts with competitorOne/competitorTwo, label, regionId and odds
+
+    Returns:
+        Dictionary mapping region names to lists of team dicts (Team, Seed, Rating)
+    """
+    games = sorted(matchups, key=lambda game: game["bracketLocation"])
+    seeds = [(int(game["competitorOne"]["seed"]), int(game["competitorTwo"]["seed"])) for game in games]
+    spreads = [matchup_spread(game) for game in games]
+
+    # Least squares fit of the seed-based rating gaps to the spreads
+    fitted = [(seed_based_rating(first) - seed_based_rating(second), spread)
+              for (first, second), spread in zip(seeds, spreads) if spread]
+    points_per_spread = (sum(gap * spread for gap, spread in fitted) / sum(spread * spread for _, spread in fitted)
+                         if fitted else 0.0)
+    missing = sum(spread is None for spread in spreads)
+    if missing:
+        logger.info(f"{missing} first round games have no point spread, using seed-based ratings for their teams")
 
-scraper = ESPNScraper()
-html_content = scraper.get_bracket()
-handler = ESPNBracket()
-actual_bracket = handler.extract_bracket(html_content)
-regions = np.unique([team.region for team in actual_bracket.teams])
+    region_teams = {}
+    for game, (first, second), spread in zip(games, seeds, spreads):
+        region = game["label"].title()
+        if region not in REGIONS:
+            region = ESPN_REGION_ORDER[game["regionId"] - 1]
+        if spread is None or not fitted:
+            ratings = (seed_based_rating(first), seed_based_rating(second))
+        else:
+            center = (seed_based_rating(first) + seed_based_rating(second)) / 2
+            ratings = (center + points_per_spread * spread / 2, center - points_per_spread * spread / 2)
+        for competitor, seed, rating in zip((game["competitorOne"], game["competitorTwo"]), (first, second), ratings):
+            region_teams.setdefault(region, []).append({"Team": competitor["name"], "Seed": seed, "Rating": rating})
+    return {region: region_teams[region] for region in REGIONS if region in region_teams}
 
-teams = {}
-for region in regions:
-    teams[region] = [{"Team": team.name, "Seed": team.seed, "Rating": team.rating} \
+def load_tournament_teams(tournament: str) -> Dict[str, List[Dict]]:
+    """
+    Load the tournament teams from local files without touching the network.
+
+    Prefers the serialized tournament from the last refresh and falls back to
+    the first round matchups, with ratings estimated from their point spreads.
+
+    Args:
+        tournament: Tournament key ("men" or "women")
+
+    Returns:
+        Dictionary mapping region names to lists of team dicts (Team, Seed, Rating)
+    """
+    tournament_file = get_tournament_file(tournament)
+    if tournament_file.exists():
+        with open(tournament_file, 'r') as f:
+            return json.load(f)["teams"]
+
+    matchups_file = get_matchups_file(tournament)
+    if not matchups_file.exists():
+        raise FileNotFoundError(f"No tournament data found for {tournament} tournament")
+    logger.warning(f"No {tournament_file.name} found, estimating ratings from the first round point spreads. "
+                   f"Run `python data.py refresh --tournament {tournament}` with network access and commit the file.")
+    with open(matchups_file, 'r') as f:
+        return teams_from_matchups(json.load(f))
+
+def scrape_tournament_teams(tournament: str) -> Dict[str, List[Dict]]:
+    """
+    Pull the current bracket and ratings from ESPN (requires network access and Chrome).
+
+    Args:
+        tournament: Tournament key ("men" or "women")
+
+    Returns:
+        Dictionary mapping region names to lists of team dicts (Team, Seed, Rating)
+    """
+    # Imported here so normal startup never loads the scraping stack
+    from bigdance.espn_tc_scraper import ESPNBracket
+
+    handler = ESPNBracket(women=tournament == "women")
+    # Without Warren Nolan, bigdance makes up randomized seed-based ratings: never save those
+    if handler.ratings_source is None:
+        raise ValueError(f"Could not load {tournament} team ratings from Warren Nolan")
+    html_content = handler.get_bracket()
+    actual_bracket = handler.extract_bracket(html_content)
+    if actual_bracket is None:
+        raise ValueError(f"Could not extract the {tournament} bracket from ESPN")
+    return teams_from_bracket(actual_bracket)
+
+def teams_from_bracket(actual_bracket: Bracket) -> Dict[str, List[Dict]]:
+    """Build the teams dictionary from a bigdance Bracket"""
+    regions = np.unique([team.region for team in actual_bracket.teams])
+    return {region: [{"Team": team.name, "Seed": team.seed, "Rating": team.rating}
                      for team in actual_bracket.teams if team.region == region]
+            for region in regions}
+
+def save_tournament_teams(tournament: str, tournament_teams: Dict[str, List[Dict]]) -> Path:
+    """Write the serialized tournament file read at startup (atomically replaced)"""
+    tournament_file = get_tournament_file(tournament)
+    tmp_file = tournament_file.with_name(tournament_file.name + ".tmp")
+    with open(tmp_file, 'w') as f:
+        json.dump({"tournament": tournament, "saved_at": time.time(), "teams": tournament_teams}, f, indent=1)
+    os.replace(tmp_file, tournament_file)
+    return tournament_file
+
+teams = load_tournament_teams(TOURNAMENT)
+regions = list(teams.keys())
+
+class TournamentTeam:
+    """
+    Interned record for one tournament team, shared by every lookup and session.
+
+    `team` is the single bigdance Team built for this team, reused for every
+    Bracket so building brackets never allocates new teams.
+    """
+
+    __slots__ = ("name", "seed", "region", "rating", "slot", "team")
+
+    def __init__(self, name: str, seed: int, region: str, rating: float, slot: int):
+        self.name = name
+        self.seed = seed
+        self.region = region
+        self.rating = rating
+        self.slot = slot
+        self.team = Team(
+            name=name,
+            seed=seed,
+            region=region,
+            rating=rating,
+            conference="Unknown"  # Conference not critical for analysis
+        )
+
+    def __repr__(self) -> str:
+        return f"TournamentTeam(({self.seed}) {self.name}, {self.region}, slot {self.slot})"
+
+
+class TournamentIndex:
+    """
+    Immutable lookup tables for the 64 tournament teams.
+
+    Slot s belongs to region REGIONS[s // 16] with seed SLOT_SEEDS[s % 16],
+    so first round game g is always played between slots 2g and 2g + 1.
+    """
+
+    def __init__(self, teams: Dict[str, List[Dict]], version: int = 0):
+        """
+        Build the index from the tournament teams data.
+
+        Args:
+            teams: Dictionary mapping region names to lists of team dicts (Team, Seed, Rating)
+            version: Data version, bumped every time the tournament data is replaced
+
+        Raises:
+            ValueError: If a region or seed is missing
+        """
+        by_region = {region.lower(): (region, region_teams) for region, region_teams in teams.items()}
+        records = []
+        for region in REGIONS:
+            if region.lower() not in by_region:
+                raise ValueError(f"Missing {region} region in tournament data")
+            region_name, region_teams = by_region[region.lower()]
+            by_seed = {team_data["Seed"]: team_data for team_data in region_teams}
+            for seed in SLOT_SEEDS:
+                if seed not in by_seed:
+                    raise ValueError(f"Missing seed {seed} in {region_name} region")
+                team_data = by_seed[seed]
+                records.append(TournamentTeam(
+                    name=team_data["Team"],
+                    seed=team_data["Seed"],
+                    region=region_name,
+                    rating=team_data.get("Rating", 1500),
+                    slot=len(records)
+                ))
+
+        self.version = version
+        self.records: Tuple[TournamentTeam, ...] = tuple(records)
+        self.teams: Tuple[Team, ...] = tuple(record.team for record in records)
+        self.names: Tuple[str, ...] = tuple(record.name for record in records)
+        self.by_name: Mapping[str, TournamentTeam] = MappingProxyType({record.name: record for record in records})
+        self.slot_of: Mapping[str, int] = MappingProxyType({record.name: record.slot for record in records})
+        self.region_of: Mapping[str, str] = MappingProxyType({record.name: record.region for record in records})
+        self.seed_of: Mapping[str, int] = MappingProxyType({record.name: record.seed for record in records})
+
+        # Elo probability that the row slot's team beats the column slot's team, and its log,
+        # built once per data version and shared read-only by every probability calculation
+        ratings = np.array([record.rating for record in records], dtype=np.float64)
+        self.win_prob = 1 / (1 + 10 ** (-(ratings[:, None] - ratings[None, :]) / 400))
+        self.log_win_prob = np.log(self.win_prob)
+        self.win_prob.setflags(write=False)
+        self.log_win_prob.setflags(write=False)
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def get(self, name: Optional[str]) -> Optional[TournamentTeam]:
+        """Team record by name (None if the team is not in the tournament)"""
+        return self.by_name.get(name) if name else None
+
+    def region_teams(self, region: str) -> Tuple[TournamentTeam, ...]:
+        """A region's teams in slot order"""
+        start = 16 * REGIONS.index(region.title())
+        return self.records[start:start + 16]
+
+    def to_teams(self) -> Dict[str, List[Dict]]:
+        """Tournament teams data in the format the index is built from"""
+        teams = {}
+        for record in self.records:
+            teams.setdefault(record.region, []).append({"Team": record.name, "Seed": record.seed, "Rating": record.rating})
+        return teams
+
+    def __reduce__(self):
+        # Mapping proxies cannot be pickled, so indexes sent to worker processes are rebuilt from their teams data
+        return (TournamentIndex, (self.to_teams(), self.version))
+
+
+_tournament_index = None
+_data_lock = threading.Lock()
+_data_listeners: List[Callable[[TournamentIndex], None]] = []
+
+
+def get_tournament_index() -> TournamentIndex:
+    """Shared index of the current tournament teams"""
+    global _tournament_index
+    if _tournament_index is None:
+        with _data_lock:
+            if _tournament_index is None:
+                _tournament_index = TournamentIndex(teams)
+    return _tournament_index
+
+def get_data_version() -> int:
+    """Version of the current tournament data (caches derived from it should include this in their keys)"""
+    return get_tournament_index().version
+
+def add_data_listener(listener: Callable[[TournamentIndex], None]) -> None:
+    """Register a callback run with the new index whenever the tournament data is replaced"""
+    with _data_lock:
+        _data_listeners.append(listener)
+
+def set_tournament_teams(tournament_teams: Dict[str, List[Dict]]) -> TournamentIndex:
+    """
+    Replace the current tournament teams and index.
+
+    The new index is built before anything is swapped, so invalid data leaves
+    the current tournament in place. Readers holding the old index keep a
+    consistent view, and registered listeners are told about the new version.
+    """
+    global teams, regions, _tournament_index
+    with _data_lock:
+        current_version = _tournament_index.version if _tournament_index is not None else 0
+        new_index = TournamentIndex(tournament_teams, version=current_version + 1)
+        teams = tournament_teams
+        regions = list(tournament_teams.keys())
+        _tournament_index = new_index
+        listeners = list(_data_listeners)
+
+    logger.info(f"Tournament data updated to version {new_index.version}")
+    for listener in listeners:
+        try:
+            listener(new_index)
+        except Exception as e:
+            logger.error(f"Error in tournament data listener: {str(e)}")
+    return new_index
 
 def initialize_tournament_data():
     """Initialize or update tournament data"""
     logger.info("Initializing tournament data...")
-    # In the future, this could pull real data from an API or database
+    # Loaded from local files at import; refresh_tournament_data pulls from ESPN
     return teams
 
+def refresh_tournament_data(tournament: str = TOURNAMENT) -> Dict[str, List[Dict]]:
+    """
+    Scrape the latest tournament data from ESPN and save it for future startups.
+
+    Args:
+        tournament: Tournament key ("men" or "women")
+
+    Returns:
+        The refreshed teams dictionary
+    """
+    logger.info(f"Refreshing {tournament} tournament data from ESPN...")
+    tournament_teams = scrape_tournament_teams(tournament)
+    TournamentIndex(tournament_teams)  # Validate before saving
+    save_tournament_teams(tournament, tournament_teams)
+    if tournament == TOURNAMENT:
+        set_tournament_teams(tournament_teams)
+    return tournament_teams
+
 def validate_tournament_data():
     """Validate tournament data structure"""
     try:
@@ -76,6 +401,18 @@ def validate_tournament_data():
         raise
 
 if __name__ == "__main__":
-    # Test data validation
+    parser = argparse.ArgumentParser(description="Validate or refresh the tournament data")
+    parser.add_argument("command", nargs="?", choices=["validate", "refresh"], default="validate",
+                        help="Validate the local data (default) or refresh it from ESPN")
+    parser.add_argument("--tournament", nargs="+", choices=["men", "women"], default=[TOURNAMENT],
+                        help="Tournaments to refresh")
+    args = parser.parse_args()
+
     logging.basicConfig(level=logging.INFO)
-    validate_tournament_data()
+    if args.command == "refresh":
+        for tournament in args.tournament:
+            refresh_tournament_data(tournament)
+            print(get_tournament_file(tournament))
+    else:
+        # Test data validation
+        validate_tournament_data()
@@ -0,0 +1,224 @@
+#!/usr/bin/env python
+# -*-coding:utf-8 -*-
+'''
+@File    :   optimizer.py
+@Time    :   2026/10/17
+@Author  :   Taylor Firman
+@Version :   1.0
+@Contact :   tefirman@gmail.com
+@Desc    :   Local search for the bracket most likely to win a pool for March Madness bracket app
+'''
+
+import logging
+import os
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from compact_bracket import FEEDERS, GAME_ROUNDS, NUM_GAMES, PARENTS, ROUND_NAMES
+from data import TOURNAMENT
+from simulator import ROUND_VALUES, PoolSample, TournamentModel, get_tournament_model, request_pool_sample
+
+logger = logging.getLogger(__name__)
+
+# Seconds an optimization may take, including any wait for the pool sample
+OPTIMIZE_BUDGET_SECONDS = float(os.environ.get("BRACKET_OPTIMIZE_SECONDS", "2"))
+
+# Random flips applied to the best bracket when the climb gets stuck, and the search seed
+PERTURB_FLIPS = 3
+OPTIMIZE_SEED = 2026
+
+# Searches running at the same time across all sessions (later searches wait their turn)
+OPTIMIZE_WORKERS = 2
+
+_GAME_POINTS = np.array([ROUND_VALUES[ROUND_NAMES[round_num]] for round_num in GAME_ROUNDS], dtype=np.int32)
+
+_optimize_executor = ThreadPoolExecutor(max_workers=OPTIMIZE_WORKERS, thread_name_prefix="optimizer")
+
+
+def complete_with_favorites(model: TournamentModel, winner_slots: Sequence[Optional[int]]) -> np.ndarray:
+    """Fill undecided games (and picks that are not in their matchup) with the higher rated team"""
+    slots = np.empty(NUM_GAMES, dtype=np.int8)
+    for index in range(NUM_GAMES):
+        if index < 32:
+            first, second = 2 * index, 2 * index + 1
+        else:
+            first, second = (int(slots[feeder]) for feeder in FEEDERS[index])
+        slot = winner_slots[index]
+        if slot not in (first, second):
+            slot = first if model.win_prob[first, second] >= 0.5 else second
+        slots[index] = slot
+    return slots
+
+
+class _FlipSearch:
+    """
+    Pool-win objective over a fixed sample, with incremental scoring of single-game flips.
+
+    Flipping a game gives it to the other team in its matchup, and every
+    later game the old winner was picked to win goes to the new winner
+    instead (the downstream repair), so brackets always stay valid. Only the
+    changed games are rescored against the sample.
+    """
+
+    def __init__(self, sample: PoolSample, slots: np.ndarray):
+        self.sample = sample
+        self.actual = sample.actual
+        self.tie_share = 1 / (sample.opponents_at_best + 1)
+        self.set_bracket(slots)
+
+    def set_bracket(self, slots: np.ndarray):
+        self.slots = slots.copy()
+        self.scores = (self.actual == self.slots) @ _GAME_POINTS
+        self.value = self.win_share(self.scores[None, :])[0]
+
+    def win_share(self, scores: np.ndarray) -> np.ndarray:
+        """Mean win share of each row of scores against the sample's best opponents"""
+        best = self.sample.best_opponent_score
+        return np.where(scores > best, 1.0, np.where(scores == best, self.tie_share, 0.0)).mean(axis=1)
+
+    def flip_games(self, index: int) -> List[int]:
+        """Games whose winner changes when game index is flipped"""
+        old = self.slots[index]
+        games = [index]
+        parent = PARENTS[index]
+        while parent is not None and self.slots[parent] == old:
+            games.append(parent)
+            parent = PARENTS[parent]
+        return games
+
+    def other_team(self, index: int) -> int:
+        """The team in game index's matchup that is not its current winner"""
+        if index < 32:
+            first, second = 2 * index, 2 * index + 1
+        else:
+            first, second = (self.slots[feeder] for feeder in FEEDERS[index])
+        return second if self.slots[index] == first else first
+
+    def flip_delta(self, index: int) -> np.ndarray:
+        """Change in every sampled score from flipping game index"""
+        old, new = self.slots[index], self.other_team(index)
+        games = self.flip_games(index)
+        actual = self.actual[:, games]
+        return ((actual == new).astype(np.int32) - (actual == old)) @ _GAME_POINTS[games]
+
+    def flip(self, index: int):
+        """Apply a flip to the current bracket"""
+        new = self.other_team(index)
+        delta = self.flip_delta(index)
+        self.slots[self.flip_games(index)] = new
+        self.scores += delta
+        self.value = self.win_share(self.scores[None, :])[0]
+
+    def best_flip(self) -> tuple:
+        """The single flip with the highest win share, and that win share"""
+        candidates = self.scores[None, :] + np.stack([self.flip_delta(index) for index in range(NUM_GAMES)])
+        values = self.win_share(candidates)
+        index = int(np.argmax(values))
+        return index, float(values[index])
+
+
+def optimize_bracket(winner_slots: Sequence[Optional[int]], pool_size: int, tournament: str = TOURNAMENT,
+                     time_budget: float = OPTIMIZE_BUDGET_SECONDS, seed: int = OPTIMIZE_SEED) -> Dict:
+    """
+    Search for the bracket with the best chance of winning a pool, starting from the given picks.
+
+    Undecided games are first filled with the higher rated team. The search
+    then climbs by the best single-game flip until none improves the win
+    share over the cached pool sample, and spends the rest of the budget on
+    iterated local search: random flips from the best bracket followed by
+    another climb. Win probabilities are measured on the same sample the
+    search optimizes against, so the optimized figure is somewhat optimistic.
+
+    Args:
+        winner_slots: Winning slot of each of the 63 games (None for undecided games)
+        pool_size: Number of entries in the pool, including this bracket
+        tournament: Tournament key ("men" or "women")
+        time_budget: Seconds the search may take, including any wait for the pool sample
+        seed: Random seed for the perturbations
+
+    Returns:
+        Dictionary with the optimized winner slots, win estimates for the starting
+        and optimized brackets, the changed game indices, and search statistics
+        (an 'error' key if no pool sample was ready within the budget)
+    """
+    start = time.perf_counter()
+    deadline = start + time_budget
+    try:
+        sample = request_pool_sample(pool_size, tournament).result(time_budget)
+    except FutureTimeoutError:
+        return {'error': f"Simulations for {pool_size}-entry pools are still running"}
+
+    model = get_tournament_model(tournament)
+    rng = np.random.default_rng(seed)
+    search = _FlipSearch(sample, complete_with_favorites(model, winner_slots))
+    starting = sample.win_probability(search.slots.tolist())
+    best_slots, best_value = search.slots.copy(), search.value
+    steps = restarts = 0
+
+    while time.perf_counter() < deadline:
+        index, value = search.best_flip()
+        steps += 1
+        if value > search.value:
+            search.flip(index)
+            if search.value > best_value:
+                best_slots, best_value = search.slots.copy(), search.value
+            continue
+        # Stuck at a local optimum: kick the best bracket and climb again
+        restarts += 1
+        search.set_bracket(best_slots)
+        for index in rng.choice(NUM_GAMES, PERTURB_FLIPS, replace=False):
+            search.flip(int(index))
+
+    elapsed = time.perf_counter() - start
+    logger.info(f"Optimized bracket for {pool_size} entries in {elapsed:.2f}s ({steps} steps, {restarts} restarts)")
+    return {
+        'winner_slots': best_slots.tolist(),
+        'changed_games': [index for index in range(NUM_GAMES) if winner_slots[index] != best_slots[index]],
+        'start': starting,
+        'optimized': sample.win_probability(best_slots.tolist()),
+        'steps': steps,
+        'restarts': restarts,
+        'elapsed': elapsed
+    }
+
+
+def _run_optimization(winner_slots: Sequence[Optional[int]], pool_size: int, tournament: str) -> Dict:
+    """optimize_bracket with failures turned into an error result (runs on the optimizer executor)"""
+    try:
+        return optimize_bracket(winner_slots, pool_size, tournament)
+    except Exception as e:
+        logger.error(f"Error optimizing bracket for {pool_size} entries: {str(e)}", exc_info=True)
+        return {'error': f"Optimization failed: {str(e)}", 'failed': True}
+
+
+def request_optimization(winner_slots: Sequence[Optional[int]], pool_size: int,
+                         tournament: str = TOURNAMENT) -> Future:
+    """
+    Start an optimization on the shared optimizer executor.
+
+    The future resolves to the optimize_bracket result, or to a dictionary with
+    'error' and 'failed' keys if the search raised, so it never raises itself.
+    """
+    return _optimize_executor.submit(_run_optimization, list(winner_slots), pool_size, tournament)
+
+
+def main():
+    """Optimize a chalk bracket for each offered pool size and print the results"""
+    import json
+    from analysis import POOL_SIZES
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    model = get_tournament_model()
+    chalk = complete_with_favorites(model, [None] * NUM_GAMES).tolist()
+    for pool_size in POOL_SIZES:
+        result = optimize_bracket(chalk, int(pool_size), time_budget=OPTIMIZE_BUDGET_SECONDS + 5)
+        print(json.dumps({'pool_size': pool_size, **{key: result[key] for key in ('start', 'optimized', 'steps',
+                                                                                   'restarts', 'elapsed')},
+                          'changes': len(result['changed_games'])}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+#!/usr/bin/env python
+# -*-coding:utf-8 -*-
+'''
+@File    :   refresher.py
+@Time    :   2026/10/17
+@Author  :   Taylor Firman
+@Version :   1.0
+@Contact :   tefirman@gmail.com
+@Desc    :   Background tournament data refresher for March Madness bracket app
+'''
+
+import hashlib
+import logging
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+import requests
+
+from data import TOURNAMENT, TournamentIndex, save_tournament_teams, set_tournament_teams, teams_from_bracket
+
+logger = logging.getLogger(__name__)
+
+# Page to poll for the bracket. ESPN renders the bracket with JavaScript, so in
+# production this should point at a source of rendered bracket HTML; when unset
+# the page is pulled through the bigdance Selenium scraper instead.
+REFRESH_URL = os.environ.get("BRACKET_REFRESH_URL")
+
+# Seconds between refreshes (0 disables the background refresher)
+REFRESH_INTERVAL = float(os.environ.get("BRACKET_REFRESH_INTERVAL", "0"))
+
+REQUEST_TIMEOUT = 30
+
+
+class TournamentRefresher:
+    """
+    Periodically pulls the tournament bracket and swaps in new data when it changes.
+
+    Each refresh runs on a background thread: a conditional request (ETag /
+    If-Modified-Since) skips pages the server reports unchanged, a content hash
+    skips pages that came back identical, and only changed pages are parsed and
+    swapped into data.py.
+    """
+
+    def __init__(self, tournament: str = TOURNAMENT, url: Optional[str] = REFRESH_URL,
+                 interval: float = REFRESH_INTERVAL,
+                 parser: Optional[Callable[[str], Dict[str, List[Dict]]]] = None,
+                 save: bool = True):
+        """
+        Args:
+            tournament: Tournament key ("men" or "women")
+            url: Page to poll over HTTP (defaults to scraping ESPN with Selenium when None)
+            interval: Seconds between refreshes
+            parser: Function turning page HTML into a teams dictionary (defaults to the ESPN bracket parser)
+            save: Whether to write refreshed data to the tournament file used at startup
+        """
+        self.tournament = tournament
+        self.url = url
+        self.interval = interval
+        self.parser = parser or self._parse_espn_bracket
+        self.save = save
+        self.etag = None
+        self.last_modified = None
+        self.content_hash = None
+        self.last_status = None
+        self._handler = None
+        self._session = requests.Session()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _fetch(self) -> Optional[str]:
+        """Fetch the bracket page, returning None when the server reports it unchanged"""
+        if self.url is None:
+            from bigdance.espn_tc_scraper import ESPNScraper
+            return ESPNScraper(women=self.tournament == "women").get_bracket()
+
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        response = self._session.get(self.url, headers=headers, timeout=REQUEST_TIMEOUT)
+        if response.status_code == 304:
+            return None
+        response.raise_for_status()
+        self.etag = response.headers.get("ETag", self.etag)
+        self.last_modified = response.headers.get("Last-Modified", self.last_modified)
+        return response.text
+
+    def _parse_espn_bracket(self, html_content: str) -> Dict[str, List[Dict]]:
+        """Parse ESPN bracket HTML with the bigdance bracket handler (created once, loading ratings)"""
+        if self._handler is None:
+            from bigdance.espn_tc_scraper import ESPNBracket
+            self._handler = ESPNBracket(women=self.tournament == "women")
+        actual_bracket = self._handler.extract_bracket(html_content)
+        if actual_bracket is None:
+            raise ValueError("Could not extract the bracket from the page")
+        return teams_from_bracket(actual_bracket)
+
+    def refresh(self) -> Dict:
+        """
+        Run a single refresh.
+
+        Returns:
+            Dictionary with the status ('not_modified', 'unchanged', 'updated' or 'error')
+            and the data version when updated
+        """
+        try:
+            html_content = self._fetch()
+            if html_content is None:
+                return self._finish({'status': 'not_modified'})
+
+            content_hash = hashlib.sha256(html_content.encode()).hexdigest()
+            if content_hash == self.content_hash:
+                return self._finish({'status': 'unchanged'})
+
+            tournament_teams = self.parser(html_content)
+            TournamentIndex(tournament_teams)  # Validate before saving or swapping
+            if self.save:
+                save_tournament_teams(self.tournament, tournament_teams)
+            new_index = set_tournament_teams(tournament_teams)
+            self.content_hash = content_hash
+            return self._finish({'status': 'updated', 'version': new_index.version})
+        except Exception as e:
+            logger.error(f"Error refreshing {self.tournament} tournament data: {str(e)}")
+            return self._finish({'status': 'error', 'error': str(e)})
+
+    def _finish(self, result: Dict) -> Dict:
+        """Record and log the outcome of a refresh"""
+        result['checked_at'] = time.time()
+        self.last_status = result
+        logger.debug(f"Tournament refresh: {result['status']}")
+        return result
+
+    def _run(self):
+        """Refresh loop for the background thread"""
+        while not self._stop.is_set():
+            self.refresh()
+            self._stop.wait(self.interval)
+
+    def start(self) -> 'TournamentRefresher':
+        """Start refreshing on a daemon thread (no-op if already running)"""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="tournament-refresher", daemon=True)
+            self._thread.start()
+            logger.info(f"Refreshing {self.tournament} tournament data every {self.interval:g} seconds")
+        return self
+
+    def stop(self, timeout: Optional[float] = None):
+        """Stop the background thread after the current refresh"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+
+_refresher = None
+
+
+def start_refresher(interval: float = REFRESH_INTERVAL, url: Optional[str] = REFRESH_URL) -> Optional[TournamentRefresher]:
+    """Start the process-wide refresher if an interval is configured"""
+    global _refresher
+    if interval <= 0:
+        return None
+    if _refresher is None:
+        _refresher = TournamentRefresher(url=url, interval=interval)
+    return _refresher.start()
@@ -9,132 +9,89 @@
 @Desc    :   Server logic for March Madness bracket app
 '''
 
-from shiny import render, ui, reactive
+from shiny import render, ui, reactive, req
 from shiny.types import SilentException
 import logging
-from typing import Dict, List, Optional, Tuple
-import pandas as pd
-from pathlib import Path
+import time
+from typing import Callable, Dict, List, Optional, Tuple
 from markdown import markdown
+import numpy as np
 from bigdance.cbb_brackets import Bracket, Team, Game
 
-from data import teams
+from data import TOURNAMENT, TournamentIndex, get_data_version, get_tournament_index
+from cache import LRUCache
+from compact_bracket import (CompactBracket, GAME_IDS, GAME_ROUNDS, NUM_GAMES, ROUND_NAMES, ROUND_OFFSETS,
+                             log_probabilities_by_round)
+from bracket_state import BracketState
+from analysis import AnalysisBundle, DEFAULT_TOURNAMENT, normalize_pool_size, prefetch_analysis_bundles
+from simulator import (GENERATION_RETRY_SECONDS, WIN_ESTIMATE_BUDGET_SECONDS, TournamentModel, advancement_probabilities,
+                       estimate_win_probability, get_any_analysis_bundle, get_tournament_model, prefetch_pool_samples,
+                       underdog_games)
+from streaming import ProgressiveRun
+from optimizer import OPTIMIZE_BUDGET_SECONDS, request_optimization
 
 logger = logging.getLogger(__name__)
 
-# Analysis data containers - will be populated reactively based on pool size
-optimal_upset_df = None
-champion_df = None
-specific_upsets_df = None
-analysis_summary = None
-upset_stats_df = None
-log_prob_df = None
-optimal_upset_dict = None
-
-# Default optimal values if files not found
-default_optimal_upset_dict = {
-    "First Round": {"optimal": 10, "range": (8, 11)},
-    "Second Round": {"optimal": 7, "range": (6, 8)},
-    "Sweet 16": {"optimal": 2, "range": (2, 4)},
-    "Elite 8": {"optimal": 1, "range": (1, 3)},
-    "Final Four": {"optimal": 1, "range": (0, 1)},
-    "Championship": {"optimal": 0, "range": (0, 1)},
-    "Total": {"optimal": 18, "range": (18, 25)}
-}
-
-def load_analysis_data(pool_size: str) -> Dict:
-    """Load analysis data based on pool size"""
-    global optimal_upset_df, champion_df, specific_upsets_df, analysis_summary
-    global upset_stats_df, log_prob_df, optimal_upset_dict
-    
-    try:
-        # Determine the directory path based on pool size
-        analysis_dir = Path(f'analysis_data/men_{pool_size}entries')
-        # analysis_dir = Path(f'analysis_data/women_{pool_size}entries')
-        
-        # Check if analysis data directory exists
-        if not analysis_dir.exists():
-            analysis_dir.mkdir(parents=True, exist_ok=True)
-            logger.warning(f"Analysis data directory for {pool_size} entries created. Please add analysis files.")
-        
-        # Load optimal upset strategy
-        optimal_upset_path = analysis_dir / 'optimal_upset_strategy.csv'
-        if optimal_upset_path.exists():
-            optimal_upset_df = pd.read_csv(optimal_upset_path)
-        else:
-            logger.warning(f"Optimal upset strategy file not found for {pool_size} entries")
-            optimal_upset_df = None
-        
-        # Load champion pick comparison data
-        champion_path = analysis_dir / 'champion_pick_comparison.csv'
-        if champion_path.exists():
-            champion_df = pd.read_csv(champion_path)
-        else:
-            logger.warning(f"Champion pick comparison file not found for {pool_size} entries")
-            champion_df = None
-        
-        # Load specific upsets data
-        specific_upsets_path = analysis_dir / 'specific_upset_comparison.csv'
-        if specific_upsets_path.exists():
-            specific_upsets_df = pd.read_csv(specific_upsets_path)
-        else:
-            logger.warning(f"Specific upsets file not found for {pool_size} entries")
-            specific_upsets_df = None
-        
-        # Load historical data summary
-        summary_path = analysis_dir / 'comparative_analysis_summary.md'
-        if summary_path.exists():
-            with open(summary_path, 'r') as f:
-                analysis_summary = f.read()
-        else:
-            logger.warning(f"Comparative analysis summary file not found for {pool_size} entries")
-            analysis_summary = None
-            
-        # Load upset comparison statistics
-        upset_stats_path = analysis_dir / 'upset_comparison_statistics.csv'
-        if upset_stats_path.exists():
-            upset_stats_df = pd.read_csv(upset_stats_path)
-        else:
-            logger.warning(f"Upset comparison statistics file not found for {pool_size} entries")
-            upset_stats_df = None
-        
-        # Load log probability comparison statistics
-        log_prob_path = analysis_dir / 'log_probability_comparison_statistics.csv'
-        if log_prob_path.exists():
-            log_prob_df = pd.read_csv(log_prob_path)
-        else:
-            logger.warning(f"Log probability comparison statistics file not found for {pool_size} entries")
-            log_prob_df = None
-        
-        # Create optimal upset dictionary
-        if optimal_upset_df is not None:
-            optimal_upset_dict = {row['round']: {"optimal": int(row['max_advantage_upsets']), 
-                                                "range": (max(0, int(row['max_advantage_upsets'] - 2)), 
-                                                         int(row['max_advantage_upsets'] + 2))}
-                                 for _, row in optimal_upset_df.iterrows() if row['round'] != 'Total Upsets'}
-            # Add total upsets
-            total_row = optimal_upset_df[optimal_upset_df['round'] == 'Total Upsets']
-            if not total_row.empty:
-                optimal_upset_dict["Total"] = {"optimal": int(total_row['max_advantage_upsets'].iloc[0]),
-                                              "range": (int(total_row['max_advantage_upsets'].iloc[0] - 4),
-                                                        int(total_row['max_advantage_upsets'].iloc[0] + 4))}
-            else:
-                optimal_upset_dict["Total"] = {"optimal": 22, "range": (18, 26)}
-        else:
-            optimal_upset_dict = default_optimal_upset_dict
+# How often sessions check for refreshed tournament data
+DATA_VERSION_POLL_SECONDS = 5
 
-        return {
-            'success': True,
-            'message': f"Loaded analysis data for {pool_size} entries"
-        }
-    except Exception as e:
-        logger.error(f"Error loading analysis data for {pool_size} entries: {str(e)}")
-        optimal_upset_dict = default_optimal_upset_dict
+# How often the assessment checks back on simulations still running in the background
+PENDING_RETRY_SECONDS = 0.5
+
+# How often a running live simulation pushes its latest estimates to the session
+STREAM_REFRESH_SECONDS = 0.5
+
+# How long the picks must go unchanged before the assessment is recomputed
+ASSESSMENT_SETTLE_SECONDS = 0.3
+
+# Tabs of the page (reported by the client as input.active_tab) and the tab shown on load
+TABS = ["east", "west", "south", "midwest", "finals", "assessment"]
+DEFAULT_TAB = "east"
+
+# Round names in order, and the first game of each round in the compact layout
+_ROUND_ORDER = [ROUND_NAMES[round_num] for round_num in range(1, 7)]
+_ROUND_STARTS = np.array([ROUND_OFFSETS[round_num] for round_num in range(1, 7)])
+_GAME_ROUND_INDEX = np.array(GAME_ROUNDS) - 1
+_ROUND_SLICES = [(ROUND_NAMES[round_num], ROUND_OFFSETS[round_num], ROUND_OFFSETS[round_num + 1])
+                 for round_num in range(1, 7)]
+
+# Tab each game is shown on
+_GAME_TABS = ["finals" if game_id.startswith("final_") else game_id.split("_", 1)[0] for game_id in GAME_IDS]
+
+# Rendered assessments kept for brackets seen before (by any session, at any pool size)
+ASSESSMENT_CACHE_SIZE = 1024
+
+# Rendered report sections shared between assessments (a pick change re-renders only the sections it affects)
+SECTION_CACHE_SIZE = 4096
+
+# Advancement probabilities for the current and previous data versions
+_advancement_cache = LRUCache(2, name="advancement probabilities")
+
+# Structured assessment and rendered HTML, keyed by assessment_key
+_assessment_cache = LRUCache(ASSESSMENT_CACHE_SIZE, name="bracket assessments")
+
+# Rendered report sections, keyed by section and the inputs it depends on
+_section_cache = LRUCache(SECTION_CACHE_SIZE, name="assessment sections")
+
+def load_analysis_data(pool_size: str, tournament: str = DEFAULT_TOURNAMENT) -> Dict:
+    """Load analysis data based on pool size (served from the process-wide bundle cache, simulated for new sizes)"""
+    bundle = get_any_analysis_bundle(pool_size, tournament)
+    if bundle.error is not None:
         return {
             'success': False,
-            'message': f"Error loading analysis data: {str(e)}",
-            'error': str(e)
+            'message': f"Error loading analysis data: {bundle.error}",
+            'error': bundle.error,
+            'bundle': bundle
         }
+    return {
+        'success': True,
+        'message': f"Loaded analysis data for {pool_size} entries",
+        'bundle': bundle
+    }
+
+def get_pool_size(input) -> str:
+    """Selected pool size as a canonical string (typed sizes are clamped to the supported range)"""
+    return normalize_pool_size(input.pool_size())
 
 def get_game_winner(input, game_id: str) -> Optional[str]:
     """Helper function to safely get game winner"""
@@ -181,6 +138,11 @@ def convert_team_to_dict(team: 'Team') -> Dict:
         "Region": team.region
     }
 
+def get_matchup_dicts(state: BracketState, region: str, round_num: int) -> List[Tuple[Optional[Dict], Optional[Dict]]]:
+    """Get a region's matchups for a round from a bracket state, in dict format for UI"""
+    return [(convert_team_to_dict(team1), convert_team_to_dict(team2))
+            for team1, team2 in state.matchups_for_round(region, round_num)]
+
 def get_matchups_for_round(input, region: str, round_num: int) -> List[Tuple[Optional[Dict], Optional[Dict]]]:
     """
     Get matchups for a specific region and round based on the current bracket state.
@@ -193,191 +155,103 @@ def get_matchups_for_round(input, region: str, round_num: int) -> List[Tuple[Opt
     Returns:
         List of tuple pairs (team1, team2) representing matchups, in dict format for UI
     """
-    from bigdance.cbb_brackets import Game
-    
-    # Create or get the bracket
-    bracket = get_bracket(input)
-    
-    # For first round, the games are already defined in the bracket
-    if round_num == 1:
-        # Filter games from the first round in this region
-        matchups = []
-        for game in bracket.games:
-            if game.region.lower() == region.lower():
-                matchups.append((
-                    convert_team_to_dict(game.team1),
-                    convert_team_to_dict(game.team2)
-                ))
-        return matchups
-    
-    # For later rounds, we need to construct the games based on winners from previous rounds
-    # Map round_num to round names used in bracket.results
-    round_names = {
-        1: "First Round",
-        2: "Second Round",
-        3: "Sweet 16",
-        4: "Elite 8",
-        5: "Final Four",
-        6: "Championship"
-    }
-    
-    # Get winners from the previous round
-    prev_round_name = round_names[round_num - 1]
-    if prev_round_name not in bracket.results:
-        # No results for previous round yet
-        return [(None, None)] * (2**(4 - round_num))  # Return empty matchups
-    
-    # Filter teams from the previous round in this region
-    region_teams = [team for team in bracket.results[prev_round_name] 
-                   if team.region.lower() == region.lower()]
-    
-    # Create matchups for the current round
-    matchups = []
-    for i in range(0, len(region_teams), 2):
-        team1 = region_teams[i] if i < len(region_teams) else None
-        team2 = region_teams[i+1] if i+1 < len(region_teams) else None
-        matchups.append((
-            convert_team_to_dict(team1),
-            convert_team_to_dict(team2)
-        ))
+    state = BracketState(get_tournament_index(), get_compact_bracket(input))
+    return get_matchup_dicts(state, region, round_num)
+
+def get_advancement_probabilities(table: TournamentIndex) -> np.ndarray:
+    """
+    Exact chance of each team winning its game in each round, shape (64, 6) indexed by [slot, round - 1].
     
-    return matchups
+    Probabilities come from team ratings alone (not the user's picks), so they
+    are computed once per data version and shared by every session.
+    """
+    return _advancement_cache.get_or_create(
+        table.version, lambda: advancement_probabilities(TournamentModel(table, TOURNAMENT)))
+
+def format_advancement(probability: float) -> str:
+    """Short percentage for a radio button label"""
+    if probability < 0.005:
+        return "<1%"
+    if probability > 0.995:
+        return ">99%"
+    return f"{probability:.0%}"
 
 def get_final_four_matchups(input) -> List[Tuple[Optional[Dict], Optional[Dict]]]:
-    """Get Final Four matchups based on Elite 8 winners"""
-    bracket = get_bracket(input)
-    
-    # Check if Elite 8 results exist
-    if "Elite 8" not in bracket.results:
-        return [(None, None), (None, None)]
-    
-    # Get regional champions
-    elite_eight_winners = bracket.results["Elite 8"]
-    
-    # Create Final Four matchups (traditionally East vs West, South vs Midwest)
-    region_to_index = {"East": 0, "West": 1, "South": 2, "Midwest": 3}
-    
-    # Sort winners by region to ensure consistent matchups
-    sorted_winners = sorted(elite_eight_winners, key=lambda team: region_to_index.get(team.region, 99))
-    
-    # Create matchups
-    matchups = []
-    for i in range(0, len(sorted_winners), 2):
-        team1 = sorted_winners[i] if i < len(sorted_winners) else None
-        team2 = sorted_winners[i+1] if i+1 < len(sorted_winners) else None
-        matchups.append((
-            convert_team_to_dict(team1),
-            convert_team_to_dict(team2)
-        ))
-    
-    # Ensure we return exactly 2 matchups
-    while len(matchups) < 2:
-        matchups.append((None, None))
-    
-    return matchups
+    """Get Final Four matchups based on Elite 8 winners (East vs West, South vs Midwest)"""
+    state = BracketState(get_tournament_index(), get_compact_bracket(input))
+    return get_matchup_dicts(state, "final", 5)
 
 def get_championship_matchup(input) -> List[Tuple[Optional[Dict], Optional[Dict]]]:
     """Get Championship matchup based on Final Four winners"""
-    bracket = get_bracket(input)
+    state = BracketState(get_tournament_index(), get_compact_bracket(input))
+    return get_matchup_dicts(state, "final", 6)
+
+def get_game_choices(state: BracketState, index: int) -> Tuple[Dict[str, str], Optional[str]]:
+    """
+    Get the radio button choices and default selection for a single game.
     
-    # Check if Final Four results exist
-    if "Final Four" not in bracket.results or not bracket.results["Final Four"]:
-        return [(None, None)]
+    Args:
+        state: Current bracket state
+        index: Game index in the 63-game layout
+        
+    Returns:
+        Tuple of (choices, selected); choices is empty while the matchup is still waiting on a previous round
+    """
+    team1, team2 = state.matchup_teams(index)
+    if team1 is None or team2 is None:
+        return {}, None
     
-    final_four_winners = bracket.results["Final Four"]
+    # Label each team with its chance of winning this round's game
+    advancement = get_advancement_probabilities(state.table)[:, GAME_ROUNDS[index] - 1]
+    slot1, slot2 = state.matchup(index)
+    choices = {
+        team1.name: f"({team1.seed}) {team1.name} · {format_advancement(advancement[slot1])}",
+        team2.name: f"({team2.seed}) {team2.name} · {format_advancement(advancement[slot2])}"
+    }
     
-    # Create Championship matchup
-    if len(final_four_winners) >= 2:
-        return [(
-            convert_team_to_dict(final_four_winners[0]),
-            convert_team_to_dict(final_four_winners[1])
-        )]
-    else:
-        return [(None, None)]
-
-# Replace the specific functions with a general function that calls the shared implementation
-def get_round1_matchups(region: str) -> List[Tuple[Optional[Dict], Optional[Dict]]]:
-    """Get initial matchups for first round games in a region"""
-    # Create bracket using initial teams data
-    from bigdance.cbb_brackets import Bracket, Team
-    
-    all_teams = []
-    for region_name, region_teams in teams.items():
-        for team_data in region_teams:
-            all_teams.append(Team(
-                name=team_data["Team"],
-                seed=team_data["Seed"],
-                region=region_name,
-                rating=team_data.get("Rating", 1500),
-                conference="Unknown"
-            ))
-    
-    bracket = Bracket(all_teams)
-    
-    # Filter games in specified region
-    matchups = []
-    for game in bracket.games:
-        if game.region.lower() == region.lower():
-            matchups.append((
-                convert_team_to_dict(game.team1),
-                convert_team_to_dict(game.team2)
-            ))
-    
-    return matchups
-
-def create_round_ui(input, region: str, round_num: int, matchups: List[Tuple[Dict, Dict]]) -> ui.div:
+    # Keep the current selection if it is still valid, otherwise default to higher seed
+    current_selection = state.winner_name(index)
+    if current_selection in choices:
+        return choices, current_selection
+    return choices, state.table.names[state.default_winner(index)]
+
+def create_game_ui(state: BracketState, index: int) -> ui.div:
     """
-    Create UI for any round's games with higher seed selected by default,
+    Create UI for a single game with the higher seed selected by default,
     while preserving user selections when possible.
     """
-    games = []
-    for i, (team1, team2) in enumerate(matchups):
-        game_id = f"{region.lower()}_round{round_num}_game_{i}"
-        choices = {}
-        
-        if team1:
-            choices[team1["Team"]] = f"({team1['Seed']}) {team1['Team']}"
-        if team2:
-            choices[team2["Team"]] = f"({team2['Seed']}) {team2['Team']}"
-        
-        if len(choices) == 2:
-            # Try to get current selection (if any)
-            current_selection = None
-            try:
-                current_selection = input[game_id]()
-            except:
-                # No selection yet or other error
-                pass
-                
-            # If current selection exists and is still valid, keep it
-            if current_selection and current_selection in choices:
-                default_team = current_selection
-            else:
-                # Otherwise default to higher seed
-                default_team = team1["Team"] if team1["Seed"] < team2["Seed"] else team2["Team"]
-            
-            game = ui.div(
-                {"class": "game-container"},
-                ui.input_radio_buttons(
-                    game_id,
-                    f"Game {i + 1}",
-                    choices,
-                    selected=default_team
-                )
-            )
-        else:
-            game = ui.div(
-                {"class": "game-container"},
-                ui.p("Waiting for previous round selections...")
-            )
-        
-        games.append(game)
+    game_id = GAME_IDS[index]
+    choices, selected = get_game_choices(state, index)
+    if not choices:
+        return ui.div(
+            {"class": "game-container"},
+            ui.p("Waiting for previous round selections...")
+        )
     
+    game_number = int(game_id.rsplit("_", 1)[1]) + 1
     return ui.div(
-        {"class": "bracket-region"},
-        *games
+        {"class": "game-container"},
+        ui.input_radio_buttons(
+            game_id,
+            f"Game {game_number}",
+            choices,
+            selected=selected
+        )
     )
 
+def get_compact_bracket(input) -> CompactBracket:
+    """
+    Encode the user's selections in the UI as a CompactBracket.
+    
+    Args:
+        input: Shiny input object containing user selections
+        
+    Returns:
+        CompactBracket holding the 63 picks (undecided games left unset)
+    """
+    picks = {game_id: get_game_winner(input, game_id) for game_id in GAME_IDS}
+    return CompactBracket.from_picks(picks, get_tournament_index())
+
 def create_bracket_from_picks(input) -> Bracket:
     """
     Create a Bracket object from the user's selections in the UI.
@@ -388,326 +262,333 @@ def create_bracket_from_picks(input) -> Bracket:
     Returns:
         Bracket object populated with the user's picks
     """
-    # Create Team objects from teams data
-    all_teams = []
-    for region_name, region_teams in teams.items():
-        for team_data in region_teams:
-            all_teams.append(Team(
-                name=team_data["Team"],
-                seed=team_data["Seed"],
-                region=region_name,
-                rating=team_data.get("Rating", 1500),
-                conference="Unknown"  # Conference not critical for analysis
-            ))
-    
-    # Create an empty bracket with these teams
-    bracket = Bracket(all_teams)
-    
-    # Initialize results dictionary
-    bracket.results = {
-        "First Round": [],
-        "Second Round": [],
-        "Sweet 16": [],
-        "Elite 8": [],
-        "Final Four": [],
-        "Championship": []
-    }
-    
-    # Get user selections for each round
-    # First round through Elite 8 (regions)
-    for region in ["east", "west", "south", "midwest"]:
-        # First round (8 games)
-        for i in range(8):
-            game_id = f"{region}_round1_game_{i}"
-            winner_name = get_game_winner(input, game_id)
-            if winner_name:
-                winner = next((t for t in all_teams if t.name == winner_name), None)
-                if winner:
-                    bracket.results["First Round"].append(winner)
-                    
-                    # Additionally, set the winner in the corresponding game object
-                    # First, find the matching game in the bracket.games list
-                    for game in bracket.games:
-                        if (game.region.lower() == region and 
-                            (game.team1.name == winner_name or game.team2.name == winner_name)):
-                            game.winner = winner
-                            break
-        
-        # Second round (4 games)
-        for i in range(4):
-            game_id = f"{region}_round2_game_{i}"
-            winner_name = get_game_winner(input, game_id)
-            if winner_name:
-                winner = next((t for t in all_teams if t.name == winner_name), None)
-                if winner:
-                    bracket.results["Second Round"].append(winner)
-        
-        # Sweet 16 (2 games)
-        for i in range(2):
-            game_id = f"{region}_round3_game_{i}"
-            winner_name = get_game_winner(input, game_id)
-            if winner_name:
-                winner = next((t for t in all_teams if t.name == winner_name), None)
-                if winner:
-                    bracket.results["Sweet 16"].append(winner)
-        
-        # Elite 8 (1 game)
-        game_id = f"{region}_round4_game_0"
-        winner_name = get_game_winner(input, game_id)
-        if winner_name:
-            winner = next((t for t in all_teams if t.name == winner_name), None)
-            if winner:
-                bracket.results["Elite 8"].append(winner)
-    
-    # Final Four (2 games)
-    for i in range(2):
-        game_id = f"final_round5_game_{i}"
-        winner_name = get_game_winner(input, game_id)
-        if winner_name:
-            winner = next((t for t in all_teams if t.name == winner_name), None)
-            if winner:
-                bracket.results["Final Four"].append(winner)
-    
-    # Championship (1 game)
-    game_id = "final_round6_game_0"
-    winner_name = get_game_winner(input, game_id)
-    if winner_name:
-        winner = next((t for t in all_teams if t.name == winner_name), None)
-        if winner:
-            bracket.results["Championship"].append(winner)
-            bracket.results["Champion"] = winner
-    
-    # Recreate the games structure for later rounds
-    # We need to do this because the original games list only contains first round games
-    current_round_teams = bracket.results["First Round"]
-    
-    # Create "games" for each subsequent round based on the results
-    # Second Round games
-    if len(current_round_teams) >= 2:
-        round_name = "Second Round"
-        for i in range(0, len(current_round_teams), 2):
-            if i + 1 < len(current_round_teams):
-                team1 = current_round_teams[i]
-                team2 = current_round_teams[i + 1]
-                # Find the winner of this matchup in the next round's results
-                winner = None
-                if round_name in bracket.results:
-                    for potential_winner in bracket.results[round_name]:
-                        if potential_winner.name == team1.name or potential_winner.name == team2.name:
-                            winner = potential_winner
-                            break
-                
-                # Create a Game object with the proper winner set
-                game = Game(
-                    team1=team1,
-                    team2=team2,
-                    round=2,
-                    region=team1.region if team1.region == team2.region else "Final Four",
-                    winner=winner
-                )
-                # We would add this to a games list if we needed to track it
-    
-    # We don't need to repeat this for all later rounds since the first round
-    # is sufficient for log probability calculations, but the pattern would be similar
-    
-    return bracket
+    return get_compact_bracket(input).to_bracket(get_tournament_index())
 
 
-def analyze_bracket(input) -> Dict:
+def analyze_bracket(input, bundle: Optional[AnalysisBundle] = None) -> Dict:
     """
     Analyze the current bracket selections and provide recommendations
+    
+    Args:
+        input: Shiny input object containing user selections
+        bundle: Analysis data to compare against (defaults to the bundle for the selected pool size)
     """
     try:
-        # Create a Bracket object from user selections
-        bracket = create_bracket_from_picks(input)
+        if bundle is None:
+            bundle = get_any_analysis_bundle(get_pool_size(input))
+        return analyze_compact_bracket(get_compact_bracket(input), bundle)
+    
+    except Exception as e:
+        logger.error(f"Error analyzing bracket: {str(e)}")
+        return failed_analysis(str(e))
+
+
+def analyze_compact_bracket(compact_bracket: CompactBracket, bundle: AnalysisBundle,
+                            win_estimate_timeout: Optional[float] = WIN_ESTIMATE_BUDGET_SECONDS) -> Dict:
+    """
+    Analyze an encoded bracket against a pool size's analysis data (the core of analyze_bracket).
+    
+    Args:
+        compact_bracket: The bracket's picks
+        bundle: Analysis data to compare against
+        win_estimate_timeout: Longest to wait for a pool sample still being built
+            (0 from reactive code, which checks back later instead)
         
-        # Calculate log probability of the bracket
-        log_probability = bracket.calculate_log_probability()
+    Returns:
+        Analysis dictionary as returned by analyze_bracket (raises instead of returning an error entry)
+    """
+    tournament = get_tournament_index()
+    winner_slots = compact_bracket.winner_slots()
+    
+    # Estimate the chance of winning the pool by scoring the bracket against cached
+    # simulated pools (None while the pool size's simulations are still running)
+    win_estimate = estimate_win_probability(winner_slots, int(bundle.pool_size), bundle.tournament,
+                                            timeout=win_estimate_timeout)
+    if win_estimate is not None:
+        win_estimate['complete'] = compact_bracket.is_complete
+    
+    brackets = np.array([[-1 if slot is None else slot for slot in winner_slots]], dtype=np.intp)
+    return analyze_brackets(brackets, bundle, tournament, [win_estimate])[0]
+
+
+def failed_analysis(error: str) -> Dict:
+    """Analysis result for a bracket that could not be analyzed"""
+    return {
+        'error': error,
+        'selections': {},
+        'underdog_counts': {},
+        'specific_upsets': [],
+        'missing_valuable_upsets': [],
+        'champion_assessment': {},
+        'upset_assessment': {},
+        'bracket_rating': {'rating': 'Error', 'score': 0, 'max_score': 75, 'percentage': 0},
+        'win_probability': None,
+        'win_estimate': None,
+        'log_probability': float('inf'),
+        'log_probability_by_round': {},
+        'percentiles': {'log_probability': {}, 'upsets': {}}
+    }
+
+
+def _percentile_rows(shares: Dict[str, Optional[np.ndarray]], count: int) -> List[Dict[str, Optional[float]]]:
+    """Split a vectorized percentile lookup into one percentile dictionary per bracket"""
+    winners, non_winners = ([None] * count if values is None else values.tolist()
+                            for values in (shares['winners'], shares['non_winners']))
+    return [{'winners': winner, 'non_winners': non_winner} for winner, non_winner in zip(winners, non_winners)]
+
+
+def _assess_upset_count(count: int, optimal_upsets: Dict) -> Tuple[Dict, int]:
+    """Assessment of a round's underdog count against its optimal range, and the points it earns"""
+    optimal_range = optimal_upsets["range"]
+    status = ('good' if optimal_range[0] <= count <= optimal_range[1] else
+              ('too_many' if count > optimal_range[1] else 'too_few'))
+    assessment = {
+        'count': count,
+        'optimal': optimal_upsets["optimal"],
+        'min': optimal_range[0],
+        'max': optimal_range[1],
+        'status': status
+    }
+    if status == 'good':
+        points = 5
+    elif status == 'too_many' and count - optimal_range[1] <= 2:
+        points = 2
+    elif status == 'too_few' and optimal_range[0] - count <= 2:
+        points = 2
+    else:
+        points = 0
+    return assessment, points
+
+
+def _rate_bracket_score(bracket_score: int) -> Dict:
+    """Rating of an overall bracket score"""
+    # Maximum possible score: 
+    # 7 rounds * 5 points + 10 valuable upsets * 3 points + champion 10 points = 75
+    return {
+        'score': bracket_score,
+        'max_score': 75,
+        'percentage': int(bracket_score / 75 * 100),
+        'rating': 'Excellent' if bracket_score >= 60 else
+                 'Very Good' if bracket_score >= 45 else
+                 'Good' if bracket_score >= 30 else
+                 'Fair' if bracket_score >= 15 else
+                 'Needs Improvement'
+    }
+
+
+def analyze_brackets(brackets: np.ndarray, bundle: AnalysisBundle, tournament: TournamentIndex,
+                     win_estimates: Optional[List[Optional[Dict]]] = None) -> List[Dict]:
+    """
+    Analyze a batch of brackets against one pool size's analysis data.
+    
+    Underdogs, log probabilities and percentiles are computed for the whole
+    batch with array operations; only assembling each result dictionary is
+    done bracket by bracket. Results match analyze_bracket for the same picks.
+    
+    Args:
+        brackets: Winner slots of shape (n, 63), negative for undecided games
+        bundle: Analysis data to compare against
+        tournament: Index of the tournament the brackets were picked for
+        win_estimates: Win estimate of each bracket (None for every bracket if omitted)
         
-        # Extract simple selection dictionary for compatibility with other functions
-        # (in case any of them still need access to the selections)
-        selections = {
-            round_name: [team.name for team in teams_list] 
-            for round_name, teams_list in bracket.results.items() 
-            if round_name != "Champion"
-        }
+    Returns:
+        List of analysis dictionaries, one per bracket
+    """
+    brackets = np.asarray(brackets, dtype=np.intp)
+    count = len(brackets)
+    records = tournament.records
+    optimal_upset_dict = bundle.optimal_upset_dict
+    upset_index = bundle.specific_upset_index
+    if win_estimates is None:
+        win_estimates = [None] * count
+    
+    # Picked winner names (None for undecided games)
+    picked_names = np.array(tournament.names + (None,), dtype=object)[brackets].tolist()
+    complete = (brackets >= 0).all(axis=1).tolist()
+    
+    # Underdog picks and their counts by round
+    underdogs = underdog_games(np.array([record.seed for record in records]), brackets)
+    underdog_counts_by_round = np.add.reduceat(underdogs.astype(np.int16), _ROUND_STARTS, axis=1).tolist()
+    
+    # Underdog picks that appear more often in winning brackets, grouped by bracket
+    # (np.nonzero walks the rows in order, and each row in game order)
+    upset_values = np.zeros((len(_ROUND_ORDER), len(records)))
+    for (round_name, team_name, seed), upset_value in upset_index.items():
+        team = tournament.by_name.get(team_name)
+        if round_name in _ROUND_ORDER and team is not None and team.seed == seed and upset_value is not None:
+            upset_values[_ROUND_ORDER.index(round_name), team.slot] = upset_value
+    valuable_rows, valuable_games = np.nonzero(underdogs & (upset_values[_GAME_ROUND_INDEX, brackets] > 0))
+    row_starts = np.searchsorted(valuable_rows, np.arange(count + 1)).tolist()
+    valuable_games = valuable_games.tolist()
+    
+    # Log probabilities from the index's precomputed win probabilities
+    log_probabilities_round = log_probabilities_by_round(tournament, brackets)
+    log_probabilities_total = log_probabilities_round.sum(axis=1)
+    
+    # Percentiles in the winning and non-winning bracket distributions, looked up for the whole batch
+    log_percentiles = {}
+    for round_name, cdf in bundle.log_probability_cdfs.items():
+        if round_name == "Overall":
+            log_percentiles[round_name] = _percentile_rows(cdf.percentiles(log_probabilities_total), count)
+        elif round_name in _ROUND_ORDER:
+            values = log_probabilities_round[:, _ROUND_ORDER.index(round_name)]
+            log_percentiles[round_name] = _percentile_rows(cdf.percentiles(values), count)
+    upset_percentiles = {}
+    for round_name, cdf in bundle.upset_cdfs.items():
+        if round_name == "Total Upsets":
+            upset_percentiles[round_name] = _percentile_rows(cdf.percentiles(underdogs.sum(axis=1)), count)
+        elif round_name in _ROUND_ORDER:
+            values = np.asarray(underdog_counts_by_round)[:, _ROUND_ORDER.index(round_name)]
+            upset_percentiles[round_name] = _percentile_rows(cdf.percentiles(values), count)
+    
+    # Whether each bracket picked each of the most valuable upsets (the top 10 are the same for every bracket)
+    valuable_upsets = []
+    for upset in bundle.top_specific_upsets:
+        round_name, team_name = upset['round'], upset['team']
+        slot = tournament.slot_of.get(team_name)
+        if round_name in _ROUND_ORDER and slot is not None:
+            round_num = _ROUND_ORDER.index(round_name) + 1
+            picked = (brackets[:, ROUND_OFFSETS[round_num]:ROUND_OFFSETS[round_num + 1]] == slot).any(axis=1).tolist()
+        else:
+            picked = [False] * count
+        valuable_upsets.append(({
+            'round': round_name,
+            'team': team_name,
+            'seed': upset['seed'],
+            'region': tournament.region_of.get(team_name),
+            'advantage': upset['freq_diff']
+        }, picked))
+    
+    # Recommend the top champions if the pick is undervalued or not in the analysis
+    champion_recommendations = [{
+        'team': champ['team'],
+        'seed': champ['seed'],
+        'region': tournament.region_of.get(champ['team']),
+        'freq_diff': champ['freq_diff']
+    } for champ in bundle.top_champions]
+    
+    log_probabilities_round = log_probabilities_round.tolist()
+    log_probabilities_total = log_probabilities_total.tolist()
+    
+    # Percentile rows regrouped by bracket, and the underdog count each upset percentile depends on
+    log_percentile_rounds = list(log_percentiles)
+    log_percentile_rows = list(zip(*log_percentiles.values())) if log_percentiles else [()] * count
+    upset_percentile_rounds = [(round_name, "Total" if round_name == "Total Upsets" else round_name, rows)
+                               for round_name, rows in upset_percentiles.items()]
+    
+    # Which of the top upsets each bracket picked, as one tuple per bracket
+    valuable_upset_entries = [upset for upset, _ in valuable_upsets]
+    valuable_upset_picks = list(zip(*(picked for _, picked in valuable_upsets))) if valuable_upsets else [()] * count
+    
+    # Everything derived from a bracket's underdog counts, champion, top upset picks, specific
+    # upsets or score is the same for every bracket sharing them: it is built once per batch
+    # and shared between results, like the recommendation lists above
+    by_underdog_counts = {}
+    upset_count_assessments = {}
+    by_champion = {}
+    by_valuable_upset_picks = {}
+    specific_upset_entries = {}
+    bracket_ratings = {}
+    
+    results = []
+    for index, slots in enumerate(brackets.tolist()):
+        row_names = picked_names[index]
+        win_estimate = win_estimates[index]
         
-        # Add Champion separately since it's a single Team object
-        if "Champion" in bracket.results and bracket.results["Champion"]:
-            selections["Champion"] = bracket.results["Champion"].name
+        # Picked winners of each round in game order
+        if complete[index]:
+            selections = {round_name: row_names[start:end] for round_name, start, end in _ROUND_SLICES}
         else:
-            selections["Champion"] = None
+            selections = {round_name: list(filter(None, row_names[start:end]))
+                          for round_name, start, end in _ROUND_SLICES}
+        selections["Champion"] = row_names[-1]
         
-        # Use Bracket built-in methods for underdogs analysis
-        bracket.identify_underdogs()
-        underdog_counts = bracket.count_underdogs_by_round()
-        underdog_counts["Total"] = bracket.total_underdogs()
+        counts_key = tuple(underdog_counts_by_round[index])
+        by_counts = by_underdog_counts.get(counts_key)
+        if by_counts is None:
+            # Underdog counts for the rounds that have any (as bigdance's count_underdogs_by_round reports them)
+            underdog_counts = {round_name: count for round_name, count in zip(_ROUND_ORDER, counts_key) if count}
+            underdog_counts["Total"] = sum(underdog_counts.values())
+            
+            # Place the bracket's upset counts in the winning and non-winning bracket distributions
+            # of the simulated pools (the same for every bracket with these counts)
+            upset_percentiles_row = {round_name: rows[index] for round_name, count_name, rows in upset_percentile_rounds
+                                     if count_name in underdog_counts}
+            
+            # Compare underdog counts to optimal values, with points for having optimal number of upsets
+            upset_assessment = {}
+            upset_points = 0
+            for round_name, count in underdog_counts.items():
+                if round_name in optimal_upset_dict:
+                    entry = upset_count_assessments.get((round_name, count))
+                    if entry is None:
+                        entry = upset_count_assessments[(round_name, count)] = _assess_upset_count(
+                            count, optimal_upset_dict[round_name])
+                    upset_assessment[round_name], points = entry
+                    upset_points += points
+            by_counts = by_underdog_counts[counts_key] = (underdog_counts, upset_percentiles_row, upset_assessment,
+                                                          upset_points)
+        underdog_counts, upset_percentiles_row, upset_assessment, upset_points = by_counts
         
-        # Get specific upsets
+        # Get specific upsets that appear more often in winning brackets
         specific_upsets = []
-        if specific_upsets_df is not None:
-            for round_name, team_list in bracket.underdogs_by_round.items():
-                for team in team_list:
-                    # Check if this is an upset according to the analysis
-                    round_upsets = specific_upsets_df[
-                        (specific_upsets_df['round'] == round_name) & 
-                        (specific_upsets_df['team'] == team.name) &
-                        (specific_upsets_df['seed'] == team.seed)
-                    ]
-                    
-                    if not round_upsets.empty and round_upsets['freq_diff'].values[0] > 0:
-                        # This is a valuable upset - add it to our list
-                        upset_value = round_upsets['freq_diff'].values[0]
-                        specific_upsets.append({
-                            'round': round_name,
-                            'team': team.name,
-                            'seed': team.seed,
-                            'region': team.region,
-                            'advantage': upset_value
-                        })
-        
-        # Evaluate champion selection
-        champion_assessment = {
-            'champion': selections["Champion"],
-            'value': 0,
-            'recommendation': None
-        }
-        
-        if champion_df is not None and selections["Champion"]:
-            champion_row = champion_df[champion_df['team'] == selections["Champion"]]
-            if not champion_row.empty:
-                champion_assessment['value'] = champion_row['freq_diff'].values[0]
-                
-                if champion_assessment['value'] < 0:
-                    # Get top 3 recommended champions
-                    top_champions = champion_df[champion_df['freq_diff'] > 0].sort_values('freq_diff', ascending=False).head(3)
-                    if not top_champions.empty:
-                        # Add region information to recommendations
-                        champion_recommendations = []
-                        for _, champ in top_champions.iterrows():
-                            champ_name = champ['team']
-                            champ_region = None
-                            
-                            # Find region
-                            for region, region_teams in teams.items():
-                                if any(team["Team"] == champ_name for team in region_teams):
-                                    champ_region = region
-                                    break
-                                    
-                            champion_recommendations.append({
-                                'team': champ_name,
-                                'seed': champ['seed'],
-                                'region': champ_region,
-                                'freq_diff': champ['freq_diff']
-                            })
-                            
-                        champion_assessment['recommendation'] = champion_recommendations
-            else:
-                # Champion not found in analysis, recommend top 3
-                top_champions = champion_df[champion_df['freq_diff'] > 0].sort_values('freq_diff', ascending=False).head(3)
-                if not top_champions.empty:
-                    # Add region information to recommendations
-                    champion_recommendations = []
-                    for _, champ in top_champions.iterrows():
-                        champ_name = champ['team']
-                        champ_region = None
-                        
-                        # Find region
-                        for region, region_teams in teams.items():
-                            if any(team["Team"] == champ_name for team in region_teams):
-                                champ_region = region
-                                break
-                                
-                        champion_recommendations.append({
-                            'team': champ_name,
-                            'seed': champ['seed'],
-                            'region': champ_region,
-                            'freq_diff': champ['freq_diff']
-                        })
-                        
-                    champion_assessment['recommendation'] = champion_recommendations
-        
-        # Compare underdog counts to optimal values
-        upset_assessment = {}
-        for round_name, count in underdog_counts.items():
-            if round_name in optimal_upset_dict:
-                optimal = optimal_upset_dict[round_name]["optimal"]
-                optimal_range = optimal_upset_dict[round_name]["range"]
-                
-                upset_assessment[round_name] = {
-                    'count': count,
-                    'optimal': optimal,
-                    'min': optimal_range[0],
-                    'max': optimal_range[1],
-                    'status': 'good' if optimal_range[0] <= count <= optimal_range[1] else 
-                              ('too_many' if count > optimal_range[1] else 'too_few')
+        for game in valuable_games[row_starts[index]:row_starts[index + 1]]:
+            entry = specific_upset_entries.get((game, slots[game]))
+            if entry is None:
+                round_name = ROUND_NAMES[GAME_ROUNDS[game]]
+                team = records[slots[game]]
+                entry = specific_upset_entries[(game, slots[game])] = {
+                    'round': round_name,
+                    'team': team.name,
+                    'seed': team.seed,
+                    'region': team.region,
+                    'advantage': upset_index[(round_name, team.name, team.seed)]
                 }
+            specific_upsets.append(entry)
         
-        # Find valuable upsets that user is missing
-        missing_valuable_upsets = []
-        if specific_upsets_df is not None:
-            # Get top 10 most valuable specific upsets
-            top_upsets = specific_upsets_df[specific_upsets_df['freq_diff'] > 0].sort_values('freq_diff', ascending=False).head(10)
+        # Evaluate champion selection
+        champion = selections["Champion"]
+        champion_assessment = by_champion.get(champion)
+        if champion_assessment is None:
+            champion_assessment = {
+                'champion': champion,
+                'value': 0,
+                'recommendation': None
+            }
             
-            for _, upset in top_upsets.iterrows():
-                round_name = upset['round']
-                team_name = upset['team']
-                
-                # Check if this valuable upset is missing from user's selections
-                is_missing = True
-                if round_name in selections:
-                    if team_name in selections[round_name]:
-                        is_missing = False
+            if bundle.champion_df is not None and champion:
+                champion_value = bundle.champion_index.get(champion)
+                if champion_value is not None:
+                    champion_assessment['value'] = champion_value
                 
-                if is_missing:
-                    # Find team region
-                    team_region = None
-                    for region, region_teams in teams.items():
-                        if any(team["Team"] == team_name for team in region_teams):
-                            team_region = region
-                            break
-                            
-                    missing_valuable_upsets.append({
-                        'round': round_name,
-                        'team': team_name,
-                        'seed': upset['seed'],
-                        'region': team_region,
-                        'advantage': upset['freq_diff']
-                    })
-        
-        # Overall assessment
-        bracket_score = 0
+                if (champion_value is None or champion_value < 0) and champion_recommendations:
+                    champion_assessment['recommendation'] = champion_recommendations
+            by_champion[champion] = champion_assessment
         
-        # Add points for having optimal number of upsets
-        for round_name, assessment in upset_assessment.items():
-            if assessment['status'] == 'good':
-                bracket_score += 5
-            elif assessment['status'] == 'too_many' and assessment['count'] - assessment['max'] <= 2:
-                bracket_score += 2
-            elif assessment['status'] == 'too_few' and assessment['min'] - assessment['count'] <= 2:
-                bracket_score += 2
+        # Place the bracket's log probabilities in the winning and non-winning bracket distributions
+        percentiles = {
+            'log_probability': dict(zip(log_percentile_rounds, log_percentile_rows[index])),
+            'upsets': upset_percentiles_row
+        }
         
-        # Add points for valuable specific upsets
-        bracket_score += len(specific_upsets) * 3
+        # Find valuable upsets that user is missing (from the precomputed top 10)
+        picks_key = valuable_upset_picks[index]
+        missing_valuable_upsets = by_valuable_upset_picks.get(picks_key)
+        if missing_valuable_upsets is None:
+            missing_valuable_upsets = by_valuable_upset_picks[picks_key] = [
+                upset for upset, picked in zip(valuable_upset_entries, picks_key) if not picked]
         
-        # Add points for champion selection
+        # Overall assessment: points for optimal upset counts, valuable specific upsets
+        # and the champion selection
+        bracket_score = upset_points + len(specific_upsets) * 3
         if champion_assessment['value'] > 0:
             bracket_score += 10
         
-        # Maximum possible score: 
-        # 7 rounds * 5 points + 10 valuable upsets * 3 points + champion 10 points = 75
-        bracket_rating = {
-            'score': bracket_score,
-            'max_score': 75,
-            'percentage': int(bracket_score / 75 * 100),
-            'rating': 'Excellent' if bracket_score >= 60 else
-                     'Very Good' if bracket_score >= 45 else
-                     'Good' if bracket_score >= 30 else
-                     'Fair' if bracket_score >= 15 else
-                     'Needs Improvement'
-        }
+        bracket_rating = bracket_ratings.get(bracket_score)
+        if bracket_rating is None:
+            bracket_rating = bracket_ratings[bracket_score] = _rate_bracket_score(bracket_score)
         
-        return {
+        analysis = {
             'selections': selections,
             'underdog_counts': underdog_counts,
             'specific_upsets': specific_upsets,
@@ -715,396 +596,699 @@ def analyze_bracket(input) -> Dict:
             'champion_assessment': champion_assessment,
             'upset_assessment': upset_assessment,
             'bracket_rating': bracket_rating,
-            'log_probability': log_probability,
-            'log_probability_by_round': bracket.log_probability_by_round if hasattr(bracket, 'log_probability_by_round') else {}
+            'win_probability': win_estimate['win_probability'] if win_estimate is not None else None,
+            'win_estimate': win_estimate,
+            'log_probability': log_probabilities_total[index],
+            'log_probability_by_round': dict(zip(_ROUND_ORDER, log_probabilities_round[index])),
+            'percentiles': percentiles
         }
+        results.append(analysis)
     
-    except Exception as e:
-        logger.error(f"Error analyzing bracket: {str(e)}")
-        return {
-            'error': str(e),
-            'selections': {},
-            'underdog_counts': {},
-            'specific_upsets': [],
-            'missing_valuable_upsets': [],
-            'champion_assessment': {},
-            'upset_assessment': {},
-            'bracket_rating': {'rating': 'Error', 'score': 0, 'max_score': 75, 'percentage': 0},
-            'log_probability': float('inf'),
-            'log_probability_by_round': {}
-        }
+    return results
 
-def format_bracket_assessment(assessment: Dict, input) -> str:
-    """Format bracket assessment into a readable text report"""
-    try:
-        if 'error' in assessment:
-            return f"Error analyzing bracket: {assessment['error']}"
-        
-        # Get pool size for context
-        pool_size = input.pool_size()
-        
-        # General format
-        report = [
-            f"# Bracket Assessment for {pool_size}-Entry Pool",
-            f"## Overall Rating: {assessment['bracket_rating']['rating']} ({assessment['bracket_rating']['score']}/{assessment['bracket_rating']['max_score']} points)"
-        ]
-        
-        # Add log probability section
-        log_prob = assessment.get('log_probability', float('inf'))
-        log_prob_by_round = assessment.get('log_probability_by_round', {})
-        
-        report.append("## Bracket Probability")
-        
-        if log_prob != float('inf'):
-            # Format log probability (it's negative log probability, so lower is better)
-            report.append(f"**Total Log Probability**: {log_prob:.2f} (lower is more likely)")
-            
-            # Interpret the log probability
-            if log_prob < 40:
-                report.append("✅ Your bracket is very plausible based on team ratings.")
-            elif log_prob < 60:
-                report.append("✓ Your bracket has reasonable probability based on team ratings.")
-            elif log_prob < 80:
-                report.append("⚠️ Your bracket has some unlikely outcomes based on team ratings.")
-            else:
-                report.append("❗ Your bracket contains many unlikely outcomes based on team ratings.")
-            
-            # Add round-by-round log probabilities if available
-            if log_prob_by_round:
-                report.append("\n**Log Probability by Round:**")
-                for round_name, round_log_prob in sorted(log_prob_by_round.items(), 
-                                                        key=lambda x: ["First Round", "Second Round", "Sweet 16", 
-                                                                      "Elite 8", "Final Four", "Championship"].index(x[0]) 
-                                                                      if x[0] in ["First Round", "Second Round", "Sweet 16", 
-                                                                                 "Elite 8", "Final Four", "Championship"] else 99):
-                    report.append(f"- {round_name}: {round_log_prob:.2f}")
-        else:
-            report.append("⚠️ Unable to calculate bracket probability. This might be due to incomplete selections.")
-        
-        # Upset assessment
-        report.append("## Upset Analysis")
-        expected_rounds = ["First Round", "Second Round", "Sweet 16", "Elite 8", "Final Four", "Championship", "Total"]
-        for round_name in expected_rounds:
-            if round_name in assessment['upset_assessment']:
-                details = assessment['upset_assessment'][round_name]
-                status_emoji = "✅" if details['status'] == 'good' else "⚠️" if details['status'] == 'too_many' else "❗"
-                report_line = f"{status_emoji} **{round_name}**: {details['count']} upsets "
-                
-                if details['status'] == 'good':
-                    report_line += f"(optimal range is {details['min']}-{details['max']})"
-                elif details['status'] == 'too_many':
-                    report_line += f"(consider reducing by {details['count'] - details['max']} to reach optimal range of {details['min']}-{details['max']})"
-                else:  # too_few
-                    report_line += f"(consider adding {details['min'] - details['count']} to reach optimal range of {details['min']}-{details['max']})"
-                
-                report.append(report_line)
-            else:
-                # Skip or add placeholder for missing rounds
-                if round_name != "Total":  # Don't show message for Total if missing
-                    report.append(f"⚠️ **{round_name}**: No data available")
-        
-        # Champion assessment
-        report.append("## Champion Selection")
-        if assessment['champion_assessment']['champion']:
-            # Find champion details
-            champion_name = assessment['champion_assessment']['champion']
-            champion_details = next((team for region_teams in teams.values() 
-                                 for team in region_teams if team["Team"] == champion_name), None)
-            if champion_details:
-                champion_seed = champion_details['Seed']
-                
-                # Find champion region
-                champion_region = None
-                for region, region_teams in teams.items():
-                    if any(team["Team"] == champion_name for team in region_teams):
-                        champion_region = region
-                        break
-                        
-                region_info = f" [{champion_region}]" if champion_region else ""
-                report.append(f"Your champion: **({champion_seed}) {champion_name}{region_info}**")
-                
-                if assessment['champion_assessment']['value'] > 0:
-                    report.append(f"✅ Good choice! This champion appears more frequently in winning brackets.")
-                elif assessment['champion_assessment']['value'] == 0:
-                    report.append(f"⚠️ Neutral choice. This champion appears equally in winning and non-winning brackets.")
-                else:
-                    report.append(f"❗ Consider a different champion. This pick appears more frequently in non-winning brackets.")
-                    
-                    if assessment['champion_assessment']['recommendation']:
-                        report.append("Suggested champion alternatives:")
-                        for idx, champ in enumerate(assessment['champion_assessment']['recommendation']):
-                            region_info = f" [{champ.get('region', '')}]" if 'region' in champ else ""
-                            report.append(f"- ({champ['seed']}) {champ['team']}{region_info}")
-            else:
-                report.append(f"Your champion: **{champion_name}**")
-        else:
-            report.append("❗ No champion selected. Please complete your bracket.")
-        
-        # Valuable specific upsets
-        report.append("## Valuable Upsets")
-        if assessment['specific_upsets']:
-            report.append(f"✅ Your bracket includes these valuable upset picks that appear more often in winning brackets in {pool_size}-entry pools:")
-            for upset in sorted(assessment['specific_upsets'], key=lambda x: x['advantage'], reverse=True):
-                # Include region information
-                region_info = f" [{upset.get('region', '')}]" if 'region' in upset else ""
-                report.append(f"- **{upset['round']}**: ({upset['seed']}) {upset['team']}{region_info}")
-        else:
-            report.append("⚠️ Your bracket doesn't include any of the specific upsets that frequently appear in winning brackets.")
-        
-        if assessment['missing_valuable_upsets']:
-            report.append(f"### Consider adding these valuable upsets for {pool_size}-entry pools:")
-            for upset in assessment['missing_valuable_upsets'][:5]:  # Top 5 recommendations
-                # Include region information
-                region_info = f" [{upset.get('region', '')}]" if 'region' in upset else ""
-                report.append(f"- **{upset['round']}**: ({upset['seed']}) {upset['team']}{region_info}")
-                
-        # General advice
-        report.append("## General Advice")
-        
-        # Add round-specific advice based on analysis
-        advice_points = []
-        
-        if "First Round" in assessment['upset_assessment']:
-            if assessment['upset_assessment']['First Round']['status'] == 'too_many':
-                advice_points.append("- **First Round**: You've selected too many upsets. Historically, winning brackets have fewer first-round upsets than you might expect.")
-            elif assessment['upset_assessment']['First Round']['status'] == 'too_few':
-                advice_points.append("- **First Round**: Consider adding a few more first-round upsets, particularly in the 10-12 seed range.")
-        if "Second Round" in assessment['upset_assessment']:
-            if assessment['upset_assessment']['Second Round']['status'] == 'too_many':
-                advice_points.append("- **Second Round**: You may have too many second-round upsets. Consider keeping more 1-4 seeds advancing to the Sweet 16.")
-        
-        if "Sweet 16" in assessment['upset_assessment'] and "Elite 8" in assessment['upset_assessment']:
-            # Add Sweet 16/Elite 8 advice based on pattern
-            sweet16_count = assessment['upset_assessment']['Sweet 16']['count']
-            elite8_count = assessment['upset_assessment']['Elite 8']['count']
-            
-            if sweet16_count > 4 and elite8_count > 2:
-                advice_points.append("- **Later Rounds**: Your bracket has many upsets in the later rounds. While exciting, this reduces your likelihood of success.")
-        
-        # Final Four advice
-        final_four_picks = assessment['selections'].get('Final Four', [])
-        final_four_seeds = []
-        for team in final_four_picks:
-            team_details = next((t for region_teams in teams.values() for t in region_teams if t["Team"] == team), None)
-            if team_details:
-                final_four_seeds.append(team_details['Seed'])
-        
-        if final_four_seeds and max(final_four_seeds) > 8:
-            advice_points.append("- **Final Four**: Your Final Four includes very high seeds. Historically, at least 2-3 of the Final Four teams are 1-4 seeds.")
-        
-        # Add pool size specific advice
-        pool_size_int = int(input.pool_size())
-        if pool_size_int <= 10:
-            advice_points.append("- **Small Pool Strategy**: In small pools (10 entries or fewer), consider selecting more high seeds since you need fewer surprises to differentiate your bracket.")
-        elif pool_size_int >= 500:
-            advice_points.append("- **Large Pool Strategy**: In very large pools (500+ entries), you may need more strategic upsets and a less common champion pick to stand out.")
+
+def assessment_key(compact_bracket: CompactBracket, bundle: AnalysisBundle) -> tuple:
+    """
+    Cache key for a bracket's assessment: the bracket itself (its picks and decided
+    games fingerprint it exactly), the pool size, the tournament, the analysis data
+    load and the tournament data version.
+    """
+    return (compact_bracket, bundle.pool_size, bundle.tournament, bundle.load_id, get_data_version())
+
+
+def assess_bracket(compact_bracket: CompactBracket, bundle: AnalysisBundle, input) -> Tuple[Dict, str]:
+    """
+    Structured assessment and rendered HTML for a bracket, shared through the process-wide cache.
+    
+    Only finished assessments are cached: results that failed or are still
+    waiting on the pool's win estimate are recomputed on the next request.
+    Never waits for the pool sample, since it runs inside reactive code.
+    
+    Args:
+        compact_bracket: The bracket's picks
+        bundle: Analysis data to compare against
+        input: Shiny input object (for the pool size in the report)
         
-        # Add all advice points
-        report.extend(advice_points)
-            
-        # Join with single newlines for proper Markdown rendering
-        return "\n".join(report)
+    Returns:
+        The analyze_bracket dictionary and the assessment report as HTML
+    """
+    key = assessment_key(compact_bracket, bundle)
+    cached = _assessment_cache.get(key)
+    if cached is not None:
+        return cached
+    
+    try:
+        assessment = analyze_compact_bracket(compact_bracket, bundle, win_estimate_timeout=0)
     except Exception as e:
-        logger.error(f"Error formatting bracket assessment: {str(e)}")
-        return f"Error formatting bracket assessment: {str(e)}"
-
-def server(input, output, session):
-    """Main server function containing all callbacks and reactive logic"""
+        logger.error(f"Error analyzing bracket: {str(e)}")
+        assessment = failed_analysis(str(e))
+    html_content = render_assessment_html(assessment, input)
     
-    # Add reactive effect to update analysis data when pool size changes
-    @reactive.Effect
-    def _update_analysis_data():
-        # Load analysis data based on selected pool size
-        pool_size = input.pool_size()
-        logger.info(f"Updating analysis data for {pool_size} entries pool")
-        load_analysis_data(pool_size)
-    
-    # Initialize with default pool size on startup
-    @reactive.Effect(priority=10)  # Higher priority to run first
-    def _init_data():
-        # Initial load with default pool size
-        load_analysis_data("100")  # Default size
-    
-    # First Round UI Outputs
-    @output
-    @render.ui
-    def east_bracket_round1():
-        return create_round_ui(input, "East", 1, get_round1_matchups("East"))
+    # Results computed after a data refresh started are not stored under the old version
+    if 'error' not in assessment and assessment['win_estimate'] is not None and key[-1] == get_data_version():
+        _assessment_cache.put(key, (assessment, html_content))
+    return assessment, html_content
 
-    @output
-    @render.ui
-    def west_bracket_round1():
-        return create_round_ui(input, "West", 1, get_round1_matchups("West"))
 
-    @output
-    @render.ui
-    def south_bracket_round1():
-        return create_round_ui(input, "South", 1, get_round1_matchups("South"))
+def get_assessment_cache_stats() -> Dict[str, int]:
+    """Hit/miss counters for the rendered assessment cache"""
+    return _assessment_cache.stats()
 
-    @output
-    @render.ui
-    def midwest_bracket_round1():
-        return create_round_ui(input, "Midwest", 1, get_round1_matchups("Midwest"))
 
-    # Second Round UI Outputs
-    @output
-    @render.ui
-    def east_bracket_round2():
-        return create_round_ui(input, "East", 2, get_matchups_for_round(input, "East", 2))
+def _overview_section(pool_size: str, rating: str, score, max_score) -> List[str]:
+    return [
+        f"# Bracket Assessment for {pool_size}-Entry Pool",
+        f"## Overall Rating: {rating} ({score}/{max_score} points)"
+    ]
 
-    @output
-    @render.ui
-    def west_bracket_round2():
-        return create_round_ui(input, "West", 2, get_matchups_for_round(input, "West", 2))
+def _win_chance_section(pool_size: str, win_estimate: Optional[tuple]) -> List[str]:
+    lines = ["## Chance to Win Your Pool"]
+    if win_estimate is None:
+        lines.append("⏳ Simulating pools to estimate your chance of winning...")
+        return lines
+    win_probability, std_error, baseline, complete, sims = win_estimate
+    lines.append(f"**Estimated chance to win**: {win_probability * 100:.1f}% (± {std_error * 100:.1f}%) vs. {baseline * 100:.1f}% for an average entry")
+    if win_probability > baseline:
+        lines.append(f"✅ Your bracket is {win_probability / baseline:.1f}x as likely to win as an average entry.")
+    else:
+        lines.append("⚠️ Your bracket is less likely to win than an average entry.")
+    if not complete:
+        lines.append("❗ Undecided games score no points, so complete your bracket for an accurate estimate.")
+    lines.append(f"*Based on {sims:,} simulated {pool_size}-entry pools.*")
+    return lines
 
-    @output
-    @render.ui
-    def south_bracket_round2():
-        return create_round_ui(input, "South", 2, get_matchups_for_round(input, "South", 2))
+def _probability_section(pool_size: str, log_prob: float, by_round: tuple, winners: Optional[float],
+                         non_winners: Optional[float]) -> List[str]:
+    lines = ["## Bracket Probability"]
+    if log_prob == float('inf'):
+        lines.append("⚠️ Unable to calculate bracket probability. This might be due to incomplete selections.")
+        return lines
+    
+    # Format log probability (it's negative log probability, so lower is better)
+    lines.append(f"**Total Log Probability**: {log_prob:.2f} (lower is more likely)")
+    
+    # Interpret the log probability against winning brackets in simulated pools when
+    # the distributions are available, falling back to fixed cut-offs otherwise
+    if winners is not None:
+        if winners < 0.5:
+            lines.append("✅ Your bracket is at least as plausible as a typical winning bracket.")
+        elif winners < 0.8:
+            lines.append("✓ Your bracket has reasonable probability compared to winning brackets.")
+        elif winners < 0.95:
+            lines.append("⚠️ Your bracket has more unlikely outcomes than most winning brackets.")
+        else:
+            lines.append("❗ Your bracket is less likely than nearly every winning bracket.")
+        non_winners_info = f" and {non_winners:.0%} of non-winning brackets" if non_winners is not None else ""
+        lines.append(f"📊 Less likely than {winners:.0%} of winning brackets{non_winners_info} "
+                     f"in simulated {pool_size}-entry pools.")
+    elif log_prob < 40:
+        lines.append("✅ Your bracket is very plausible based on team ratings.")
+    elif log_prob < 60:
+        lines.append("✓ Your bracket has reasonable probability based on team ratings.")
+    elif log_prob < 80:
+        lines.append("⚠️ Your bracket has some unlikely outcomes based on team ratings.")
+    else:
+        lines.append("❗ Your bracket contains many unlikely outcomes based on team ratings.")
+    
+    # Add round-by-round log probabilities if available
+    if by_round:
+        lines.append("\n**Log Probability by Round:**")
+        for round_name, round_log_prob, round_percentile in by_round:
+            percentile_info = (f" (less likely than {round_percentile:.0%} of winning brackets)"
+                               if round_percentile is not None else "")
+            lines.append(f"- {round_name}: {round_log_prob:.2f}{percentile_info}")
+    return lines
 
-    @output
-    @render.ui
-    def midwest_bracket_round2():
-        return create_round_ui(input, "Midwest", 2, get_matchups_for_round(input, "Midwest", 2))
+def _upset_section(rounds: tuple) -> List[str]:
+    lines = ["## Upset Analysis"]
+    for round_name, details, winners in rounds:
+        if details is None:
+            # Skip or add placeholder for missing rounds
+            if round_name != "Total":  # Don't show message for Total if missing
+                lines.append(f"⚠️ **{round_name}**: No data available")
+            continue
+        count, low, high, status = details
+        status_emoji = "✅" if status == 'good' else "⚠️" if status == 'too_many' else "❗"
+        line = f"{status_emoji} **{round_name}**: {count} upsets "
+        if status == 'good':
+            line += f"(optimal range is {low}-{high})"
+        elif status == 'too_many':
+            line += f"(consider reducing by {count - high} to reach optimal range of {low}-{high})"
+        else:  # too_few
+            line += f"(consider adding {low - count} to reach optimal range of {low}-{high})"
+        if winners is not None:
+            line += f" · more upsets than {winners:.0%} of winning brackets"
+        lines.append(line)
+    return lines
 
-    # Third Round UI Outputs
-    @output
-    @render.ui
-    def east_bracket_round3():
-        return create_round_ui(input, "East", 3, get_matchups_for_round(input, "East", 3))
+def _champion_section(champion: Optional[str], details: Optional[tuple], value, recommendations: tuple) -> List[str]:
+    lines = ["## Champion Selection"]
+    if not champion:
+        lines.append("❗ No champion selected. Please complete your bracket.")
+        return lines
+    if details is None:
+        lines.append(f"Your champion: **{champion}**")
+        return lines
+    
+    seed, region = details
+    region_info = f" [{region}]" if region else ""
+    lines.append(f"Your champion: **({seed}) {champion}{region_info}**")
+    if value > 0:
+        lines.append("✅ Good choice! This champion appears more frequently in winning brackets.")
+    elif value == 0:
+        lines.append("⚠️ Neutral choice. This champion appears equally in winning and non-winning brackets.")
+    else:
+        lines.append("❗ Consider a different champion. This pick appears more frequently in non-winning brackets.")
+        if recommendations:
+            lines.append("Suggested champion alternatives:")
+            for seed, team, region_info in recommendations:
+                lines.append(f"- ({seed}) {team}{region_info}")
+    return lines
 
-    @output
-    @render.ui
-    def west_bracket_round3():
-        return create_round_ui(input, "West", 3, get_matchups_for_round(input, "West", 3))
+def _valuable_upsets_section(pool_size: str, picked: tuple, missing: tuple) -> List[str]:
+    lines = ["## Valuable Upsets"]
+    if picked:
+        lines.append(f"✅ Your bracket includes these valuable upset picks that appear more often in winning brackets in {pool_size}-entry pools:")
+        lines.extend(f"- **{round_name}**: ({seed}) {team}{region_info}" for round_name, seed, team, region_info in picked)
+    else:
+        lines.append("⚠️ Your bracket doesn't include any of the specific upsets that frequently appear in winning brackets.")
+    if missing:
+        lines.append(f"### Consider adding these valuable upsets for {pool_size}-entry pools:")
+        lines.extend(f"- **{round_name}**: ({seed}) {team}{region_info}" for round_name, seed, team, region_info in missing)
+    return lines
 
-    @output
-    @render.ui
-    def south_bracket_round3():
-        return create_round_ui(input, "South", 3, get_matchups_for_round(input, "South", 3))
+def _advice_section(pool_size: str, first_round: Optional[str], second_round: Optional[str],
+                    later_rounds: Optional[tuple], final_four_seed: Optional[int]) -> List[str]:
+    lines = ["## General Advice"]
+    
+    # Add round-specific advice based on analysis
+    if first_round == 'too_many':
+        lines.append("- **First Round**: You've selected too many upsets. Historically, winning brackets have fewer first-round upsets than you might expect.")
+    elif first_round == 'too_few':
+        lines.append("- **First Round**: Consider adding a few more first-round upsets, particularly in the 10-12 seed range.")
+    if second_round == 'too_many':
+        lines.append("- **Second Round**: You may have too many second-round upsets. Consider keeping more 1-4 seeds advancing to the Sweet 16.")
+    if later_rounds is not None:
+        # Add Sweet 16/Elite 8 advice based on pattern
+        sweet16_count, elite8_count = later_rounds
+        if sweet16_count > 4 and elite8_count > 2:
+            lines.append("- **Later Rounds**: Your bracket has many upsets in the later rounds. While exciting, this reduces your likelihood of success.")
+    
+    # Final Four advice
+    if final_four_seed is not None and final_four_seed > 8:
+        lines.append("- **Final Four**: Your Final Four includes very high seeds. Historically, at least 2-3 of the Final Four teams are 1-4 seeds.")
+    
+    # Add pool size specific advice
+    pool_size_int = int(pool_size)
+    if pool_size_int <= 10:
+        lines.append("- **Small Pool Strategy**: In small pools (10 entries or fewer), consider selecting more high seeds since you need fewer surprises to differentiate your bracket.")
+    elif pool_size_int >= 500:
+        lines.append("- **Large Pool Strategy**: In very large pools (500+ entries), you may need more strategic upsets and a less common champion pick to stand out.")
+    return lines
 
-    @output
-    @render.ui
-    def midwest_bracket_round3():
-        return create_round_ui(input, "Midwest", 3, get_matchups_for_round(input, "Midwest", 3))
+def _upset_details(details: Optional[Dict]) -> Optional[tuple]:
+    """Hashable (count, min, max, status) for one round of the upset assessment"""
+    return (details['count'], details['min'], details['max'], details['status']) if details else None
 
-    # Fourth Round UI Outputs
-    @output
-    @render.ui
-    def east_bracket_round4():
-        return create_round_ui(input, "East", 4, get_matchups_for_round(input, "East", 4))
+def _upset_rows(upsets: List[Dict]) -> tuple:
+    """Hashable (round, seed, team, region suffix) rows for a list of upset picks"""
+    return tuple((upset['round'], upset['seed'], upset['team'], f" [{upset.get('region', '')}]" if 'region' in upset else "")
+                 for upset in upsets)
 
-    @output
-    @render.ui
-    def west_bracket_round4():
-        return create_round_ui(input, "West", 4, get_matchups_for_round(input, "West", 4))
+def assessment_sections(assessment: Dict, pool_size: str, tournament: TournamentIndex) -> List[Tuple[Callable[..., List[str]], tuple]]:
+    """
+    Split a bracket assessment into its report sections.
+    
+    Each section is a function of a few hashable inputs drawn from the
+    assessment, so a section's rendering can be reused whenever those inputs
+    repeat, however much the rest of the bracket changed.
+    
+    Args:
+        assessment: Result of analyze_bracket (without an 'error' key)
+        pool_size: Canonical pool size string
+        tournament: Tournament index for champion and Final Four seeds
+        
+    Returns:
+        (section function, inputs) pairs in report order
+    """
+    rating = assessment['bracket_rating']
+    win_estimate = assessment.get('win_estimate')
+    if win_estimate is not None:
+        win_estimate = (win_estimate['win_probability'], win_estimate['std_error'], win_estimate['baseline'],
+                        win_estimate['complete'], win_estimate['sims'])
+    
+    percentiles = assessment.get('percentiles', {})
+    log_prob_percentiles = percentiles.get('log_probability', {})
+    overall = log_prob_percentiles.get('Overall', {})
+    by_round = tuple((round_name, round_log_prob, log_prob_percentiles.get(round_name, {}).get('winners'))
+                     for round_name, round_log_prob in sorted(assessment.get('log_probability_by_round', {}).items(),
+                                                              key=lambda x: _ROUND_ORDER.index(x[0]) if x[0] in _ROUND_ORDER else 99))
+    
+    upset_assessment = assessment['upset_assessment']
+    upset_percentiles = percentiles.get('upsets', {})
+    upset_rounds = tuple(
+        (round_name,
+         _upset_details(upset_assessment.get(round_name)),
+         upset_percentiles.get("Total Upsets" if round_name == "Total" else round_name, {}).get('winners'))
+        for round_name in _ROUND_ORDER + ["Total"]
+    )
+    
+    champion_assessment = assessment['champion_assessment']
+    champion = champion_assessment['champion']
+    champion_details = tournament.get(champion) if champion else None
+    recommendations = tuple((champ['seed'], champ['team'], f" [{champ.get('region', '')}]" if 'region' in champ else "")
+                            for champ in champion_assessment['recommendation'] or [])
+    
+    final_four_seeds = [tournament.seed_of[team] for team in assessment['selections'].get('Final Four', [])
+                        if team in tournament.seed_of]
+    later_rounds = ((upset_assessment['Sweet 16']['count'], upset_assessment['Elite 8']['count'])
+                    if "Sweet 16" in upset_assessment and "Elite 8" in upset_assessment else None)
+    
+    return [
+        (_overview_section, (pool_size, rating['rating'], rating['score'], rating['max_score'])),
+        (_win_chance_section, (pool_size, win_estimate)),
+        (_probability_section, (pool_size, assessment.get('log_probability', float('inf')), by_round,
+                                overall.get('winners'), overall.get('non_winners'))),
+        (_upset_section, (upset_rounds,)),
+        (_champion_section, (champion,
+                             (champion_details.seed, champion_details.region) if champion_details else None,
+                             champion_assessment['value'], recommendations)),
+        (_valuable_upsets_section, (pool_size,
+                                    _upset_rows(sorted(assessment['specific_upsets'], key=lambda x: x['advantage'], reverse=True)),
+                                    _upset_rows(assessment['missing_valuable_upsets'][:5]))),  # Top 5 recommendations
+        (_advice_section, (pool_size,
+                           upset_assessment.get('First Round', {}).get('status'),
+                           upset_assessment.get('Second Round', {}).get('status'),
+                           later_rounds,
+                           max(final_four_seeds) if final_four_seeds else None))
+    ]
 
-    @output
-    @render.ui
-    def south_bracket_round4():
-        return create_round_ui(input, "South", 4, get_matchups_for_round(input, "South", 4))
+def format_bracket_assessment(assessment: Dict, input) -> str:
+    """Format bracket assessment into a readable text report"""
+    try:
+        if 'error' in assessment:
+            return f"Error analyzing bracket: {assessment['error']}"
+        
+        sections = assessment_sections(assessment, get_pool_size(input), get_tournament_index())
+        
+        # Join with single newlines for proper Markdown rendering
+        return "\n".join(line for section, inputs in sections for line in section(*inputs))
+    except Exception as e:
+        logger.error(f"Error formatting bracket assessment: {str(e)}")
+        return f"Error formatting bracket assessment: {str(e)}"
 
-    @output
-    @render.ui
-    def midwest_bracket_round4():
-        return create_round_ui(input, "Midwest", 4, get_matchups_for_round(input, "Midwest", 4))
+def render_assessment_html(assessment: Dict, input) -> str:
+    """
+    HTML of the bracket assessment report, rendering only the sections whose inputs are new.
+    
+    Every section starts with its own heading, so the report's HTML is the
+    sections' HTML joined together (identical to rendering the whole
+    format_bracket_assessment text at once). Rendered sections are shared
+    across brackets and sessions through the section cache.
+    """
+    if 'error' in assessment:
+        return markdown(format_bracket_assessment(assessment, input))
+    try:
+        sections = assessment_sections(assessment, get_pool_size(input), get_tournament_index())
+        return "\n".join(_section_cache.get_or_create((section.__name__, inputs),
+                                                      lambda section=section, inputs=inputs: markdown("\n".join(section(*inputs))))
+                         for section, inputs in sections)
+    except Exception as e:
+        logger.error(f"Error formatting bracket assessment: {str(e)}")
+        return markdown(f"Error formatting bracket assessment: {str(e)}")
+
+def format_stream_estimate(estimate: Dict) -> str:
+    """Format the running estimates of a live simulation into a readable text report"""
+    state_text = {
+        'queued': "⏳ Waiting for other simulations to finish...",
+        'running': "⏳ Simulating...",
+        'stopped': "⏹ Stopped.",
+        'done': "✅ Finished.",
+        'error': f"❗ Simulation failed: {estimate['error']}"
+    }[estimate['state']]
+    report = [
+        f"{state_text} {estimate['pools']:,} of {estimate['max_pools']:,} pools and "
+        f"{estimate['sims']:,} of {estimate['max_sims']:,} tournaments in {estimate['elapsed']:.1f}s",
+        "*Ranges are 95% confidence intervals and narrow as more batches finish.*"
+    ]
+    
+    win = estimate['win']
+    if win is not None:
+        report.append("### Chance to Win Your Pool")
+        report.append(f"**{win['estimate'] * 100:.2f}%** ({max(win['low'], 0) * 100:.2f}% to {win['high'] * 100:.2f}%) "
+                      f"vs. {win['baseline'] * 100:.2f}% for an average entry")
+    
+    upsets = estimate['upsets']
+    if upsets is not None:
+        report.append("### Upsets in Winning Brackets")
+        for round_name, upset_estimate in upsets.items():
+            winning_mean = upset_estimate['winning_mean']
+            report.append(f"- **{round_name}**: best count {upset_estimate['optimal']}, winners average "
+                          f"{winning_mean['estimate']:.1f} ({winning_mean['low']:.1f} to {winning_mean['high']:.1f})")
+    
+    champions = estimate['champions']
+    if champions is not None:
+        report.append("### Champion Advantage (freq_diff)")
+        pick = champions['pick']
+        if pick is not None:
+            report.append(f"Your champion **({pick['seed']}) {pick['team']}**: {pick['estimate']:+.3f} "
+                          f"({pick['low']:+.3f} to {pick['high']:+.3f})")
+        for champ in champions['top']:
+            report.append(f"- ({champ['seed']}) {champ['team']}: {champ['estimate']:+.3f} "
+                          f"({champ['low']:+.3f} to {champ['high']:+.3f})")
+    
+    return "\n".join(report)
 
+def format_optimization(result: Dict, current_slots: List[Optional[int]]) -> str:
+    """Format an optimizer result into a readable list of suggested pick changes"""
+    if 'error' in result:
+        if result.get('failed'):
+            return f"❗ {result['error']}"
+        return f"⏳ {result['error']}. Try again in a few seconds."
+    
+    tournament = get_tournament_index()
+    start, optimized = result['start'], result['optimized']
+    report = [
+        f"**Chance to win a {result['pool_size']}-entry pool**: {start['win_probability'] * 100:.1f}% → "
+        f"**{optimized['win_probability'] * 100:.1f}%** (average entry {optimized['baseline'] * 100:.1f}%)",
+        f"*Searched {result['steps']:,} steps in {result['elapsed']:.1f}s against {optimized['sims']:,} simulated pools, "
+        "so the optimized figure is somewhat optimistic.*"
+    ]
+    
+    if not result['changed_games']:
+        report.append("✅ No single change improves your bracket. It is already a local optimum.")
+        return "\n".join(report)
+    
+    report.append("### Suggested changes")
+    for index in result['changed_games']:
+        region = GAME_IDS[index].split("_")[0].title()
+        region_info = f"{region} " if region != "Final" else ""
+        old_slot, new_slot = current_slots[index], result['winner_slots'][index]
+        old_pick = f"({tournament.records[old_slot].seed}) {tournament.names[old_slot]}" if old_slot is not None else "undecided"
+        new_team = tournament.records[new_slot]
+        report.append(f"- **{region_info}{ROUND_NAMES[GAME_ROUNDS[index]]}**: {old_pick} → ({new_team.seed}) {new_team.name}")
+    return "\n".join(report)
+
+def server(input, output, session):
+    """Main server function containing all callbacks and reactive logic"""
+    
+    # Each session only holds a reference to the shared bundle for its pool size,
+    # so switching pool sizes is a cache lookup rather than a disk read. Uncached
+    # bundles are read, and sizes without analysis data simulated, in the background
+    # (None until they are ready, checked again without ever blocking the session).
+    # A failed generation comes back as an error message, checked again once it is retried.
+    @reactive.Calc
+    def analysis_bundle() -> Tuple[Optional[AnalysisBundle], Optional[str]]:
+        try:
+            bundle = get_any_analysis_bundle(get_pool_size(input), timeout=0)
+        except Exception as e:
+            logger.error(f"Error preparing pool analysis: {str(e)}")
+            reactive.invalidate_later(GENERATION_RETRY_SECONDS)
+            return None, str(e)
+        if bundle is None:
+            reactive.invalidate_later(PENDING_RETRY_SECONDS)
+        return bundle, None
+    
+    # Warm the cache for the other pool sizes in the background
+    prefetch_analysis_bundles()
+    prefetch_pool_samples()
+    
+    # Notice when the background refresher swaps in new tournament data
+    @reactive.poll(get_data_version, DATA_VERSION_POLL_SECONDS)
+    def data_version() -> int:
+        return get_data_version()
+    
+    # Which tab is showing: outputs on hidden tabs skip their updates and catch up in one
+    # pass when their tab is shown again (the tabs are layered, so Shiny sees them all as visible)
+    tab_visible = {tab: reactive.Value(tab == DEFAULT_TAB) for tab in TABS}
+    
+    @reactive.Effect(priority=30)
+    def _track_tab():
+        try:
+            active_tab = input.active_tab()
+        except SilentException:
+            active_tab = DEFAULT_TAB
+        for tab, visible in tab_visible.items():
+            visible.set(tab == active_tab)
+    
+    # Session-scoped bracket state, updated one pick at a time from the radio button inputs
+    state = BracketState(get_tournament_index())
+    matchup_values = [reactive.Value(state.matchup(index)) for index in range(NUM_GAMES)]
+    
+    # The session's picks (including defaults the client has not echoed back yet), and the
+    # same picks once they have stopped changing, which is what the assessment follows
+    bracket_value = reactive.Value(state.to_compact())
+    settled_bracket = reactive.Value(state.to_compact())
+    last_pick_change = [time.monotonic()]
+    
+    # When the refresher swaps in new tournament data, the state is re-bound to the new index. Picks
+    # are team slots, which the bracket layout fixes, so they carry over as they are, and every game
+    # is rendered again with the new names, ratings and advancement odds
+    table_version = reactive.Value(state.table.version)
+    
+    @reactive.Effect(priority=40)
+    def _rebind_tournament():
+        data_version()
+        table = get_tournament_index()
+        if table is state.table:
+            return
+        state.table = table
+        table_version.set(table.version)
+    
+    def publish_picks(changed: List[int]):
+        """Push a state change to the games whose matchups changed and to the session's bracket"""
+        for changed_index in changed:
+            matchup_values[changed_index].set(state.matchup(changed_index))
+        compact_bracket = state.to_compact()
+        with reactive.isolate():
+            # Read without a dependency, or every pick effect would rerun on every change
+            previous = bracket_value.get()
+        if compact_bracket != previous:
+            bracket_value.set(compact_bracket)
+            last_pick_change[0] = time.monotonic()
+    
+    def sync_pick(index: int):
+        """Create an effect that applies a single game's input to the bracket state"""
+        game_id = GAME_IDS[index]
+        
+        # A pick resolves its whole cascade here: downstream defaults are set in the state and
+        # pushed in this flush, so the client's echoes of them match the state and change nothing
+        @reactive.Effect(priority=20)
+        def _sync_pick():
+            winner_name = get_game_winner(input, game_id)
+            publish_picks(state.apply_pick(index, winner_name))
+            # The radio buttons show the pick the user just made
+            if shown_games[index] is not None and winner_name is not None and winner_name == state.winner_name(index):
+                shown_games[index] = (state.matchup(index), state.winners[index])
+    
+    for index in range(NUM_GAMES):
+        sync_pick(index)
+    
+    @reactive.Effect
+    def _settle_bracket():
+        compact_bracket = bracket_value()
+        remaining = last_pick_change[0] + ASSESSMENT_SETTLE_SECONDS - time.monotonic()
+        if remaining > 0:
+            reactive.invalidate_later(remaining)
+            return
+        settled_bracket.set(compact_bracket)
+    
+    # Each game is its own output. A game is rendered once its matchup is first known and
+    # later matchup changes are pushed to the existing radio buttons, so a pick only
+    # touches the games downstream of it instead of re-rendering whole rounds. Games on
+    # hidden tabs wait: the state already holds their picks, and they are rendered or
+    # updated from it when their tab is shown. shown_games holds the (matchup, pick) each
+    # game's radio buttons display, so a pick the state changed behind them is pushed even
+    # when the matchup ends up the same as before.
+    ready_values = [reactive.Value(None not in state.matchup(index)) for index in range(NUM_GAMES)]
+    shown_games = [None] * NUM_GAMES
+    
+    def game_output(index: int):
+        """Register the output and in-place updater for a single game"""
+        game_id = GAME_IDS[index]
+        
+        @output(id=f"{game_id}_ui")
+        @render.ui
+        def _game_ui():
+            table_version()
+            if ready_values[index]():
+                shown_games[index] = (state.matchup(index), state.winners[index])
+            return create_game_ui(state, index)
+        
+        if index < 32:
+            return  # First round matchups never change
+        
+        @reactive.Effect(priority=-10)
+        def _update_game():
+            matchup = matchup_values[index]()
+            if None in matchup or not tab_visible[_GAME_TABS[index]]():
+                return
+            with reactive.isolate():
+                ready = ready_values[index]()
+            if not ready:
+                # First complete matchup: render the radio buttons from scratch
+                ready_values[index].set(True)
+                return
+            current = (matchup, state.winners[index])
+            if shown_games[index] in (None, current):
+                return
+            choices, selected = get_game_choices(state, index)
+            ui.update_radio_buttons(game_id, choices=choices, selected=selected)
+            shown_games[index] = current
+    
+    for index in range(NUM_GAMES):
+        game_output(index)
+    
+    # Live simulation: batches run on a background thread and the session picks up
+    # the latest estimates on a timer, so the event loop never waits on the simulation
+    stream_run = reactive.Value(None)
+    
+    def stop_stream():
+        # Also runs from session.on_ended, outside any reactive context
+        with reactive.isolate():
+            run = stream_run.get()
+        if run is not None:
+            run.stop()
+    
+    session.on_ended(stop_stream)
+    
+    @reactive.Effect
+    @reactive.event(input.stream_start)
+    def _start_stream():
+        stop_stream()
+        stream_run.set(ProgressiveRun(get_tournament_model(), int(get_pool_size(input))).start())
+    
+    @reactive.Effect
+    @reactive.event(input.stream_stop, input.pool_size)
+    def _stop_stream():
+        stop_stream()
+    
     @output
     @render.ui
-    def final_four_games():
-        return create_round_ui(input, "final", 5, get_final_four_matchups(input))
-
+    def stream_results():
+        if not tab_visible["assessment"]():
+            req(False, cancel_output=True)
+        run = stream_run()
+        if run is None:
+            return ui.p("Start a live simulation to refine these estimates for your bracket.", class_="text-muted")
+        if not run.finished:
+            reactive.invalidate_later(STREAM_REFRESH_SECONDS)
+        
+        compact_bracket = bracket_value()
+        champion_slot = compact_bracket.winner_slots()[-1]
+        champion = get_tournament_index().names[champion_slot] if champion_slot is not None else None
+        try:
+            estimate = run.estimate(compact_bracket.winner_slots(), champion)
+            return ui.HTML(markdown(format_stream_estimate(estimate)))
+        except Exception as e:
+            logger.error(f"Error in live simulation estimates: {str(e)}", exc_info=True)
+            return ui.p(f"Error showing live simulation: {str(e)}", class_="text-danger")
+    
+    # Optimizer: searches on the optimizer executor and the session polls for the result on a
+    # timer (never awaiting it, which would hold the reactive lock shared by every session),
+    # then suggested picks can be applied in one go
+    optimize_run = reactive.Value(None)
+    optimize_result = reactive.Value(None)
+    
+    @reactive.Effect
+    @reactive.event(input.optimize_start)
+    def _optimize():
+        if optimize_run.get() is not None:
+            return  # A search is already running for this session
+        winner_slots = bracket_value.get().winner_slots()
+        pool_size = int(get_pool_size(input))
+        optimize_result.set(None)
+        optimize_run.set((request_optimization(winner_slots, pool_size), pool_size, winner_slots))
+    
+    @reactive.Effect
+    def _collect_optimization():
+        run = optimize_run()
+        if run is None:
+            return
+        future, pool_size, winner_slots = run
+        if not future.done():
+            reactive.invalidate_later(PENDING_RETRY_SECONDS)
+            return
+        optimize_run.set(None)
+        optimize_result.set({**future.result(), 'pool_size': pool_size, 'from_slots': winner_slots})
+    
+    @reactive.Effect
+    @reactive.event(input.optimize_apply)
+    def _apply_optimized():
+        result = optimize_result.get()
+        if result is None or 'winner_slots' not in result:
+            return
+        slots = result['winner_slots']
+        
+        # Apply picks in game order so each game's feeders are already set
+        changed_picks = []
+        for index in range(NUM_GAMES):
+            if state.winners[index] == slots[index]:
+                continue
+            publish_picks(state.set_pick(index, state.table.names[slots[index]]))
+            changed_picks.append(index)
+        
+        # Push the new picks to the radio buttons already on the page (games rendered later start from the state)
+        for index in changed_picks:
+            if index >= 32 and not ready_values[index].get():
+                continue
+            choices, selected = get_game_choices(state, index)
+            ui.update_radio_buttons(GAME_IDS[index], choices=choices, selected=selected)
+            shown_games[index] = (state.matchup(index), state.winners[index])
+        optimize_result.set(None)
+    
     @output
     @render.ui
-    def championship_game():
-        return create_round_ui(input, "final", 6, get_championship_matchup(input))
-
+    def optimize_results():
+        if optimize_run() is not None:
+            return ui.p(f"⏳ Searching for better picks (about {OPTIMIZE_BUDGET_SECONDS:g} seconds)...", class_="text-muted")
+        result = optimize_result()
+        if result is None:
+            return ui.p(f"Search for the picks most likely to win your pool, starting from your bracket "
+                        f"(takes about {OPTIMIZE_BUDGET_SECONDS:g} seconds).", class_="text-muted")
+        return ui.div(
+            ui.HTML(markdown(format_optimization(result, result['from_slots']))),
+            ui.input_action_button("optimize_apply", "Apply suggested picks", class_="btn-success btn-sm")
+            if result.get('changed_games') else None
+        )
+    
     # Bracket Assessment Output
     @output
     @render.ui
     def assessment_results():
-        # Track changes in bracket selections
-        bracket_selections = []
-        for region in ["east", "west", "south", "midwest"]:
-            # First round (8 games)
-            for i in range(8):
-                game_id = f"{region}_round1_game_{i}"
-                try:
-                    winner = input[game_id]()
-                    if winner:
-                        bracket_selections.append(f"{game_id}:{winner}")
-                except:
-                    pass
-                    
-            # Second round (4 games)
-            for i in range(4):
-                game_id = f"{region}_round2_game_{i}"
-                try:
-                    winner = input[game_id]()
-                    if winner:
-                        bracket_selections.append(f"{game_id}:{winner}")
-                except:
-                    pass
-            
-            # Sweet 16 (2 games)
-            for i in range(2):
-                game_id = f"{region}_round3_game_{i}"
-                try:
-                    winner = input[game_id]()
-                    if winner:
-                        bracket_selections.append(f"{game_id}:{winner}")
-                except:
-                    pass
-            
-            # Elite 8 (1 game)
-            game_id = f"{region}_round4_game_0"
-            try:
-                winner = input[game_id]()
-                if winner:
-                    bracket_selections.append(f"{game_id}:{winner}")
-            except:
-                pass
+        # Only kept up to date while the assessment tab is showing (it catches up when shown)
+        if not tab_visible["assessment"]():
+            req(False, cancel_output=True)
         
-        # Final Four (2 games)
-        for i in range(2):
-            game_id = f"final_round5_game_{i}"
-            try:
-                winner = input[game_id]()
-                if winner:
-                    bracket_selections.append(f"{game_id}:{winner}")
-            except:
-                pass
+        # Follow the session's picks once they settle rather than every radio button input
+        compact_bracket = settled_bracket()
         
-        # Championship (1 game)
-        game_id = "final_round6_game_0"
-        try:
-            winner = input[game_id]()
-            if winner:
-                bracket_selections.append(f"{game_id}:{winner}")
-        except:
-            pass
-        
-        # Also use trigger from tab switch or pool size change
-        try:
-            input.__forceAssessmentUpdate__
-        except:
-            pass
-        
-        # React to pool size changes
-        pool_size = input.pool_size()
+        # React to pool size changes and tournament data refreshes
+        pool_size = get_pool_size(input)
+        data_version()
             
         # Check if we have any selections
-        if not bracket_selections:
+        if not compact_bracket.mask:
             return ui.div(
                 ui.p("Please make your bracket selections in the region tabs, then return here for an assessment.", 
                     class_="text-center text-muted mt-4")
             )
         
-        # Process the assessment as before
+        bundle, error = analysis_bundle()
+        if error is not None:
+            return ui.p(f"Could not prepare the {pool_size}-entry pool analysis ({error}). "
+                        f"Trying again in {GENERATION_RETRY_SECONDS} seconds.", class_="text-danger")
+        if bundle is None:
+            return ui.div(
+                ui.p(f"Preparing the {pool_size}-entry pool analysis. Your assessment will appear in a few seconds.",
+                    class_="text-center text-muted mt-4")
+            )
+        
+        # Serve the assessment from the process-wide cache, computing it on a miss
         try:
-            assessment = analyze_bracket(input)
-            assessment_text = format_bracket_assessment(assessment, input)  # Pass input to get pool size
-            html_content = markdown(assessment_text)
+            assessment, html_content = assess_bracket(compact_bracket, bundle, input)
+            if 'error' not in assessment and assessment['win_estimate'] is None:
+                reactive.invalidate_later(PENDING_RETRY_SECONDS)
             return ui.HTML(html_content)
         except Exception as e:
             logger.error(f"Error in bracket assessment: {str(e)}", exc_info=True)
@@ -0,0 +1,1420 @@
+#!/usr/bin/env python
+# -*-coding:utf-8 -*-
+'''
+@File    :   simulator.py
+@Time    :   2026/10/17
+@Author  :   Taylor Firman
+@Version :   1.0
+@Contact :   tefirman@gmail.com
+@Desc    :   Vectorized Monte Carlo pool simulator for March Madness bracket app
+'''
+
+import argparse
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from dataclasses import dataclass
+from datetime import datetime
+from functools import cached_property
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from scipy.stats import ttest_ind
+
+from analysis import (GENERATED_DIR, GENERATED_POOL_LIMIT, POOL_SIZES, AnalysisBundle, clear_analysis_cache,
+                      get_analysis_bundle, get_analysis_dir, get_generated_dir, has_analysis_data, normalize_pool_size,
+                      request_analysis_load)
+from cache import LRUCache
+from compact_bracket import (GAME_ROUNDS, NUM_GAMES, NUM_SLOTS, ROUND_NAMES, ROUND_OFFSETS,
+                             log_probabilities_by_round)
+from data import (TOURNAMENT, TournamentIndex, get_data_version, get_tournament_file, get_tournament_index,
+                  load_tournament_teams)
+from snapshot import CSV_TABLES, DISTRIBUTION_FILES, TEXT_FILES, ensure_snapshot, find_pool_dirs
+
+logger = logging.getLogger(__name__)
+
+ROUND_ORDER = [ROUND_NAMES[round_num] for round_num in range(1, 7)]
+
+# Points per correct pick in each round (same as bigdance's Pool.score_bracket)
+ROUND_VALUES = {
+    "First Round": 1,
+    "Second Round": 2,
+    "Sweet 16": 4,
+    "Elite 8": 8,
+    "Final Four": 16,
+    "Championship": 32
+}
+
+# Highest seed still expected to win a game in each round (same as bigdance's Bracket.is_underdog)
+UNDERDOG_SEEDS = {
+    "First Round": 8,
+    "Second Round": 4,
+    "Sweet 16": 2,
+    "Elite 8": 1,
+    "Final Four": 1,
+    "Championship": 1
+}
+
+# Pool setup used to generate the shipped analysis data (bigdance's BracketAnalysis.simulate_pools)
+ACTUAL_UPSET_FACTOR = 0.25
+ENTRY_UPSET_SD = 0.3
+SIMS_PER_POOL = 1000
+DEFAULT_NUM_POOLS = 200
+
+# Upper bound on brackets simulated and scored in one batch, which keeps peak memory around a few hundred MB
+MAX_BATCH_BRACKETS = 200_000
+
+# Brackets advanced through the rounds together, small enough for the working arrays to stay in cache
+SIM_CHUNK_BRACKETS = 16_384
+
+# Most distinct upset factors given their own probability table (16 KB each)
+MAX_FACTOR_TABLES = 1024
+
+# Win estimates: tournaments per cached pool sample, a cap on opponent brackets that bounds
+# the build time for large pools, and how long an assessment waits for a sample being built
+WIN_ESTIMATE_SIMS = 2000
+MIN_WIN_ESTIMATE_SIMS = 200
+MAX_SAMPLE_BRACKETS = 300_000
+WIN_ESTIMATE_BUDGET_SECONDS = 0.25
+POOL_SAMPLE_CACHE_SIZE = 8
+POOL_SAMPLE_SEED = 2026
+
+# Most pick combinations scored by one lookup when win estimates are vectorized over many brackets
+SCORE_BLOCK_ROWS = 256
+
+# On-demand generation for pool sizes without analysis data: a bracket budget that bounds the
+# first request for a new size to a few seconds, and the floors on tournaments and pools within it
+ON_DEMAND_BRACKETS = 4_000_000
+MIN_ON_DEMAND_SIMS = 50
+MIN_ON_DEMAND_POOLS = 20
+
+# How long a failed on-demand generation is reported to callers before a request starts a new attempt
+GENERATION_RETRY_SECONDS = 30
+
+# Pools per shard of a parallel run. Shards (and their seeds) depend only on this and the number of
+# pools, never on the number of workers, so a seeded run gives identical results on any machine
+SHARD_POOLS = 10
+DEFAULT_WORKERS = os.cpu_count() or 1
+
+# Settings of the run that produced a pool directory's analysis files
+SIMULATION_FILE = 'simulation.json'
+
+# Where the command line writes analysis data unless asked to install it into the app's directory
+SIMULATED_DIR = Path('simulated_analysis')
+
+# Age after which a leftover staging directory (from an interrupted write) is removed
+STALE_STAGING_SECONDS = 3600
+
+# Rounds plotted in the upset distributions (later rounds have too few games for a useful histogram)
+UPSET_HISTOGRAM_ROUNDS = {"First Round": 32, "Second Round": 16, "Sweet 16": 8, "Elite 8": 4}
+
+_ROUND_STARTS = np.array([ROUND_OFFSETS[round_num] for round_num in range(1, 7)])
+_GAME_POINTS = np.array([ROUND_VALUES[ROUND_NAMES[round_num]] for round_num in GAME_ROUNDS], dtype=np.int16)
+_GAME_UNDERDOG_SEEDS = np.array([UNDERDOG_SEEDS[ROUND_NAMES[round_num]] for round_num in GAME_ROUNDS])
+_FIRST_ROUND_TEAMS = np.arange(NUM_SLOTS, dtype=np.int16).reshape(-1, 2)
+
+
+def _build_score_blocks() -> List[Tuple[np.ndarray, np.ndarray, int, np.ndarray]]:
+    """
+    Consecutive games of each round scored together by PoolSample.win_probabilities.
+
+    A game in round r can only be won by the 2^r teams of its subtree (a
+    contiguous block of slots), so each pick is one of 2^r + 1 options
+    counting undecided. Games are grouped so each block has at most
+    SCORE_BLOCK_ROWS combinations of options.
+
+    Returns:
+        (games, first slot of each game's subtree, options per game, stride of each game's option) per block
+    """
+    blocks = []
+    for round_num in range(1, 7):
+        teams = 2 ** round_num
+        options = teams + 1
+        games_per_block = 1
+        while options ** (games_per_block + 1) <= SCORE_BLOCK_ROWS:
+            games_per_block += 1
+        for start in range(ROUND_OFFSETS[round_num], ROUND_OFFSETS[round_num + 1], games_per_block):
+            games = np.arange(start, min(start + games_per_block, ROUND_OFFSETS[round_num + 1]))
+            blocks.append((games, (games - ROUND_OFFSETS[round_num]) * teams, options,
+                           options ** np.arange(len(games))))
+    return blocks
+
+
+_SCORE_BLOCKS = _build_score_blocks()
+
+
+class TournamentModel:
+    """
+    Array view of a tournament for vectorized simulation.
+
+    All arrays are indexed by team slot, so a matchup between slots a and b
+    is looked up at [a, b] (or a * 64 + b in the flattened tables).
+    """
+
+    def __init__(self, index: TournamentIndex, tournament: str = TOURNAMENT):
+        self.tournament = tournament
+        self.index = index
+        self.seeds = np.array([record.seed for record in index.records], dtype=np.int16)
+        self.ratings = np.array([record.rating for record in index.records], dtype=np.float64)
+
+        # Elo probability that the row team beats the column team (shared with the index)
+        self.win_prob = index.win_prob
+        rating_diff = self.ratings[:, None] - self.ratings[None, :]
+
+        # The favorite is the better seed, or the higher rated team between equal seeds
+        # (the second team on a rating tie), matching bigdance's Bracket.simulate_game
+        seed_diff = self.seeds[:, None] - self.seeds[None, :]
+        self.first_is_favorite = (seed_diff < 0) | ((seed_diff == 0) & (rating_diff > 0))
+        self.favorite_prob = np.where(self.first_is_favorite, self.win_prob, self.win_prob.T)
+
+    def game_probabilities(self, upset_factors: np.ndarray) -> np.ndarray:
+        """
+        Probability that the first team wins each possible matchup, for each upset factor.
+
+        A positive upset factor pulls the favorite's Elo probability toward 50%
+        and a negative one toward 100%, as in bigdance's Bracket.simulate_game.
+
+        Args:
+            upset_factors: Upset factors (clipped to [-1, 1])
+
+        Returns:
+            Array of shape (len(upset_factors), 64, 64) indexed by [factor, first slot, second slot]
+        """
+        factors = np.clip(np.asarray(upset_factors, dtype=np.float64), -1.0, 1.0)[:, None, None]
+        weight = np.abs(factors)
+        favorite_prob = self.favorite_prob * (1 - weight) + np.where(factors < 0, 1.0, 0.5) * weight
+        return np.where(self.first_is_favorite, favorite_prob, 1 - favorite_prob)
+
+
+def get_tournament_model(tournament: str = TOURNAMENT) -> TournamentModel:
+    """Model of the current tournament data (read from local files for the other tournament)"""
+    if tournament == TOURNAMENT:
+        index = get_tournament_index()
+    else:
+        index = TournamentIndex(load_tournament_teams(tournament))
+    return TournamentModel(index, tournament)
+
+
+def advancement_probabilities(model: TournamentModel, upset_factor: float = ACTUAL_UPSET_FACTOR) -> np.ndarray:
+    """
+    Exact probability that each team wins its game in each round.
+
+    A bottom-up pass over the bracket tree: a team wins a game if it reaches
+    it and beats whichever team comes out of the other half of the subtree,
+    weighted by how likely each of those teams is to get there. Games use the
+    same probabilities as simulate_brackets, so this is the limit of the
+    advancement frequencies of simulated brackets, at O(64^2) cost.
+
+    Args:
+        model: Tournament to evaluate
+        upset_factor: Upset factor of every game (the actual tournament's by default)
+
+    Returns:
+        Array of shape (64, 6) indexed by [slot, round - 1]
+    """
+    first_prob = model.game_probabilities(np.array([upset_factor]))[0]
+    reach = np.ones(NUM_SLOTS)
+    advancement = np.empty((NUM_SLOTS, 6))
+    for round_num in range(1, 7):
+        half = 2 ** (round_num - 1)
+        wins = np.empty(NUM_SLOTS)
+        for start in range(0, NUM_SLOTS, 2 * half):
+            first, second = slice(start, start + half), slice(start + half, start + 2 * half)
+            matchup_prob = first_prob[first, second]
+            wins[first] = reach[first] * (matchup_prob @ reach[second])
+            wins[second] = reach[second] * ((1 - matchup_prob).T @ reach[first])
+        advancement[:, round_num - 1] = wins
+        reach = wins
+    return advancement
+
+
+def simulate_brackets(model: TournamentModel, upset_factors: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+    """
+    Simulate one full bracket per upset factor.
+
+    Game probabilities are tabulated once per distinct upset factor, so each
+    game costs one table lookup and one uniform draw (with more than
+    MAX_FACTOR_TABLES distinct factors they are adjusted game by game
+    instead). Brackets are simulated SIM_CHUNK_BRACKETS at a time to keep the
+    working arrays in cache.
+
+    Args:
+        model: Tournament to simulate
+        upset_factors: Upset factor for each bracket (clipped to [-1, 1])
+        rng: Random generator
+
+    Returns:
+        Array of shape (len(upset_factors), 63) holding the winning slot of each game
+    """
+    factors, factor_index = np.unique(np.asarray(upset_factors, dtype=np.float64), return_inverse=True)
+    tabulate = len(factors) <= MAX_FACTOR_TABLES
+    if tabulate:
+        probabilities = model.game_probabilities(factors).astype(np.float32).ravel()
+        table_offsets = factor_index.astype(np.int32) * (NUM_SLOTS * NUM_SLOTS)
+    else:
+        clipped = np.clip(factors, -1.0, 1.0)[factor_index]
+        weights = np.abs(clipped).astype(np.float32)
+        targets = np.where(clipped < 0, 1.0, 0.5).astype(np.float32)
+        favorite_prob = model.favorite_prob.astype(np.float32).ravel()
+        first_is_favorite = model.first_is_favorite.ravel()
+
+    brackets = np.empty((len(factor_index), NUM_GAMES), dtype=np.int8)
+    for start in range(0, len(factor_index), SIM_CHUNK_BRACKETS):
+        rows = slice(start, min(start + SIM_CHUNK_BRACKETS, len(factor_index)))
+        count = rows.stop - rows.start
+        team1 = np.broadcast_to(_FIRST_ROUND_TEAMS[:, 0], (count, NUM_SLOTS // 2))
+        team2 = np.broadcast_to(_FIRST_ROUND_TEAMS[:, 1], (count, NUM_SLOTS // 2))
+        for round_num in range(1, 7):
+            matchups = team1 * NUM_SLOTS + team2
+            if tabulate:
+                first_prob = probabilities[table_offsets[rows, None] + matchups]
+            else:
+                weight = weights[rows, None]
+                adjusted = favorite_prob[matchups] * (1 - weight) + targets[rows, None] * weight
+                first_prob = np.where(first_is_favorite[matchups], adjusted, 1 - adjusted)
+            winners = np.where(rng.random(first_prob.shape, dtype=np.float32) < first_prob, team1, team2)
+            brackets[rows, ROUND_OFFSETS[round_num]:ROUND_OFFSETS[round_num + 1]] = winners
+            team1, team2 = winners[:, 0::2], winners[:, 1::2]
+    return brackets
+
+
+def score_brackets(entries: np.ndarray, actual: np.ndarray) -> np.ndarray:
+    """
+    Score entry brackets against actual results (1/2/4/8/16/32 points per correct pick by round).
+
+    Args:
+        entries: Winner slots of shape (..., 63)
+        actual: Winner slots broadcastable against entries
+
+    Returns:
+        Scores with the shape of entries minus the game axis
+    """
+    return (entries == actual) @ _GAME_POINTS
+
+
+def draw_upset_factors(rng: np.random.Generator, entries_per_pool: int) -> np.ndarray:
+    """
+    Upset factors for the entries of one pool.
+
+    Factors are normal around pure Elo picking, and pools of 10 or more
+    always include a strong chalk picker, a strong upset picker and a pure
+    Elo picker, matching bigdance's BracketAnalysis.simulate_pools.
+    """
+    upset_factors = np.clip(rng.normal(0, ENTRY_UPSET_SD, entries_per_pool), -1.0, 1.0)
+    if entries_per_pool >= 10:
+        upset_factors[:3] = [-0.8, 0.8, 0.0]
+        rng.shuffle(upset_factors)
+    return upset_factors
+
+
+@dataclass
+class PoolSimulation:
+    """
+    Results of simulating many pools, one row per entry.
+
+    `brackets` holds each entry's bracket from the last simulated tournament
+    of its pool and `is_winner` flags the entry with the best win share in
+    each pool, which is what the winning vs. non-winning comparisons use.
+    """
+
+    model: TournamentModel
+    entries_per_pool: int
+    sims_per_pool: int
+    brackets: np.ndarray
+    is_winner: np.ndarray
+    upset_factors: np.ndarray
+    win_pct: np.ndarray
+
+    @property
+    def num_pools(self) -> int:
+        return len(self.brackets) // self.entries_per_pool
+
+    @property
+    def winning_brackets(self) -> np.ndarray:
+        return self.brackets[self.is_winner]
+
+    @property
+    def non_winning_brackets(self) -> np.ndarray:
+        return self.brackets[~self.is_winner]
+
+
+def simulate_pools(model: TournamentModel, num_pools: int = DEFAULT_NUM_POOLS, entries_per_pool: int = 10,
+                   sims_per_pool: int = SIMS_PER_POOL, rng: Optional[np.random.Generator] = None) -> PoolSimulation:
+    """
+    Simulate bracket pools entirely with array operations.
+
+    Each pool draws entry upset factors, then plays sims_per_pool tournaments
+    (upset factor 0.25) against freshly simulated entries. Ties for the top
+    score split the win, and the entry with the best win share wins the pool.
+    Pools are simulated in batches of up to MAX_BATCH_BRACKETS brackets.
+
+    Args:
+        model: Tournament to simulate
+        num_pools: Number of pools
+        entries_per_pool: Entries in each pool
+        sims_per_pool: Tournaments simulated per pool
+        rng: Random generator (a fresh unseeded one if omitted)
+
+    Returns:
+        PoolSimulation with every entry's final bracket and winner flag
+    """
+    rng = rng or np.random.default_rng()
+    brackets_per_pool = sims_per_pool * (entries_per_pool + 1)
+    batch_pools = max(1, MAX_BATCH_BRACKETS // brackets_per_pool)
+
+    brackets, is_winner, upset_factors, win_pct = [], [], [], []
+    for start in range(0, num_pools, batch_pools):
+        pools = min(batch_pools, num_pools - start)
+        factors = np.empty((pools, entries_per_pool + 1))
+        factors[:, 0] = ACTUAL_UPSET_FACTOR
+        for pool in range(pools):
+            factors[pool, 1:] = draw_upset_factors(rng, entries_per_pool)
+
+        simulated = simulate_brackets(
+            model, np.broadcast_to(factors[:, None, :], (pools, sims_per_pool, entries_per_pool + 1)).ravel(), rng
+        ).reshape(pools, sims_per_pool, entries_per_pool + 1, NUM_GAMES)
+        actual, entries = simulated[:, :, :1], simulated[:, :, 1:]
+
+        scores = score_brackets(entries, actual)
+        top = scores == scores.max(axis=2, keepdims=True)
+        pool_win_pct = (top / top.sum(axis=2, keepdims=True)).mean(axis=1)
+        winners = np.zeros((pools, entries_per_pool), dtype=bool)
+        winners[np.arange(pools), pool_win_pct.argmax(axis=1)] = True
+
+        brackets.append(entries[:, -1].reshape(-1, NUM_GAMES))
+        is_winner.append(winners.ravel())
+        upset_factors.append(factors[:, 1:].ravel())
+        win_pct.append(pool_win_pct.ravel())
+        logger.debug(f"Simulated {start + pools} of {num_pools} pools")
+
+    return PoolSimulation(
+        model=model,
+        entries_per_pool=entries_per_pool,
+        sims_per_pool=sims_per_pool,
+        brackets=np.concatenate(brackets),
+        is_winner=np.concatenate(is_winner),
+        upset_factors=np.concatenate(upset_factors),
+        win_pct=np.concatenate(win_pct)
+    )
+
+
+def _simulate_shard(model: TournamentModel, num_pools: int, entries_per_pool: int, sims_per_pool: int,
+                    seed_sequence: np.random.SeedSequence) -> Tuple[np.ndarray, ...]:
+    """Simulate one shard of pools, returning its result arrays (the model stays behind in worker processes)"""
+    simulation = simulate_pools(model, num_pools, entries_per_pool, sims_per_pool, np.random.default_rng(seed_sequence))
+    return simulation.brackets, simulation.is_winner, simulation.upset_factors, simulation.win_pct
+
+
+_worker_model: Optional[TournamentModel] = None
+
+
+def _init_shard_worker(model: TournamentModel):
+    """Keep the tournament model in a worker process so it is sent once rather than with every shard"""
+    global _worker_model
+    _worker_model = model
+
+
+def _simulate_worker_shard(num_pools: int, entries_per_pool: int, sims_per_pool: int,
+                           seed_sequence: np.random.SeedSequence) -> Tuple[np.ndarray, ...]:
+    """Simulate one shard in a worker process"""
+    return _simulate_shard(_worker_model, num_pools, entries_per_pool, sims_per_pool, seed_sequence)
+
+
+def merge_pool_simulations(model: TournamentModel, entries_per_pool: int, sims_per_pool: int,
+                           shards: Sequence[Tuple[np.ndarray, ...]]) -> PoolSimulation:
+    """Concatenate shard result arrays (in shard order) into one PoolSimulation"""
+    brackets, is_winner, upset_factors, win_pct = zip(*shards)
+    return PoolSimulation(
+        model=model,
+        entries_per_pool=entries_per_pool,
+        sims_per_pool=sims_per_pool,
+        brackets=np.concatenate(brackets),
+        is_winner=np.concatenate(is_winner),
+        upset_factors=np.concatenate(upset_factors),
+        win_pct=np.concatenate(win_pct)
+    )
+
+
+def shard_executor(model: TournamentModel, workers: int) -> ProcessPoolExecutor:
+    """Process pool for simulate_pools_sharded, with the model loaded in every worker"""
+    # Spawned rather than forked workers, since the app calls this from a thread of a running server
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                               initializer=_init_shard_worker, initargs=(model,))
+
+
+def simulate_pools_sharded(model: TournamentModel, num_pools: int = DEFAULT_NUM_POOLS, entries_per_pool: int = 10,
+                           sims_per_pool: int = SIMS_PER_POOL, seed_sequence: Optional[np.random.SeedSequence] = None,
+                           workers: int = DEFAULT_WORKERS,
+                           executor: Optional[ProcessPoolExecutor] = None) -> PoolSimulation:
+    """
+    Simulate pools in shards of SHARD_POOLS, spread over worker processes.
+
+    Each shard gets its own child of seed_sequence and shards are merged in
+    order, so the result only depends on the seed and never on the number
+    of workers (one worker runs the shards in this process).
+
+    Args:
+        model: Tournament to simulate
+        num_pools: Number of pools
+        entries_per_pool: Entries in each pool
+        sims_per_pool: Tournaments simulated per pool
+        seed_sequence: Root seed (fresh entropy if omitted)
+        workers: Number of worker processes
+        executor: Running shard_executor to reuse (one is started and shut down per call otherwise)
+
+    Returns:
+        PoolSimulation for all pools
+    """
+    seed_sequence = seed_sequence or np.random.SeedSequence()
+    shard_sizes = [min(SHARD_POOLS, num_pools - start) for start in range(0, num_pools, SHARD_POOLS)]
+    shard_seeds = seed_sequence.spawn(len(shard_sizes))
+    workers = max(1, min(workers, len(shard_sizes)))
+
+    if executor is None and workers == 1:
+        shards = [_simulate_shard(model, pools, entries_per_pool, sims_per_pool, shard_seed)
+                  for pools, shard_seed in zip(shard_sizes, shard_seeds)]
+    else:
+        owned = executor is None
+        executor = executor or shard_executor(model, workers)
+        try:
+            shards = list(executor.map(_simulate_worker_shard, shard_sizes, [entries_per_pool] * len(shard_sizes),
+                                       [sims_per_pool] * len(shard_sizes), shard_seeds))
+        finally:
+            if owned:
+                executor.shutdown()
+    logger.debug(f"Simulated {num_pools} pools in {len(shard_sizes)} shards on {workers} workers")
+    return merge_pool_simulations(model, entries_per_pool, sims_per_pool, shards)
+
+
+@dataclass(frozen=True)
+class PoolSample:
+    """
+    Simulated tournaments and the strongest opponent bracket in each.
+
+    Opponents are drawn fresh for every tournament (upset factors as in
+    simulate_pools), so scoring a bracket against the sample estimates its
+    chance of winning a typical pool of pool_size entries.
+    """
+
+    tournament: str
+    pool_size: int
+    data_version: int
+    actual: np.ndarray
+    best_opponent_score: np.ndarray
+    opponents_at_best: np.ndarray
+
+    @property
+    def sims(self) -> int:
+        return len(self.actual)
+
+    def win_probability(self, winner_slots: Sequence[Optional[int]]) -> Dict:
+        """
+        Estimate the chance that a bracket wins the pool (ties for first split the win).
+
+        Args:
+            winner_slots: Winning slot of each of the 63 games (None for undecided games, which score nothing)
+
+        Returns:
+            Dictionary with the win probability, its standard error, the number of
+            simulated pools and the win probability of an average entry
+        """
+        bracket = np.array([-1 if slot is None else slot for slot in winner_slots], dtype=np.int8)
+        scores = score_brackets(bracket, self.actual)
+        win_share = np.where(scores > self.best_opponent_score, 1.0,
+                             np.where(scores == self.best_opponent_score, 1 / (self.opponents_at_best + 1), 0.0))
+        return {
+            'win_probability': float(win_share.mean()),
+            'std_error': float(win_share.std(ddof=1) / np.sqrt(self.sims)),
+            'sims': self.sims,
+            'baseline': 1 / self.pool_size
+        }
+
+    @cached_property
+    def block_points(self) -> List[np.ndarray]:
+        """
+        Points every combination of picks in each score block earns in every simulated tournament.
+
+        Row k of a block's table, shape (combinations, sims), holds the points
+        of the picks whose options (position within the subtree, or undecided
+        as the last option) have sum(option * stride) == k. Built on first use
+        for batch scoring (about 5 MB at WIN_ESTIMATE_SIMS).
+        """
+        sims = np.arange(self.sims)
+        tables = []
+        for games, first_slots, options, _ in _SCORE_BLOCKS:
+            table = np.zeros((1, self.sims), dtype=np.uint8)
+            for game, first_slot in zip(games, first_slots):
+                points = np.zeros((options, self.sims), dtype=np.uint8)
+                points[self.actual[:, game] - first_slot, sims] = _GAME_POINTS[game]
+                table = (points[:, None, :] + table[None, :, :]).reshape(-1, self.sims)
+            tables.append(table)
+        return tables
+
+    @cached_property
+    def tie_share_split(self) -> Tuple[float, np.ndarray, np.ndarray]:
+        """
+        Tie shares (1 / brackets tied for first) split for batch scoring.
+
+        Most tournaments tie with the same number of opponents, so batch scoring
+        counts ties at that most common share and weights only the other
+        tournaments (returned with their shares) individually.
+        """
+        shares = 1 / (self.opponents_at_best + 1)
+        values, counts = np.unique(shares, return_counts=True)
+        common_share = float(values[counts.argmax()])
+        other_sims = np.flatnonzero(shares != common_share)
+        return common_share, other_sims, shares[other_sims]
+
+    def win_probabilities(self, brackets: np.ndarray) -> Dict:
+        """
+        Vectorized win_probability for a batch of brackets.
+
+        Scores are accumulated one score block at a time by gathering rows of
+        block_points, so a batch costs about two dozen passes over an (n, sims)
+        array instead of an (n, sims, 63) comparison. Win shares are summed
+        from the win and tie counts (see tie_share_split) rather than built as
+        an (n, sims) array.
+
+        Args:
+            brackets: Winner slots of shape (n, 63), negative for undecided games
+
+        Returns:
+            Dictionary with arrays of win probabilities and standard errors (n,),
+            the number of simulated pools and the win probability of an average entry
+        """
+        brackets = np.asarray(brackets, dtype=np.intp)
+        # A bracket scores at most 192 points, so scores add up in bytes like the block tables
+        scores = np.zeros((len(brackets), self.sims), dtype=np.uint8)
+        for (games, first_slots, options, strides), table in zip(_SCORE_BLOCKS, self.block_points):
+            # Picks outside the game's subtree can never score, so they count as undecided
+            option = brackets[:, games] - first_slots
+            option[(option < 0) | (option >= options - 1)] = options - 1
+            scores += table[option @ strides]
+
+        best = self.best_opponent_score
+        common_share, other_sims, other_shares = self.tie_share_split
+        count_dtype = np.uint16 if self.sims <= np.iinfo(np.uint16).max else np.int64
+        wins = (scores > best).view(np.uint8).sum(axis=1, dtype=count_dtype)
+        ties = scores == best
+        tie_counts = ties.view(np.uint8).sum(axis=1, dtype=count_dtype)
+        other_ties = ties[:, other_sims]
+        win_probability = (wins + tie_counts * common_share
+                           + other_ties @ (other_shares - common_share)) / self.sims
+        sum_of_squares = (wins + tie_counts * common_share ** 2
+                          + other_ties @ (other_shares ** 2 - common_share ** 2))
+        variance = np.maximum(sum_of_squares - self.sims * win_probability ** 2, 0) / max(self.sims - 1, 1)
+        return {
+            'win_probability': win_probability,
+            'std_error': np.sqrt(variance / self.sims),
+            'sims': self.sims,
+            'baseline': 1 / self.pool_size
+        }
+
+
+def build_pool_sample(model: TournamentModel, pool_size: int, data_version: int = 0,
+                      rng: Optional[np.random.Generator] = None, sims: Optional[int] = None) -> PoolSample:
+    """
+    Simulate tournaments with a fresh field of pool_size - 1 opponents in each.
+
+    Unless sims is given, uses WIN_ESTIMATE_SIMS tournaments, or fewer for
+    large pools so no more than MAX_SAMPLE_BRACKETS brackets are simulated.
+    """
+    rng = rng or np.random.default_rng()
+    opponents = max(int(pool_size) - 1, 0)
+    if sims is None:
+        sims = min(WIN_ESTIMATE_SIMS, max(MIN_WIN_ESTIMATE_SIMS, MAX_SAMPLE_BRACKETS // max(opponents, 1)))
+    batch_sims = max(1, MAX_BATCH_BRACKETS // (opponents + 1))
+
+    actual, best_opponent_score, opponents_at_best = [], [], []
+    for start in range(0, sims, batch_sims):
+        count = min(batch_sims, sims - start)
+        factors = np.empty((count, opponents + 1))
+        factors[:, 0] = ACTUAL_UPSET_FACTOR
+        for sim in range(count):
+            factors[sim, 1:] = draw_upset_factors(rng, opponents)
+        simulated = simulate_brackets(model, factors.ravel(), rng).reshape(count, opponents + 1, NUM_GAMES)
+        actual.append(simulated[:, 0])
+        if opponents:
+            scores = score_brackets(simulated[:, 1:], simulated[:, :1])
+            best = scores.max(axis=1)
+            best_opponent_score.append(best)
+            opponents_at_best.append((scores == best[:, None]).sum(axis=1))
+        else:
+            best_opponent_score.append(np.full(count, -1))
+            opponents_at_best.append(np.zeros(count, dtype=np.int64))
+
+    return PoolSample(
+        tournament=model.tournament,
+        pool_size=int(pool_size),
+        data_version=data_version,
+        actual=np.concatenate(actual),
+        best_opponent_score=np.concatenate(best_opponent_score),
+        opponents_at_best=np.concatenate(opponents_at_best)
+    )
+
+
+_sample_cache = LRUCache(POOL_SAMPLE_CACHE_SIZE, name="pool samples")
+_pending_samples: Dict[tuple, Future] = {}
+_pending_samples_lock = threading.Lock()
+_sample_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="pool-samples")
+
+
+def _build_cached_sample(key: tuple) -> PoolSample:
+    """Build a pool sample into the cache (runs on the sample executor)"""
+    tournament, data_version, pool_size = key
+    try:
+        start = time.perf_counter()
+        sample = build_pool_sample(get_tournament_model(tournament), pool_size, data_version,
+                                   np.random.default_rng([POOL_SAMPLE_SEED, pool_size]))
+        _sample_cache.put(key, sample)
+        logger.info(f"Built {tournament} pool sample for {pool_size} entries in {time.perf_counter() - start:.2f}s")
+        return sample
+    finally:
+        with _pending_samples_lock:
+            del _pending_samples[key]
+
+
+def request_pool_sample(pool_size: int, tournament: str = TOURNAMENT) -> Future:
+    """
+    Future for the pool sample of the current tournament data, building it in the background on a miss.
+
+    Samples are keyed by data version, so refreshed tournament data gets new samples.
+    """
+    data_version = get_data_version() if tournament == TOURNAMENT else 0
+    key = (tournament, data_version, int(pool_size))
+    sample = _sample_cache.get(key)
+    if sample is not None:
+        future = Future()
+        future.set_result(sample)
+        return future
+    with _pending_samples_lock:
+        future = _pending_samples.get(key)
+        if future is None:
+            future = _sample_executor.submit(_build_cached_sample, key)
+            _pending_samples[key] = future
+        return future
+
+
+def prefetch_pool_samples(tournament: str = TOURNAMENT, pool_sizes: Optional[List[str]] = None) -> List[Future]:
+    """Build the pool samples for the given pool sizes (defaults to all offered in the UI) in the background"""
+    return [request_pool_sample(int(pool_size), tournament) for pool_size in pool_sizes or POOL_SIZES]
+
+
+def estimate_win_probability(winner_slots: Sequence[Optional[int]], pool_size: int, tournament: str = TOURNAMENT,
+                             timeout: Optional[float] = WIN_ESTIMATE_BUDGET_SECONDS) -> Optional[Dict]:
+    """
+    Estimate a bracket's chance of winning a pool by scoring it against the cached pool sample.
+
+    Args:
+        winner_slots: Winning slot of each of the 63 games (None for undecided games)
+        pool_size: Number of entries in the pool, including this bracket
+        tournament: Tournament key ("men" or "women")
+        timeout: Longest to wait for a sample that is still being built (None waits indefinitely)
+
+    Returns:
+        Result of PoolSample.win_probability, or None if the sample was not ready in time
+        (it keeps building in the background)
+    """
+    try:
+        sample = request_pool_sample(pool_size, tournament).result(timeout)
+    except FutureTimeoutError:
+        return None
+    return sample.win_probability(winner_slots)
+
+
+def underdog_games(seeds: np.ndarray, brackets: np.ndarray) -> np.ndarray:
+    """Whether each pick in a batch of brackets (negative for undecided games) is an underdog for its round"""
+    brackets = np.asarray(brackets, dtype=np.intp)
+    return (brackets >= 0) & (seeds[brackets] > _GAME_UNDERDOG_SEEDS)
+
+
+def bracket_statistics(model: TournamentModel, brackets: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Per-bracket underdog counts and log probabilities.
+
+    Log probabilities are -log of each picked winner's pure Elo probability
+    against the opponent it actually faced in that bracket.
+
+    Args:
+        model: Tournament the brackets were simulated for
+        brackets: Winner slots of shape (n, 63)
+
+    Returns:
+        Dictionary of arrays: 'underdogs_by_round' and 'log_probs_by_round' (n, 6),
+        'total_underdogs' and 'log_prob' (n,)
+    """
+    brackets = brackets.astype(np.intp)
+    underdogs = underdog_games(model.seeds, brackets).astype(np.int16)
+    underdogs_by_round = np.add.reduceat(underdogs, _ROUND_STARTS, axis=1)
+
+    log_probs_by_round = log_probabilities_by_round(model.index, brackets)
+
+    return {
+        'underdogs_by_round': underdogs_by_round,
+        'total_underdogs': underdogs_by_round.sum(axis=1),
+        'log_probs_by_round': log_probs_by_round,
+        'log_prob': log_probs_by_round.sum(axis=1)
+    }
+
+
+def _interpret_effect_size(d: float) -> str:
+    """Interpret Cohen's d effect size magnitude"""
+    if abs(d) < 0.2:
+        return "Negligible"
+    elif abs(d) < 0.5:
+        return "Small"
+    elif abs(d) < 0.8:
+        return "Medium"
+    return "Large"
+
+
+def _compare_groups(winning: np.ndarray, non_winning: np.ndarray) -> Dict:
+    """Means, t-test and Cohen's d for winning vs. non-winning values"""
+    winning_mean = np.mean(winning)
+    non_winning_mean = np.mean(non_winning)
+    _, p_value = ttest_ind(winning, non_winning)
+    winning_std = np.std(winning)
+    non_winning_std = np.std(non_winning)
+    pooled_std = np.sqrt((winning_std ** 2 + non_winning_std ** 2) / 2)
+    cohens_d = (winning_mean - non_winning_mean) / pooled_std if pooled_std != 0 else 0
+    return {
+        'winning_mean': winning_mean,
+        'non_winning_mean': non_winning_mean,
+        'difference': winning_mean - non_winning_mean,
+        'p_value': p_value,
+        'significant': p_value < 0.05,
+        'effect_size': cohens_d,
+        'effect_magnitude': _interpret_effect_size(cohens_d)
+    }
+
+
+def _comparison_table(rows: Dict[str, tuple], value_name: str) -> pd.DataFrame:
+    """Winning vs. non-winning statistics table for groups of values"""
+    stats = []
+    for round_name, (winning, non_winning) in rows.items():
+        if len(winning) < 2 or len(non_winning) < 2:
+            logger.warning(f"Insufficient data for statistical analysis in {round_name}. Skipping.")
+            continue
+        comparison = _compare_groups(winning, non_winning)
+        stats.append({
+            'round': round_name,
+            f'winning_avg_{value_name}': comparison['winning_mean'],
+            f'non_winning_avg_{value_name}': comparison['non_winning_mean'],
+            'difference': comparison['difference'],
+            'p_value': comparison['p_value'],
+            'significant': comparison['significant'],
+            'effect_size': comparison['effect_size'],
+            'effect_magnitude': comparison['effect_magnitude']
+        })
+    return pd.DataFrame(stats, columns=['round', f'winning_avg_{value_name}', f'non_winning_avg_{value_name}',
+                                        'difference', 'p_value', 'significant', 'effect_size', 'effect_magnitude'])
+
+
+def _histogram(winning: np.ndarray, non_winning: np.ndarray, bins: np.ndarray) -> Dict:
+    """Winning vs. non-winning histogram in the format of bigdance's distribution JSON files"""
+    winning_density, bin_edges = np.histogram(winning, bins=bins, density=True)
+    non_winning_density, _ = np.histogram(non_winning, bins=bins, density=True)
+    return {
+        "bin_center": ((bin_edges[:-1] + bin_edges[1:]) / 2).tolist(),
+        "bin_start": bin_edges[:-1].tolist(),
+        "bin_end": bin_edges[1:].tolist(),
+        "winners_density": winning_density.tolist(),
+        "non_winners_density": non_winning_density.tolist(),
+        "winners_count": np.histogram(winning, bins=bins)[0].tolist(),
+        "non_winners_count": np.histogram(non_winning, bins=bins)[0].tolist(),
+        "winners_mean": float(np.mean(winning)),
+        "non_winners_mean": float(np.mean(non_winning))
+    }
+
+
+class PoolAnalysis:
+    """
+    Winning vs. non-winning comparisons of a PoolSimulation.
+
+    Produces the same tables, distributions and summary as bigdance's
+    BracketAnalysis, computed from the simulated bracket arrays.
+    """
+
+    def __init__(self, simulation: PoolSimulation):
+        self.simulation = simulation
+        self.model = simulation.model
+        self.num_pools = simulation.num_pools
+        self.winning_brackets = simulation.winning_brackets
+        self.non_winning_brackets = simulation.non_winning_brackets
+        self.winning = bracket_statistics(self.model, self.winning_brackets)
+        self.non_winning = bracket_statistics(self.model, self.non_winning_brackets)
+
+    def upset_distributions(self) -> Dict[str, Dict]:
+        """Histograms of underdog counts for the early rounds and in total"""
+        histogram_data = {}
+        for round_name, max_possible in UPSET_HISTOGRAM_ROUNDS.items():
+            round_index = ROUND_ORDER.index(round_name)
+            histogram_data[round_name] = _histogram(self.winning['underdogs_by_round'][:, round_index],
+                                                    self.non_winning['underdogs_by_round'][:, round_index],
+                                                    np.arange(-0.5, max_possible + 1.5, 1))
+
+        winning_total, non_winning_total = self.winning['total_underdogs'], self.non_winning['total_underdogs']
+        both = np.concatenate([winning_total, non_winning_total])
+        histogram_data["Total Upsets"] = _histogram(winning_total, non_winning_total,
+                                                    np.arange(both.min() - 0.5, both.max() + 1.5, 1))
+        return histogram_data
+
+    def log_probability_distributions(self) -> Dict[str, Dict]:
+        """Histograms of log probabilities for every round and overall"""
+        histogram_data = {}
+        for round_index, round_name in enumerate(ROUND_ORDER):
+            winning = self.winning['log_probs_by_round'][:, round_index]
+            non_winning = self.non_winning['log_probs_by_round'][:, round_index]
+            both = np.concatenate([winning, non_winning])
+            histogram_data[round_name] = _histogram(winning, non_winning,
+                                                    np.linspace(both.min() - 1, both.max() + 1, 30))
+
+        winning, non_winning = self.winning['log_prob'], self.non_winning['log_prob']
+        both = np.concatenate([winning, non_winning])
+        histogram_data["Overall"] = _histogram(winning, non_winning, np.linspace(both.min() - 5, both.max() + 5, 30))
+        return histogram_data
+
+    def upset_statistics(self) -> pd.DataFrame:
+        """Upset counts of winning vs. non-winning brackets by round and in total"""
+        rows = {round_name: (self.winning['underdogs_by_round'][:, i], self.non_winning['underdogs_by_round'][:, i])
+                for i, round_name in enumerate(ROUND_ORDER)}
+        rows["Total"] = (self.winning['total_underdogs'], self.non_winning['total_underdogs'])
+        return _comparison_table(rows, 'upsets')
+
+    def log_probability_statistics(self) -> pd.DataFrame:
+        """Log probabilities of winning vs. non-winning brackets by round and overall"""
+        rows = {round_name: (self.winning['log_probs_by_round'][:, i], self.non_winning['log_probs_by_round'][:, i])
+                for i, round_name in enumerate(ROUND_ORDER)}
+        rows["Overall"] = (self.winning['log_prob'], self.non_winning['log_prob'])
+        return _comparison_table(rows, 'log_prob')
+
+    def upset_distribution_differences(self, upset_distributions: Dict[str, Dict]) -> pd.DataFrame:
+        """Density advantage of winners for every number of upsets in each round"""
+        results = []
+        for round_name, data in upset_distributions.items():
+            for bin_center, winners_density, non_winners_density in zip(
+                    data["bin_center"], data["winners_density"], data["non_winners_density"]):
+                advantage = winners_density - non_winners_density
+                results.append({
+                    "round": round_name,
+                    "upsets": int(bin_center) if round_name != "Total Upsets" else bin_center,
+                    "winners_density": winners_density,
+                    "non_winners_density": non_winners_density,
+                    "advantage": advantage,
+                    "relative_advantage": advantage / non_winners_density if non_winners_density > 0 else float("inf")
+                })
+        return pd.DataFrame(results)
+
+    def optimal_upset_strategy(self, upset_distributions: Dict[str, Dict]) -> pd.DataFrame:
+        """Number of upsets per round that most favors winning brackets"""
+        strategy = []
+        for round_name, data in upset_distributions.items():
+            advantage = np.array(data["winners_density"]) - np.array(data["non_winners_density"])
+            max_advantage_idx = int(np.argmax(advantage))
+            if round_name == "Total Upsets":
+                winning = self.winning['total_underdogs']
+            else:
+                winning = self.winning['underdogs_by_round'][:, ROUND_ORDER.index(round_name)]
+            strategy.append({
+                "round": round_name,
+                "max_advantage_upsets": data["bin_center"][max_advantage_idx],
+                "max_advantage": advantage[max_advantage_idx],
+                "max_density_upsets": data["bin_center"][int(np.argmax(data["winners_density"]))],
+                "mode_upsets": pd.Series(winning).mode()[0],
+                "mean_upsets": np.mean(winning)
+            })
+        return pd.DataFrame(strategy)
+
+    def _comparison_rows(self, winning_counts: np.ndarray, non_winning_counts: np.ndarray) -> Dict[str, np.ndarray]:
+        """Counts and frequencies of per-slot picks in winning vs. non-winning brackets"""
+        winning_freq = winning_counts / max(len(self.winning_brackets), 1)
+        non_winning_freq = non_winning_counts / max(len(self.non_winning_brackets), 1)
+        freq_diff = winning_freq - non_winning_freq
+        with np.errstate(divide='ignore', invalid='ignore'):
+            relative_advantage = np.where(non_winning_freq > 0, freq_diff / non_winning_freq, np.inf)
+        return {
+            "winning_count": winning_counts,
+            "non_winning_count": non_winning_counts,
+            "winning_freq": winning_freq,
+            "non_winning_freq": non_winning_freq,
+            "freq_diff": freq_diff,
+            "relative_advantage": relative_advantage
+        }
+
+    def champion_comparison(self) -> pd.DataFrame:
+        """Champion picks of winning vs. non-winning brackets, most advantageous first"""
+        winning_counts = np.bincount(self.winning_brackets[:, -1], minlength=NUM_SLOTS)
+        non_winning_counts = np.bincount(self.non_winning_brackets[:, -1], minlength=NUM_SLOTS)
+        picked = np.flatnonzero(winning_counts + non_winning_counts)
+        comparison_df = pd.DataFrame({
+            "seed": self.model.seeds[picked],
+            "team": [self.model.index.names[slot] for slot in picked],
+            **self._comparison_rows(winning_counts[picked], non_winning_counts[picked])
+        })
+        return comparison_df.sort_values("freq_diff", ascending=False)
+
+    def specific_upset_comparison(self) -> pd.DataFrame:
+        """Individual underdog picks of winning vs. non-winning brackets by round, most advantageous first"""
+        tables = []
+        for round_num, round_name in enumerate(ROUND_ORDER, start=1):
+            games = slice(ROUND_OFFSETS[round_num], ROUND_OFFSETS[round_num + 1])
+            threshold = UNDERDOG_SEEDS[round_name]
+
+            def underdog_counts(brackets: np.ndarray) -> np.ndarray:
+                winners = brackets[:, games]
+                return np.bincount(winners[self.model.seeds[winners] > threshold], minlength=NUM_SLOTS)
+
+            winning_counts = underdog_counts(self.winning_brackets)
+            non_winning_counts = underdog_counts(self.non_winning_brackets)
+            picked = np.flatnonzero(winning_counts + non_winning_counts)
+            round_df = pd.DataFrame({
+                "round": round_name,
+                "seed": self.model.seeds[picked],
+                "team": [self.model.index.names[slot] for slot in picked],
+                **self._comparison_rows(winning_counts[picked], non_winning_counts[picked])
+            })
+            tables.append(round_df.sort_values("freq_diff", ascending=False))
+        return pd.concat(tables, ignore_index=True)
+
+    def summary_report(self, upset_stats: pd.DataFrame, log_prob_stats: pd.DataFrame,
+                       optimal_strategy: pd.DataFrame, champion_df: pd.DataFrame,
+                       specific_upsets_df: pd.DataFrame) -> str:
+        """Markdown summary of the key findings (same layout as bigdance's comparative summary)"""
+        report = [
+            "# Comparative Analysis Summary Report",
+            f"## Date Generated: {datetime.now().strftime('%Y-%m-%d %H:%M')}",
+            f"## Number of Pools Analyzed: {self.num_pools}",
+            f"## Total Brackets Analyzed: {len(self.winning_brackets) + len(self.non_winning_brackets)}",
+            f"### Winners: {len(self.winning_brackets)}",
+            f"### Non-Winners: {len(self.non_winning_brackets)}",
+            "",
+            "## Key Findings",
+            "",
+            "### Significant Differences in Upsets"
+        ]
+
+        significant = upset_stats[upset_stats['significant']]
+        if not significant.empty:
+            report.append("The following rounds showed statistically significant differences in upset patterns between winning and non-winning brackets:")
+            for _, row in significant.iterrows():
+                report.append(f"- **{row['round']}**: Winners avg {row['winning_avg_upsets']:.2f} upsets vs. non-winners {row['non_winning_avg_upsets']:.2f} upsets (p={row['p_value']:.4f}, {row['effect_magnitude']} effect)")
+        else:
+            report.append("No statistically significant differences in upset patterns were found between winning and non-winning brackets.")
+
+        report.extend(["", "### Significant Differences in Log Probabilities"])
+        significant = log_prob_stats[log_prob_stats['significant']]
+        if not significant.empty:
+            report.append("The following rounds showed statistically significant differences in log probabilities between winning and non-winning brackets:")
+            for _, row in significant.iterrows():
+                report.append(f"- **{row['round']}**: Winners avg {row['winning_avg_log_prob']:.2f} vs. non-winners {row['non_winning_avg_log_prob']:.2f} (p={row['p_value']:.4f}, {row['effect_magnitude']} effect)")
+        else:
+            report.append("No statistically significant differences in log probabilities were found between winning and non-winning brackets.")
+
+        report.extend(["", "### Optimal Upset Strategy"])
+        if not optimal_strategy.empty:
+            report.append("Based on the most successful brackets, the following upset strategy is recommended:")
+            for _, row in optimal_strategy.iterrows():
+                round_label = row['round'] if row['round'] != "Total Upsets" else "Total Across All Rounds"
+                report.append(f"- **{round_label}**: {int(row['max_advantage_upsets'])} upsets (mode: {int(row['mode_upsets'])}, mean: {row['mean_upsets']:.1f})")
+        else:
+            report.append("Insufficient data to determine optimal upset strategy.")
+
+        report.extend(["", "### Top Champion Picks"])
+        top_champions = champion_df.head(5)
+        top_champions = top_champions[top_champions['relative_advantage'] > 0.0]
+        if not top_champions.empty:
+            report.append("The following champion picks were most advantageous in winning brackets:")
+            for _, row in top_champions.iterrows():
+                report.append(f"- **{row['team']} (Seed {row['seed']})**: Winners picked {row['winning_freq'] * 100:.1f}% vs. non-winners {row['non_winning_freq'] * 100:.1f}% (advantage: {row['freq_diff'] * 100:.1f}%)")
+        else:
+            report.append("Insufficient data to determine top champion picks.")
+
+        report.extend(["", "### Most Valuable Specific Upsets"])
+        top_upsets = specific_upsets_df[specific_upsets_df['relative_advantage'] > 0.0].sort_values('freq_diff', ascending=False).head(10)
+        if not top_upsets.empty:
+            report.append("The following specific upsets were most advantageous in winning brackets:")
+            for _, row in top_upsets.iterrows():
+                report.append(f"- **{row['round']}**: #{row['seed']} {row['team']} - Winners picked {row['winning_freq'] * 100:.1f}% vs. non-winners {row['non_winning_freq'] * 100:.1f}% (advantage: {row['freq_diff'] * 100:.1f}%)")
+        else:
+            report.append("Insufficient data to determine valuable specific upsets.")
+
+        return "\n".join(report)
+
+    def build(self) -> Dict:
+        """
+        Every analysis output, keyed like the snapshot tables.
+
+        Returns:
+            Dictionary with a DataFrame per CSV table, the 'upset' and
+            'log_probability' distributions and the 'summary' text
+        """
+        upset_distributions = self.upset_distributions()
+        outputs = {
+            'upset': upset_distributions,
+            'log_probability': self.log_probability_distributions(),
+            'upset_comparison_statistics': self.upset_statistics(),
+            'log_probability_comparison_statistics': self.log_probability_statistics(),
+            'upset_distribution_differences': self.upset_distribution_differences(upset_distributions),
+            'optimal_upset_strategy': self.optimal_upset_strategy(upset_distributions),
+            'champion_pick_comparison': self.champion_comparison(),
+            'specific_upset_comparison': self.specific_upset_comparison()
+        }
+        outputs['summary'] = self.summary_report(
+            outputs['upset_comparison_statistics'], outputs['log_probability_comparison_statistics'],
+            outputs['optimal_upset_strategy'], outputs['champion_pick_comparison'],
+            outputs['specific_upset_comparison']
+        )
+        return outputs
+
+
+def _replace_file(path: Path, write) -> None:
+    """Write a file through a temporary file so readers never see it half written"""
+    tmp_path = path.with_name(path.name + ".tmp")
+    write(tmp_path)
+    os.replace(tmp_path, path)
+
+
+def write_analysis_files(outputs: Dict, output_dir: Path, settings: Optional[Dict] = None) -> List[Path]:
+    """
+    Write analysis outputs as the files read by the app and compiled into snapshots.
+
+    A new directory is written under a hidden staging name next to it and
+    renamed into place once every file is complete, so an analysis directory
+    never exists half written. Files of an existing directory are replaced
+    one at a time, each atomically.
+
+    Args:
+        outputs: Result of PoolAnalysis.build
+        output_dir: Pool directory to write into (created if missing)
+        settings: Settings of the simulation, written to SIMULATION_FILE alongside the outputs
+
+    Returns:
+        Paths of the files written
+    """
+    writers = {}
+    for table_name, filename in CSV_TABLES.items():
+        writers[filename] = lambda path, df=outputs[table_name]: df.to_csv(path, index=False)
+    for kind, filename in DISTRIBUTION_FILES.items():
+        writers[filename] = lambda path, data=outputs[kind]: path.write_text(json.dumps(data, indent=2))
+    for text_name, filename in TEXT_FILES.items():
+        writers[filename] = lambda path, text=outputs[text_name]: path.write_text(text)
+    if settings is not None:
+        writers[SIMULATION_FILE] = lambda path: path.write_text(json.dumps(settings, indent=2))
+
+    output_dir = Path(output_dir)
+    if output_dir.exists():
+        for filename, write in writers.items():
+            _replace_file(output_dir / filename, write)
+        return [output_dir / filename for filename in writers]
+
+    output_dir.parent.mkdir(parents=True, exist_ok=True)
+    staging_dir = Path(tempfile.mkdtemp(prefix=f".{output_dir.name}.", dir=output_dir.parent))
+    try:
+        os.chmod(staging_dir, 0o755)
+        for filename, write in writers.items():
+            write(staging_dir / filename)
+        try:
+            os.rename(staging_dir, output_dir)
+        except OSError:
+            if not output_dir.exists():
+                raise
+            # Another process wrote the same directory first; its data is just as complete
+            logger.info(f"{output_dir} was written concurrently, keeping the existing files")
+    finally:
+        if staging_dir.exists():
+            shutil.rmtree(staging_dir, ignore_errors=True)
+    return [output_dir / filename for filename in writers]
+
+
+def generate_analysis(pool_size: int, tournament: str = TOURNAMENT, num_pools: int = DEFAULT_NUM_POOLS,
+                      sims_per_pool: int = SIMS_PER_POOL, seed: Optional[int] = None,
+                      output_dir: Optional[Path] = None, workers: int = DEFAULT_WORKERS) -> Dict:
+    """
+    Simulate pools of one size and write their analysis files.
+
+    When writing to the app's analysis directory, the tournament's snapshot
+    is rebuilt and its cached bundles are dropped so the new data is served
+    right away. That directory holds the shipped data, so it is only written
+    from a serialized tournament (see data.refresh_tournament_data), never
+    from ratings estimated at startup.
+
+    Args:
+        pool_size: Number of entries in each pool
+        tournament: Tournament key ("men" or "women")
+        num_pools: Number of pools to simulate
+        sims_per_pool: Tournaments simulated per pool
+        seed: Random seed for reproducible output (the same for any number of workers)
+        output_dir: Directory to write to (defaults to the app's directory for this pool size)
+        workers: Number of worker processes
+
+    Returns:
+        Dictionary with the output directory, pool and bracket counts and timings in seconds
+
+    Raises:
+        ValueError: If asked to replace the shipped data without a serialized tournament
+    """
+    default_dir = get_analysis_dir(tournament, str(pool_size))
+    output_dir = Path(output_dir) if output_dir is not None else default_dir
+    if output_dir.resolve() == default_dir.resolve() and not get_tournament_file(tournament).exists():
+        raise ValueError(f"Not replacing the shipped {tournament} analysis data: {get_tournament_file(tournament).name} "
+                         f"is missing, so the ratings are only estimates (run `python data.py refresh` first)")
+
+    model = get_tournament_model(tournament)
+    seed_sequence = np.random.SeedSequence(seed)
+
+    start = time.perf_counter()
+    simulation = simulate_pools_sharded(model, num_pools, int(pool_size), sims_per_pool, seed_sequence, workers)
+    simulated = time.perf_counter()
+    outputs = PoolAnalysis(simulation).build()
+    analyzed = time.perf_counter()
+
+    settings = {
+        'tournament': tournament,
+        'pool_size': int(pool_size),
+        'num_pools': num_pools,
+        'sims_per_pool': sims_per_pool,
+        'seed': seed_sequence.entropy,
+        'data_version': model.index.version,
+        'generated_at': datetime.now().isoformat(timespec='seconds')
+    }
+    write_analysis_files(outputs, output_dir, settings)
+    if output_dir.resolve() == default_dir.resolve():
+        ensure_snapshot(tournament)
+        clear_analysis_cache(tournament)
+
+    result = {
+        'output_dir': str(output_dir),
+        'pools': num_pools,
+        'brackets': len(simulation.brackets),
+        'workers': workers,
+        'simulate_seconds': simulated - start,
+        'analyze_seconds': analyzed - simulated,
+        'total_seconds': time.perf_counter() - start
+    }
+    logger.info(f"Generated {tournament} analysis for {pool_size} entries from {num_pools} pools in {result['total_seconds']:.1f}s")
+    return result
+
+
+def benchmark_scaling(pool_size: int, tournament: str = TOURNAMENT, num_pools: int = DEFAULT_NUM_POOLS,
+                      sims_per_pool: int = SIMS_PER_POOL, seed: int = 0,
+                      max_workers: int = DEFAULT_WORKERS) -> List[Dict]:
+    """
+    Time the sharded simulation with 1, 2, 4, ... up to max_workers processes.
+
+    Worker processes are started (and timed separately) before the clock
+    starts, so the speedup reflects simulation throughput. Every run uses
+    the same seed, so each row also carries a digest of the simulated
+    brackets and winners, which must match across worker counts.
+
+    Returns:
+        One dictionary per worker count with seconds, startup seconds, speedup, efficiency and the result digest
+    """
+    model = get_tournament_model(tournament)
+    worker_counts = sorted({1, max_workers} | {2 ** power for power in range(1, max_workers.bit_length())
+                                               if 2 ** power < max_workers})
+    rows = []
+    for workers in worker_counts:
+        start = time.perf_counter()
+        executor = shard_executor(model, workers) if workers > 1 else None
+        try:
+            if executor is not None:
+                # One tiny shard per worker brings every process up
+                list(executor.map(_simulate_worker_shard, [1] * workers, [1] * workers, [1] * workers,
+                                  np.random.SeedSequence(seed).spawn(workers)))
+            started = time.perf_counter()
+            simulation = simulate_pools_sharded(model, num_pools, int(pool_size), sims_per_pool,
+                                                np.random.SeedSequence(seed), workers, executor)
+            seconds = time.perf_counter() - started
+        finally:
+            if executor is not None:
+                executor.shutdown()
+        digest = hashlib.sha256(simulation.brackets.tobytes() + simulation.is_winner.tobytes()).hexdigest()[:16]
+        rows.append({'workers': workers, 'seconds': round(seconds, 3), 'startup_seconds': round(started - start, 3),
+                     'digest': digest})
+    for row in rows:
+        row['speedup'] = round(rows[0]['seconds'] / row['seconds'], 2)
+        row['efficiency'] = round(row['speedup'] / row['workers'], 2)
+        row['identical'] = row['digest'] == rows[0]['digest']
+    return rows
+
+
+def on_demand_settings(pool_size: int) -> Tuple[int, int]:
+    """
+    Number of pools and tournaments per pool for generating a pool size on demand.
+
+    Keeps DEFAULT_NUM_POOLS pools and trims tournaments per pool to fit
+    ON_DEMAND_BRACKETS, then trims pools once tournaments hit their floor,
+    so every pool size simulates at most ON_DEMAND_BRACKETS brackets.
+
+    Raises:
+        ValueError: If the pool is too large for the budget at the floors
+            (never for sizes up to MAX_POOL_SIZE)
+    """
+    brackets_per_sim = int(pool_size) + 1
+    sims_per_pool = min(SIMS_PER_POOL, ON_DEMAND_BRACKETS // (DEFAULT_NUM_POOLS * brackets_per_sim))
+    if sims_per_pool >= MIN_ON_DEMAND_SIMS:
+        return DEFAULT_NUM_POOLS, sims_per_pool
+    num_pools = ON_DEMAND_BRACKETS // (MIN_ON_DEMAND_SIMS * brackets_per_sim)
+    if num_pools < MIN_ON_DEMAND_POOLS:
+        raise ValueError(f"{pool_size}-entry pools are too large to simulate on demand")
+    return num_pools, MIN_ON_DEMAND_SIMS
+
+
+_pending_generation: Dict[tuple, Future] = {}
+_failed_generation: Dict[tuple, float] = {}
+_pending_generation_lock = threading.Lock()
+_generation_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="analysis-generation")
+
+
+def prune_generated_analysis(tournament: str = TOURNAMENT, keep: int = GENERATED_POOL_LIMIT) -> List[str]:
+    """
+    Remove all but the most recently used generated pool sizes of a tournament.
+
+    Directories are ranked by modification time, which generation sets and
+    every load of the size refreshes. Staging directories left behind by
+    interrupted writes are removed once they are STALE_STAGING_SECONDS old.
+
+    Returns:
+        Pool sizes whose directories were removed
+    """
+    def last_used(path: Path) -> float:
+        try:
+            return path.stat().st_mtime
+        except OSError:  # Removed by another process meanwhile
+            return 0.0
+
+    pool_dirs = find_pool_dirs(tournament, GENERATED_DIR)
+    by_recency = sorted(pool_dirs.items(), key=lambda item: last_used(item[1]), reverse=True)
+    evicted = []
+    for pool_size, pool_dir in by_recency[keep:]:
+        shutil.rmtree(pool_dir, ignore_errors=True)
+        evicted.append(pool_size)
+    if evicted:
+        logger.info(f"Evicted generated {tournament} analysis for {', '.join(evicted)} entries")
+
+    cutoff = time.time() - STALE_STAGING_SECONDS
+    for path in GENERATED_DIR.glob(f".{tournament}_*entries.*"):
+        if path.is_dir() and last_used(path) < cutoff:
+            shutil.rmtree(path, ignore_errors=True)
+    return evicted
+
+
+def _generate_on_demand(key: tuple) -> AnalysisBundle:
+    """Generate and cache a pool size's analysis data, then load its bundle (runs on the generation executor)"""
+    tournament, pool_size = key
+    try:
+        num_pools, sims_per_pool = on_demand_settings(int(pool_size))
+        # Runs in process: the bracket budget takes about as long as starting worker processes would
+        generate_analysis(int(pool_size), tournament, num_pools, sims_per_pool,
+                          output_dir=get_generated_dir(tournament, pool_size), workers=1)
+        prune_generated_analysis(tournament)
+        bundle = get_analysis_bundle(pool_size, tournament)
+    except Exception:
+        # The failed future stays pending, so callers see the error until a retry is due
+        with _pending_generation_lock:
+            _failed_generation[key] = time.monotonic()
+        raise
+    with _pending_generation_lock:
+        del _pending_generation[key]
+    return bundle
+
+
+def request_analysis_bundle(pool_size, tournament: str = TOURNAMENT) -> Future:
+    """
+    Future for the analysis bundle of any pool size.
+
+    Pool sizes with analysis data are read on the prefetch thread if they
+    are not cached yet (never on the calling thread). Other sizes are
+    simulated once in the background and written to the generated analysis
+    cache (see prune_generated_analysis), so later requests and restarts
+    read them from disk until they are evicted. A failed generation is
+    returned as is (raising its error) for GENERATION_RETRY_SECONDS, after
+    which the next request starts a new attempt.
+    """
+    pool_size = normalize_pool_size(pool_size)
+    if has_analysis_data(pool_size, tournament):
+        return request_analysis_load(pool_size, tournament)
+    key = (tournament, pool_size)
+    with _pending_generation_lock:
+        future = _pending_generation.get(key)
+        failed_at = _failed_generation.get(key)
+        if future is None or (failed_at is not None and time.monotonic() - failed_at >= GENERATION_RETRY_SECONDS):
+            logger.info(f"No analysis data for {pool_size} entries, simulating it")
+            _failed_generation.pop(key, None)
+            future = _generation_executor.submit(_generate_on_demand, key)
+            _pending_generation[key] = future
+        return future
+
+
+def get_any_analysis_bundle(pool_size, tournament: str = TOURNAMENT,
+                            timeout: Optional[float] = None) -> Optional[AnalysisBundle]:
+    """
+    Analysis bundle for any pool size, generating the data first if there is none.
+
+    Args:
+        pool_size: Number of entries in the pool
+        tournament: Tournament key ("men" or "women")
+        timeout: Longest to wait for data still being generated (None waits until it is done)
+
+    Returns:
+        The bundle, or None if generation did not finish in time (it keeps running in the background)
+    """
+    try:
+        return request_analysis_bundle(pool_size, tournament).result(timeout)
+    except FutureTimeoutError:
+        return None
+
+
+def main(argv: Optional[Sequence[str]] = None):
+    """Command line entry point for regenerating analysis data"""
+    parser = argparse.ArgumentParser(description="Simulate bracket pools and write the analysis data used by the app")
+    parser.add_argument("--pool-size", type=int, nargs="+", default=[10, 25, 50, 100], help="Entries per pool")
+    parser.add_argument("--num-pools", type=int, default=DEFAULT_NUM_POOLS, help="Number of pools to simulate per pool size")
+    parser.add_argument("--sims", type=int, default=SIMS_PER_POOL, help="Tournaments simulated per pool")
+    parser.add_argument("--tournament", default=TOURNAMENT, choices=["men", "women"], help="Tournament to simulate")
+    parser.add_argument("--seed", type=int, default=None, help="Random seed")
+    parser.add_argument("--output-dir", type=Path, default=None,
+                        help=f"Write here (single pool size) instead of {SIMULATED_DIR}/<tournament>_<size>entries")
+    parser.add_argument("--install", action="store_true",
+                        help="Replace the app's shipped analysis data (requires a serialized tournament)")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Worker processes (results do not depend on this)")
+    parser.add_argument("--benchmark", action="store_true", help="Time 1 to --workers processes instead of writing analysis data")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    if args.output_dir is not None and len(args.pool_size) > 1:
+        parser.error("--output-dir can only be used with a single --pool-size")
+    if args.output_dir is not None and args.install:
+        parser.error("--output-dir and --install are mutually exclusive")
+    if args.install and not args.benchmark and not get_tournament_file(args.tournament).exists():
+        parser.error(f"--install needs {get_tournament_file(args.tournament).name} "
+                     f"(run `python data.py refresh --tournament {args.tournament}` first)")
+    for pool_size in args.pool_size:
+        if args.benchmark:
+            rows = benchmark_scaling(pool_size, args.tournament, args.num_pools, args.sims,
+                                     0 if args.seed is None else args.seed, args.workers)
+            print(json.dumps({'tournament': args.tournament, 'pool_size': pool_size, 'scaling': rows}, indent=2))
+            continue
+        if args.install:
+            output_dir = None
+        elif args.output_dir is not None:
+            output_dir = args.output_dir
+        else:
+            output_dir = SIMULATED_DIR / get_analysis_dir(args.tournament, str(pool_size)).name
+        result = generate_analysis(pool_size, args.tournament, args.num_pools, args.sims, args.seed,
+                                   output_dir, args.workers)
+        print(json.dumps({'tournament': args.tournament, 'pool_size': pool_size, **result}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,503 @@
+#!/usr/bin/env python
+# -*-coding:utf-8 -*-
+'''
+@File    :   snapshot.py
+@Time    :   2026/10/17
+@Author  :   Taylor Firman
+@Version :   1.0
+@Contact :   tefirman@gmail.com
+@Desc    :   Memory-mapped columnar snapshots of pool analysis data for March Madness bracket app
+'''
+
+import argparse
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import re
+import struct
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+ANALYSIS_DIR = Path('analysis_data')
+
+# Bump whenever the file layout changes so stale snapshots are rebuilt instead of misread
+SNAPSHOT_VERSION = 1
+SNAPSHOT_MAGIC = b"BDSNAP\x00\x01"
+ALIGNMENT = 64
+
+# Tables compiled into the snapshot (table name -> CSV file)
+CSV_TABLES = {
+    'optimal_upset_strategy': 'optimal_upset_strategy.csv',
+    'champion_pick_comparison': 'champion_pick_comparison.csv',
+    'specific_upset_comparison': 'specific_upset_comparison.csv',
+    'upset_comparison_statistics': 'upset_comparison_statistics.csv',
+    'log_probability_comparison_statistics': 'log_probability_comparison_statistics.csv',
+    'upset_distribution_differences': 'upset_distribution_differences.csv'
+}
+
+# Histogram data (distribution kind -> JSON file)
+DISTRIBUTION_FILES = {
+    'upset': 'comparative_upset_distributions_data.json',
+    'log_probability': 'comparative_log_probability_distributions_data.json'
+}
+DISTRIBUTION_ARRAYS = ['bin_center', 'bin_start', 'bin_end', 'winners_density',
+                       'non_winners_density', 'winners_count', 'non_winners_count']
+DISTRIBUTION_SCALARS = ['winners_mean', 'non_winners_mean']
+
+TEXT_FILES = {
+    'summary': 'comparative_analysis_summary.md'
+}
+
+# Worker processes the benchmark measures memory across, and how long it waits on any one of them (seconds)
+BENCHMARK_WORKERS = 4
+WORKER_TIMEOUT = 120
+
+_POOL_DIR_PATTERN = re.compile(r'^(?P<tournament>[a-z]+)_(?P<pool_size>\d+)entries$')
+
+
+def get_snapshot_path(tournament: str, analysis_dir: Path = ANALYSIS_DIR) -> Path:
+    """Location of the compiled snapshot for a tournament"""
+    return analysis_dir / f'{tournament}_analysis.snapshot'
+
+
+def find_pool_dirs(tournament: str, analysis_dir: Path = ANALYSIS_DIR) -> Dict[str, Path]:
+    """Map pool sizes to their analysis directories for a tournament, smallest pool first"""
+    pool_dirs = {}
+    if analysis_dir.exists():
+        for path in analysis_dir.iterdir():
+            match = _POOL_DIR_PATTERN.match(path.name)
+            if path.is_dir() and match and match['tournament'] == tournament:
+                pool_dirs[match['pool_size']] = path
+    return dict(sorted(pool_dirs.items(), key=lambda item: int(item[0])))
+
+
+def source_fingerprint(tournament: str, analysis_dir: Path = ANALYSIS_DIR) -> str:
+    """Content hash of every source file compiled into a tournament's snapshot"""
+    digest = hashlib.sha256()
+    filenames = list(CSV_TABLES.values()) + list(DISTRIBUTION_FILES.values()) + list(TEXT_FILES.values())
+    for pool_size, pool_dir in find_pool_dirs(tournament, analysis_dir).items():
+        for filename in filenames:
+            path = pool_dir / filename
+            if path.exists():
+                digest.update(f"{pool_size}/{filename}\0".encode())
+                digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
+class _SnapshotWriter:
+    """Accumulates aligned arrays for the data section of a snapshot"""
+
+    def __init__(self):
+        self.chunks = []
+        self.size = 0
+
+    def add(self, data: bytes) -> int:
+        """Append raw bytes at the next aligned offset and return that offset"""
+        padding = -self.size % ALIGNMENT
+        if padding:
+            self.chunks.append(b"\0" * padding)
+            self.size += padding
+        offset = self.size
+        self.chunks.append(data)
+        self.size += len(data)
+        return offset
+
+    def add_array(self, values: np.ndarray) -> Dict:
+        """Append a 1-D array and describe it for the header"""
+        values = np.ascontiguousarray(values)
+        return {'dtype': values.dtype.str, 'offset': self.add(values.tobytes()), 'length': len(values)}
+
+    def add_column(self, values: pd.Series) -> Dict:
+        """Append a table column, dictionary-encoding strings so every column is fixed width"""
+        if values.dtype.kind in "biuf":
+            return self.add_array(values.to_numpy())
+        categories, codes = np.unique(values.astype(str).to_numpy(), return_inverse=True)
+        column = self.add_array(codes.astype(np.int32))
+        column['categories'] = categories.tolist()
+        return column
+
+    def add_table(self, df: pd.DataFrame) -> Dict:
+        """Append every column of a table"""
+        return {'rows': len(df), 'columns': {name: self.add_column(df[name]) for name in df.columns}}
+
+
+def build_snapshot(tournament: str, analysis_dir: Path = ANALYSIS_DIR, output: Optional[Path] = None) -> Path:
+    """
+    Compile every pool analysis directory of a tournament into one snapshot file.
+
+    The file holds a JSON header followed by aligned little-endian column
+    arrays, so it can be memory-mapped and read without parsing.
+
+    Args:
+        tournament: Tournament key ("men" or "women")
+        analysis_dir: Directory holding the {tournament}_{pool_size}entries directories
+        output: Snapshot path (defaults to analysis_dir/{tournament}_analysis.snapshot)
+
+    Returns:
+        Path of the written snapshot
+    """
+    output = Path(output) if output is not None else get_snapshot_path(tournament, analysis_dir)
+    pool_dirs = find_pool_dirs(tournament, analysis_dir)
+    if not pool_dirs:
+        raise FileNotFoundError(f"No analysis directories found for {tournament} tournament in {analysis_dir}")
+
+    writer = _SnapshotWriter()
+    pools = {}
+    for pool_size, pool_dir in pool_dirs.items():
+        pool = {'tables': {}, 'distributions': {}, 'texts': {}}
+        for table_name, filename in CSV_TABLES.items():
+            path = pool_dir / filename
+            if path.exists():
+                pool['tables'][table_name] = writer.add_table(pd.read_csv(path))
+
+        for kind, filename in DISTRIBUTION_FILES.items():
+            path = pool_dir / filename
+            if not path.exists():
+                continue
+            with open(path, 'r') as f:
+                distribution_data = json.load(f)
+            pool['distributions'][kind] = {
+                round_name: {
+                    'arrays': {key: writer.add_array(np.asarray(round_data[key], dtype=np.float64))
+                               for key in DISTRIBUTION_ARRAYS},
+                    'scalars': {key: float(round_data[key]) for key in DISTRIBUTION_SCALARS}
+                }
+                for round_name, round_data in distribution_data.items()
+            }
+
+        for text_name, filename in TEXT_FILES.items():
+            path = pool_dir / filename
+            if path.exists():
+                data = path.read_bytes()
+                pool['texts'][text_name] = {'offset': writer.add(data), 'length': len(data)}
+
+        pools[pool_size] = pool
+
+    header = json.dumps({
+        'version': SNAPSHOT_VERSION,
+        'tournament': tournament,
+        'source_fingerprint': source_fingerprint(tournament, analysis_dir),
+        'built_at': time.time(),
+        'pools': pools
+    }).encode()
+    preamble = SNAPSHOT_MAGIC + struct.pack("<Q", len(header)) + header
+    data_start = len(preamble) + (-len(preamble) % ALIGNMENT)
+
+    # Write to a temporary file and swap it in so readers never see a partial snapshot
+    tmp_path = output.with_name(output.name + f".{os.getpid()}.tmp")
+    with open(tmp_path, 'wb') as f:
+        f.write(preamble.ljust(data_start, b"\0"))
+        for chunk in writer.chunks:
+            f.write(chunk)
+    os.replace(tmp_path, output)
+    logger.info(f"Built {tournament} analysis snapshot with {len(pools)} pool sizes ({data_start + writer.size} bytes)")
+    return output
+
+
+class Snapshot:
+    """
+    Read-only view of a compiled snapshot.
+
+    Columns are NumPy views into one shared memory map, so worker processes
+    opening the same file share its pages through the OS page cache.
+    """
+
+    def __init__(self, path: Path):
+        """
+        Args:
+            path: Snapshot file written by build_snapshot
+
+        Raises:
+            ValueError: If the file is not a snapshot or was written by another format version
+        """
+        self.path = Path(path)
+        with open(self.path, 'rb') as f:
+            magic = f.read(len(SNAPSHOT_MAGIC))
+            if magic != SNAPSHOT_MAGIC:
+                raise ValueError(f"{self.path} is not an analysis snapshot")
+            (header_length,) = struct.unpack("<Q", f.read(8))
+            header = json.loads(f.read(header_length))
+        if header.get('version') != SNAPSHOT_VERSION:
+            raise ValueError(f"{self.path} has snapshot version {header.get('version')}, expected {SNAPSHOT_VERSION}")
+
+        preamble_length = len(SNAPSHOT_MAGIC) + 8 + header_length
+        self.header = header
+        self.tournament = header['tournament']
+        self.source_fingerprint = header['source_fingerprint']
+        self._data_start = preamble_length + (-preamble_length % ALIGNMENT)
+        self._buffer = np.memmap(self.path, dtype=np.uint8, mode='r')
+
+    @property
+    def pool_sizes(self) -> List[str]:
+        """Pool sizes compiled into the snapshot"""
+        return list(self.header['pools'])
+
+    def _array(self, spec: Dict) -> np.ndarray:
+        """Zero-copy view of one stored array"""
+        dtype = np.dtype(spec['dtype'])
+        start = self._data_start + spec['offset']
+        return self._buffer[start:start + spec['length'] * dtype.itemsize].view(dtype)
+
+    def _column(self, spec: Dict) -> np.ndarray:
+        """Stored column, decoding dictionary-encoded strings"""
+        values = self._array(spec)
+        if 'categories' in spec:
+            return np.asarray(spec['categories'], dtype=object)[values]
+        return values
+
+    def has_table(self, pool_size: str, table_name: str) -> bool:
+        """Whether a pool size has a given table"""
+        return table_name in self.header['pools'].get(str(pool_size), {}).get('tables', {})
+
+    def table(self, pool_size: str, table_name: str) -> Optional[Dict[str, np.ndarray]]:
+        """Columns of a table by name (None if the table is missing)"""
+        spec = self.header['pools'].get(str(pool_size), {}).get('tables', {}).get(table_name)
+        if spec is None:
+            return None
+        return {name: self._column(column) for name, column in spec['columns'].items()}
+
+    def dataframe(self, pool_size: str, table_name: str) -> Optional[pd.DataFrame]:
+        """Table as a DataFrame whose numeric columns stay backed by the memory map"""
+        columns = self.table(pool_size, table_name)
+        if columns is None:
+            return None
+        return pd.DataFrame(columns, copy=False)
+
+    def distributions(self, pool_size: str, kind: str) -> Optional[Dict[str, Dict]]:
+        """
+        Histogram data in the layout of the comparative_*_distributions_data.json files.
+
+        Args:
+            pool_size: Number of entries in the pool
+            kind: "upset" or "log_probability"
+
+        Returns:
+            Dictionary of round name -> bin arrays and means (None if missing)
+        """
+        spec = self.header['pools'].get(str(pool_size), {}).get('distributions', {}).get(kind)
+        if spec is None:
+            return None
+        return {
+            round_name: {**{key: self._array(array) for key, array in round_spec['arrays'].items()},
+                         **round_spec['scalars']}
+            for round_name, round_spec in spec.items()
+        }
+
+    def text(self, pool_size: str, text_name: str) -> Optional[str]:
+        """Stored text file contents (None if missing)"""
+        spec = self.header['pools'].get(str(pool_size), {}).get('texts', {}).get(text_name)
+        if spec is None:
+            return None
+        start = self._data_start + spec['offset']
+        return self._buffer[start:start + spec['length']].tobytes().decode('utf-8')
+
+    def is_current(self, analysis_dir: Path = ANALYSIS_DIR) -> bool:
+        """Whether the snapshot still matches the source files it was built from"""
+        return self.source_fingerprint == source_fingerprint(self.tournament, analysis_dir)
+
+
+_snapshots: Dict[Tuple[str, str], Optional[Snapshot]] = {}
+_snapshots_lock = threading.Lock()
+
+
+def open_snapshot(tournament: str, analysis_dir: Path = ANALYSIS_DIR) -> Optional[Snapshot]:
+    """
+    Open (once per process) the snapshot for a tournament.
+
+    Returns None when there is no usable snapshot, in which case callers
+    should fall back to reading the CSV files.
+    """
+    key = (tournament, str(analysis_dir))
+    with _snapshots_lock:
+        if key not in _snapshots:
+            path = get_snapshot_path(tournament, analysis_dir)
+            snapshot = None
+            if path.exists():
+                try:
+                    snapshot = Snapshot(path)
+                except Exception as e:
+                    logger.warning(f"Ignoring unreadable analysis snapshot {path}: {str(e)}")
+            else:
+                logger.info(f"No analysis snapshot for {tournament} tournament, using CSV files")
+            _snapshots[key] = snapshot
+        return _snapshots[key]
+
+
+def ensure_snapshot(tournament: str, analysis_dir: Path = ANALYSIS_DIR) -> Optional[Path]:
+    """
+    Build a tournament's snapshot if it is missing, from an older format or out of date.
+
+    Meant to run once at startup, before worker processes open the snapshot.
+
+    Returns:
+        Path of the current snapshot, or None if it could not be built
+    """
+    path = get_snapshot_path(tournament, analysis_dir)
+    try:
+        if path.exists():
+            try:
+                if Snapshot(path).is_current(analysis_dir):
+                    return path
+            except ValueError as e:
+                logger.info(f"Rebuilding analysis snapshot: {str(e)}")
+        if not find_pool_dirs(tournament, analysis_dir):
+            return None
+        path = build_snapshot(tournament, analysis_dir)
+    except Exception as e:
+        logger.error(f"Error building {tournament} analysis snapshot: {str(e)}")
+        return None
+
+    with _snapshots_lock:
+        _snapshots.pop((tournament, str(analysis_dir)), None)
+    return path
+
+
+def read_memory_rollup(pid: int) -> Dict[str, int]:
+    """
+    Resident (RSS) and proportional (PSS) memory of a process in kilobytes.
+
+    PSS divides every shared page between the processes mapping it, so summed
+    over worker processes it counts a memory-mapped snapshot once rather than
+    once per worker. Read from /proc/<pid>/smaps_rollup (Linux 4.14+).
+    """
+    fields = {}
+    with open(f'/proc/{pid}/smaps_rollup', 'r') as f:
+        for line in f:
+            name, _, value = line.partition(':')
+            parts = value.split()
+            if len(parts) == 2 and parts[1] == 'kB':
+                fields[name] = int(parts[0])
+    return {'rss_kb': fields['Rss'], 'pss_kb': fields['Pss']}
+
+
+def _hold_tables(loader: Callable[[], Dict], barrier) -> None:
+    """Worker process for measure_worker_memory: load the tables and keep them until measured"""
+    barrier.wait(WORKER_TIMEOUT)  # Baseline measured
+    barrier.wait(WORKER_TIMEOUT)
+    tables = loader()
+    barrier.wait(WORKER_TIMEOUT)  # Loaded tables measured
+    barrier.wait(WORKER_TIMEOUT)
+    del tables
+
+
+def measure_worker_memory(loader: Callable[[], Dict], workers: int) -> Dict[str, float]:
+    """
+    Memory that loading the tables adds across concurrent worker processes.
+
+    Forks the workers (like a multi-worker server), and reads every worker's
+    RSS and PSS before and after loading while all of them hold their tables.
+
+    Args:
+        loader: Function loading the tables, run once in each worker
+        workers: Number of worker processes
+
+    Returns:
+        Dictionary with the RSS and PSS growth in kilobytes, summed over the workers
+    """
+    context = multiprocessing.get_context('fork')
+    barrier = context.Barrier(workers + 1)
+    processes = [context.Process(target=_hold_tables, args=(loader, barrier), daemon=True) for _ in range(workers)]
+    for process in processes:
+        process.start()
+    try:
+        barrier.wait(WORKER_TIMEOUT)
+        before = [read_memory_rollup(process.pid) for process in processes]
+        barrier.wait(WORKER_TIMEOUT)
+        barrier.wait(WORKER_TIMEOUT)
+        after = [read_memory_rollup(process.pid) for process in processes]
+        barrier.wait(WORKER_TIMEOUT)
+    finally:
+        for process in processes:
+            process.join(WORKER_TIMEOUT)
+            if process.is_alive():
+                process.terminate()
+    return {
+        'rss_kb': sum(loaded['rss_kb'] - baseline['rss_kb'] for baseline, loaded in zip(before, after)),
+        'pss_kb': sum(loaded['pss_kb'] - baseline['pss_kb'] for baseline, loaded in zip(before, after))
+    }
+
+
+def benchmark_snapshot(tournament: str, analysis_dir: Path = ANALYSIS_DIR, repeats: int = 5,
+                       workers: int = BENCHMARK_WORKERS) -> Dict[str, float]:
+    """
+    Compare loading every pool's tables from the CSV files against the snapshot.
+
+    Memory is measured across worker processes (see measure_worker_memory):
+    RSS counts the snapshot's shared pages in every worker, PSS splits them
+    between the workers, so the PSS total is what the server actually uses.
+
+    Returns:
+        Dictionary of timings in milliseconds and memory growth in kilobytes
+    """
+    path = ensure_snapshot(tournament, analysis_dir)
+    if path is None:
+        raise FileNotFoundError(f"No analysis data found for {tournament} tournament in {analysis_dir}")
+    pool_dirs = find_pool_dirs(tournament, analysis_dir)
+
+    def load_csv():
+        tables = {}
+        for pool_size, pool_dir in pool_dirs.items():
+            for table_name, filename in CSV_TABLES.items():
+                if (pool_dir / filename).exists():
+                    tables[pool_size, table_name] = pd.read_csv(pool_dir / filename)
+            for kind, filename in DISTRIBUTION_FILES.items():
+                if (pool_dir / filename).exists():
+                    with open(pool_dir / filename, 'r') as f:
+                        tables[pool_size, kind] = json.load(f)
+        return tables
+
+    def load_snapshot():
+        snapshot = Snapshot(path)
+        tables = {}
+        for pool_size in snapshot.pool_sizes:
+            for table_name in CSV_TABLES:
+                if snapshot.has_table(pool_size, table_name):
+                    tables[pool_size, table_name] = snapshot.dataframe(pool_size, table_name)
+            for kind in DISTRIBUTION_FILES:
+                tables[pool_size, kind] = snapshot.distributions(pool_size, kind)
+        return tables
+
+    results = {'snapshot_bytes': path.stat().st_size, 'workers': workers}
+    for label, loader in [('csv', load_csv), ('snapshot', load_snapshot)]:
+        # Measured before the timings, so the workers inherit no tables from this process
+        memory = measure_worker_memory(loader, workers)
+        timings = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            loader()
+            timings.append((time.perf_counter() - start) * 1000)
+        results[f'{label}_load_ms'] = min(timings)
+        results[f'{label}_rss_kb'] = memory['rss_kb']
+        results[f'{label}_pss_kb'] = memory['pss_kb']
+    return results
+
+
+def main():
+    """Command line entry point for building and benchmarking snapshots"""
+    parser = argparse.ArgumentParser(description="Compile pool analysis data into memory-mapped snapshots")
+    parser.add_argument("command", choices=["build", "benchmark"], help="Build snapshots or compare them against the CSV files")
+    parser.add_argument("--tournament", nargs="+", default=["men", "women"], help="Tournaments to process")
+    parser.add_argument("--analysis-dir", type=Path, default=ANALYSIS_DIR, help="Directory holding the analysis data")
+    parser.add_argument("--workers", type=int, default=BENCHMARK_WORKERS,
+                        help="Worker processes the benchmark measures memory across")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    for tournament in args.tournament:
+        if args.command == "build":
+            print(build_snapshot(tournament, args.analysis_dir))
+        else:
+            print(json.dumps({'tournament': tournament, **benchmark_snapshot(tournament, args.analysis_dir, workers=args.workers)}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,249 @@
+#!/usr/bin/env python
+# -*-coding:utf-8 -*-
+'''
+@File    :   streaming.py
+@Time    :   2026/10/17
+@Author  :   Taylor Firman
+@Version :   1.0
+@Contact :   tefirman@gmail.com
+@Desc    :   Progressive pool simulations with running estimates for March Madness bracket app
+'''
+
+import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from analysis import TOP_CHAMPIONS
+from simulator import (DEFAULT_NUM_POOLS, MAX_BATCH_BRACKETS, ROUND_ORDER, SHARD_POOLS, UPSET_HISTOGRAM_ROUNDS,
+                       PoolSample, TournamentModel, bracket_statistics, build_pool_sample, on_demand_settings,
+                       simulate_pools)
+
+logger = logging.getLogger(__name__)
+
+# Width of the reported confidence intervals (95%)
+CONFIDENCE_Z = 1.96
+
+# Upper limits of a run: pools for the upset and champion estimates, tournaments for the win estimate
+STREAM_MAX_POOLS = DEFAULT_NUM_POOLS
+STREAM_MAX_SIMS = 20_000
+
+# Most tournaments in one win estimate batch, so each batch lands within a fraction of a second
+STREAM_BATCH_SIMS = 500
+
+# Runs simulating at the same time across all sessions (later runs wait their turn)
+STREAM_WORKERS = 2
+
+_stream_executor = ThreadPoolExecutor(max_workers=STREAM_WORKERS, thread_name_prefix="stream")
+
+
+def _interval(estimate: float, std_error: float) -> Dict:
+    """Estimate with its confidence interval"""
+    return {'estimate': estimate, 'low': estimate - CONFIDENCE_Z * std_error, 'high': estimate + CONFIDENCE_Z * std_error,
+            'half_width': CONFIDENCE_Z * std_error}
+
+
+class ProgressiveRun:
+    """
+    Pool simulation that publishes running estimates while it works.
+
+    Batches alternate between a shard of SHARD_POOLS pools (for the upset
+    and champion estimates) and a batch of tournaments against fresh
+    opponents (for the win estimate). Each finished batch is added to the
+    accumulated results, so estimate() can be called at any time and its
+    confidence intervals shrink as the run goes on. Runs stop on their own
+    at STREAM_MAX_POOLS pools and STREAM_MAX_SIMS tournaments, or earlier
+    when stop() is called.
+    """
+
+    def __init__(self, model: TournamentModel, pool_size: int, seed: Optional[int] = None,
+                 max_pools: int = STREAM_MAX_POOLS, max_sims: int = STREAM_MAX_SIMS):
+        """
+        Args:
+            model: Tournament to simulate
+            pool_size: Number of entries in the pool
+            seed: Random seed (fresh entropy if omitted)
+            max_pools: Pools simulated before the run finishes
+            max_sims: Win estimate tournaments simulated before the run finishes
+        """
+        self.model = model
+        self.pool_size = int(pool_size)
+        self.max_pools = max_pools
+        self.max_sims = max_sims
+        self.sims_per_pool = on_demand_settings(self.pool_size)[1]
+        self.batch_sims = max(1, min(STREAM_BATCH_SIMS, MAX_BATCH_BRACKETS // self.pool_size))
+        self.state = 'queued'
+        self.error = None
+        self.batches = 0
+        self.started_at = None
+        self.elapsed = 0.0
+        self._seed_sequence = np.random.SeedSequence(seed)
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._winning_upsets: List[np.ndarray] = []
+        self._non_winning_upsets: List[np.ndarray] = []
+        self._winning_champions: List[np.ndarray] = []
+        self._non_winning_champions: List[np.ndarray] = []
+        self._samples: List[PoolSample] = []
+        self._pools = 0
+        self._sims = 0
+        self._future: Optional[Future] = None
+
+    def start(self) -> 'ProgressiveRun':
+        """Queue the run on the shared stream executor (no-op if already started)"""
+        if self._future is None:
+            self._future = _stream_executor.submit(self._run)
+        return self
+
+    def stop(self):
+        """Stop after the batch in progress (the estimates so far remain available)"""
+        self._stop.set()
+
+    @property
+    def finished(self) -> bool:
+        return self.state in ('done', 'stopped', 'error')
+
+    def _run(self):
+        """Simulate batches until the limits are reached or the run is stopped"""
+        if self._stop.is_set():
+            self.state = 'stopped'
+            return
+        self.state = 'running'
+        self.started_at = time.perf_counter()
+        try:
+            while not self._stop.is_set() and (self._pools < self.max_pools or self._sims < self.max_sims):
+                if self._pools < self.max_pools:
+                    self._add_pools(min(SHARD_POOLS, self.max_pools - self._pools))
+                if self._sims < self.max_sims and not self._stop.is_set():
+                    self._add_sims(min(self.batch_sims, self.max_sims - self._sims))
+                self.elapsed = time.perf_counter() - self.started_at
+            self.state = 'stopped' if self._stop.is_set() else 'done'
+        except Exception as e:
+            logger.error(f"Error in progressive simulation for {self.pool_size} entries: {str(e)}")
+            self.error = str(e)
+            self.state = 'error'
+        logger.info(f"Progressive simulation for {self.pool_size} entries {self.state} after {self._pools} pools "
+                    f"and {self._sims} tournaments")
+
+    def _add_pools(self, num_pools: int):
+        """Simulate a shard of pools and add its winning and non-winning brackets to the running totals"""
+        rng = np.random.default_rng(self._seed_sequence.spawn(1)[0])
+        simulation = simulate_pools(self.model, num_pools, self.pool_size, self.sims_per_pool, rng)
+        winning, non_winning = simulation.winning_brackets, simulation.non_winning_brackets
+        winning_upsets = bracket_statistics(self.model, winning)['underdogs_by_round']
+        non_winning_upsets = bracket_statistics(self.model, non_winning)['underdogs_by_round']
+        with self._lock:
+            self._winning_upsets.append(winning_upsets)
+            self._non_winning_upsets.append(non_winning_upsets)
+            self._winning_champions.append(winning[:, -1])
+            self._non_winning_champions.append(non_winning[:, -1])
+            self._pools += num_pools
+            self.batches += 1
+
+    def _add_sims(self, sims: int):
+        """Simulate a batch of tournaments against fresh opponents for the win estimate"""
+        rng = np.random.default_rng(self._seed_sequence.spawn(1)[0])
+        sample = build_pool_sample(self.model, self.pool_size, self.model.index.version, rng, sims=sims)
+        with self._lock:
+            self._samples.append(sample)
+            self._sims += sims
+            self.batches += 1
+
+    def progress(self) -> Dict:
+        """State of the run and how much it has simulated so far"""
+        return {
+            'state': self.state,
+            'error': self.error,
+            'pools': self._pools,
+            'max_pools': self.max_pools,
+            'sims': self._sims,
+            'max_sims': self.max_sims,
+            'batches': self.batches,
+            'elapsed': self.elapsed
+        }
+
+    def estimate(self, winner_slots: Optional[Sequence[Optional[int]]] = None,
+                 champion: Optional[str] = None) -> Dict:
+        """
+        Running estimates from the batches finished so far.
+
+        Args:
+            winner_slots: Winning slot of each of the 63 games of the bracket to estimate the win chance of
+            champion: Champion pick to report the freq_diff of (besides the current top champions)
+
+        Returns:
+            Dictionary with the progress, the bracket's win probability, the upset
+            count with the biggest winner advantage and the winners' mean for each
+            round, and champion freq_diff values, each with a 95% confidence interval
+            (None for parts without data yet)
+        """
+        with self._lock:
+            upsets = (list(self._winning_upsets), list(self._non_winning_upsets))
+            champions = (list(self._winning_champions), list(self._non_winning_champions))
+            samples = list(self._samples)
+
+        result = self.progress()
+        result['win'] = self._win_estimate(samples, winner_slots)
+        result['upsets'] = self._upset_estimates(*upsets)
+        result['champions'] = self._champion_estimates(*champions, champion)
+        return result
+
+    def _win_estimate(self, samples: List[PoolSample], winner_slots: Optional[Sequence[Optional[int]]]) -> Optional[Dict]:
+        """Win probability of a bracket against every tournament simulated so far"""
+        if not samples or winner_slots is None:
+            return None
+        sample = PoolSample(
+            tournament=self.model.tournament,
+            pool_size=self.pool_size,
+            data_version=self.model.index.version,
+            actual=np.concatenate([sample.actual for sample in samples]),
+            best_opponent_score=np.concatenate([sample.best_opponent_score for sample in samples]),
+            opponents_at_best=np.concatenate([sample.opponents_at_best for sample in samples])
+        )
+        win = sample.win_probability(winner_slots)
+        std_error = win['std_error'] if np.isfinite(win['std_error']) else 0.0
+        return {**_interval(win['win_probability'], std_error), 'baseline': win['baseline'], 'sims': win['sims']}
+
+    def _upset_estimates(self, winning: List[np.ndarray], non_winning: List[np.ndarray]) -> Optional[Dict]:
+        """Best upset count for winners (as in optimal_upset_strategy) and the winners' mean for each round"""
+        if not winning:
+            return None
+        winning, non_winning = np.concatenate(winning), np.concatenate(non_winning)
+        columns = {round_name: ROUND_ORDER.index(round_name) for round_name in UPSET_HISTOGRAM_ROUNDS}
+        estimates = {}
+        for round_name, counts in [(name, (winning[:, i], non_winning[:, i])) for name, i in columns.items()] + \
+                [("Total", (winning.sum(axis=1), non_winning.sum(axis=1)))]:
+            winning_counts, non_winning_counts = counts
+            bins = int(max(winning_counts.max(), non_winning_counts.max())) + 1
+            advantage = (np.bincount(winning_counts, minlength=bins) / len(winning_counts)
+                         - np.bincount(non_winning_counts, minlength=bins) / max(len(non_winning_counts), 1))
+            std_error = winning_counts.std(ddof=1) / np.sqrt(len(winning_counts)) if len(winning_counts) > 1 else 0.0
+            estimates[round_name] = {
+                'optimal': int(np.argmax(advantage)),
+                'winning_mean': _interval(float(winning_counts.mean()), float(std_error))
+            }
+        return estimates
+
+    def _champion_estimates(self, winning: List[np.ndarray], non_winning: List[np.ndarray],
+                            champion: Optional[str]) -> Optional[Dict]:
+        """Champion freq_diff (winning minus non-winning pick frequency) for the top champions and the given pick"""
+        if not winning:
+            return None
+        winning, non_winning = np.concatenate(winning), np.concatenate(non_winning)
+        winning_count, non_winning_count = len(winning), max(len(non_winning), 1)
+        winning_freq = np.bincount(winning, minlength=len(self.model.seeds)) / winning_count
+        non_winning_freq = np.bincount(non_winning, minlength=len(self.model.seeds)) / non_winning_count
+        freq_diff = winning_freq - non_winning_freq
+        std_error = np.sqrt(winning_freq * (1 - winning_freq) / winning_count
+                            + non_winning_freq * (1 - non_winning_freq) / non_winning_count)
+
+        def describe(slot: int) -> Dict:
+            return {'team': self.model.index.names[slot], 'seed': int(self.model.seeds[slot]),
+                    **_interval(float(freq_diff[slot]), float(std_error[slot]))}
+
+        top = [describe(int(slot)) for slot in np.argsort(-freq_diff, kind='stable')[:TOP_CHAMPIONS]]
+        slot = self.model.index.slot_of.get(champion) if champion else None
+        return {'top': top, 'pick': describe(slot) if slot is not None else None}
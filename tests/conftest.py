@@ -0,0 +1,59 @@
+#!/usr/bin/env python
+# -*-coding:utf-8 -*-
+'''
+@File    :   conftest.py
+@Time    :   2026/10/18
+@Author  :   Taylor Firman
+@Version :   1.0
+@Contact :   tefirman@gmail.com
+@Desc    :   Shared pytest fixtures for March Madness bracket app
+'''
+
+import copy
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+# The app modules live at the top level and read analysis_data relative to the app directory
+APP_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(APP_DIR))
+
+import data  # noqa: E402
+from simulator import TournamentModel, simulate_brackets  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def app_dir(monkeypatch):
+    """Run every test from the app directory, like the server"""
+    monkeypatch.chdir(APP_DIR)
+    return APP_DIR
+
+
+@pytest.fixture
+def restore_tournament():
+    """Restore the current tournament data (and drop added listeners) after a test that swaps it"""
+    teams = copy.deepcopy(data.get_tournament_index().to_teams())
+    listeners = list(data._data_listeners)
+    yield
+    data._data_listeners[:] = listeners
+    data.set_tournament_teams(teams)
+
+
+@pytest.fixture(scope="session")
+def table() -> data.TournamentIndex:
+    """Index of the men's tournament (read from the local files, like the app)"""
+    return data.TournamentIndex(data.load_tournament_teams("men"))
+
+
+@pytest.fixture(scope="session")
+def model(table) -> TournamentModel:
+    return TournamentModel(table, "men")
+
+
+@pytest.fixture(scope="session")
+def simulated_brackets(model) -> np.ndarray:
+    """Complete brackets simulated with a spread of upset factors, shape (200, 63)"""
+    rng = np.random.default_rng(2026)
+    return simulate_brackets(model, rng.uniform(-0.5, 1.0, 200), rng).astype(np.intp)
@@ -0,0 +1,74 @@
+#!/usr/bin/env python
+# -*-coding:utf-8 -*-
+'''
+@File    :   test_api.py
+@Time    :   2026/10/18
+@Author  :   Taylor Firman
+@Version :   1.0
+@Contact :   tefirman@gmail.com
+@Desc    :   Tests of the JSON assessment API for March Madness bracket app
+'''
+
+import pytest
+from starlette.applications import Starlette
+from starlette.testclient import TestClient
+
+import api
+from compact_bracket import CompactBracket
+
+
+@pytest.fixture(scope="module")
+def client():
+    # The API routes alone, without mounting the Shiny app
+    with TestClient(Starlette(routes=api.routes)) as client:
+        yield client
+
+
+@pytest.fixture
+def compact(simulated_brackets) -> str:
+    return CompactBracket.from_winner_slots(simulated_brackets[0].tolist()).to_bytes().hex()
+
+
+@pytest.mark.parametrize("body", [
+    b"not json",
+    b"[1, 2, 3]",
+    b'{"pool_size": 10}',
+    b'{"picks": "East 1"}',
+    b'{"compact": "zz"}',
+    b'{"compact": "00ff"}',
+])
+def test_malformed_requests_are_rejected(client, body):
+    response = client.post("/assessment", content=body)
+    assert response.status_code == 400
+    assert "error" in response.json()
+
+
+def test_pool_size_without_analysis_data_is_not_found(client, compact):
+    response = client.post("/assessment", json={"compact": compact, "pool_size": 1234})
+    assert response.status_code == 404
+    assert "1234-entry" in response.json()["error"]
+
+
+def test_assessment_is_cached(client, compact):
+    first = client.post("/assessment", json={"compact": compact, "pool_size": 10})
+    assert first.status_code == 200
+    assert first.headers["X-Cache"] == "miss"
+    assert first.json()["win_estimate"]["complete"]
+
+    second = client.post("/assessment", json={"compact": compact, "pool_size": 10})
+    assert second.status_code == 200
+    assert second.headers["X-Cache"] == "hit"
+    assert second.content == first.content
+
+
+def test_picks_and_compact_encodings_agree(client, table, compact):
+    picks = CompactBracket.from_bytes(bytes.fromhex(compact)).to_picks(table)
+    by_picks = client.post("/assessment", json={"picks": picks, "pool_size": 10})
+    by_compact = client.post("/assessment", json={"compact": compact, "pool_size": 10})
+    assert by_picks.status_code == 200
+    assert by_picks.json() == by_compact.json()
+
+
+def test_stats(client):
+    stats = client.get("/stats").json()
+    assert set(stats) == {"cache", "pending", "data_version"}
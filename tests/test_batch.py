@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+# -*-coding:utf-8 -*-
+'''
+@File    :   test_batch.py
+@Time    :   2026/10/18
+@Author  :   Taylor Firman
+@Version :   1.0
+@Contact :   tefirman@gmail.com
+@Desc    :   Smoke tests of headless batch scoring for March Madness bracket app
+'''
+
+import io
+
+import orjson
+import pytest
+
+import batch
+from bracket_state import BracketState
+from compact_bracket import GAME_IDS, NUM_GAMES, CompactBracket
+from simulator import get_tournament_model
+
+
+def chalk_picks(table) -> dict:
+    """Picks for the higher seed in every game"""
+    state = BracketState(table)
+    for index in range(NUM_GAMES):
+        state.set_pick(index, table.names[state.default_winner(index)])
+    return state.to_compact().to_picks(table)
+
+
+def score(brackets, tournament: str, batch_size: int = batch.BATCH_SIZE) -> list:
+    output = io.BytesIO()
+    stats = batch.score_brackets(brackets, 10, output, tournament, batch_size)
+    assert stats["brackets"] == len(brackets)
+    return [orjson.loads(line) for line in output.getvalue().splitlines()]
+
+
+@pytest.mark.parametrize("tournament", ["men", "women"])
+def test_picks_resolve_against_the_requested_tournament(tournament):
+    table = get_tournament_model(tournament).index
+    picks = chalk_picks(table)
+
+    [result] = score([("chalk", picks)], tournament)
+
+    assert result["id"] == "chalk"
+    assert result["selections"]["Champion"] == picks[GAME_IDS[-1]]
+    assert sorted(result["selections"]["First Round"]) == sorted(picks[game] for game in GAME_IDS[:32])
+    assert result["win_estimate"]["complete"]
+    assert result["win_estimate"]["win_probability"] > 0
+
+
+def test_invalid_picks_are_left_undecided(table):
+    picks = chalk_picks(table)
+    picks[GAME_IDS[0]] = "Not A Team"
+    del picks[GAME_IDS[1]]
+
+    partial, empty = score([("partial", picks), ("empty", {})], "men")
+
+    assert not partial["win_estimate"]["complete"]
+    assert len(partial["selections"]["First Round"]) == 30
+    assert not empty["win_estimate"]["complete"]
+    assert empty["win_estimate"]["win_probability"] == 0
+
+
+def test_results_do_not_depend_on_batch_size(table, simulated_brackets):
+    brackets = [(str(number), CompactBracket.from_winner_slots(slots.tolist()).to_picks(table))
+                for number, slots in enumerate(simulated_brackets[:7])]
+    assert score(brackets, "men", batch_size=3) == score(brackets, "men")
+
+
+def test_jsonl_reader_accepts_flat_and_wrapped_picks():
+    stream = io.BytesIO(b'{"id": "a", "picks": {"g1": "Duke"}}\n\n{"g1": "UConn"}\n')
+    assert list(batch.read_jsonl_brackets(stream)) == [("a", {"g1": "Duke"}), ("3", {"g1": "UConn"})]
@@ -0,0 +1,91 @@
+#!/usr/bin/env python
+# -*-coding:utf-8 -*-
+'''
+@File    :   test_bracket_state.py
+@Time    :   2026/10/18
+@Author  :   Taylor Firman
+@Version :   1.0
+@Contact :   tefirman@gmail.com
+@Desc    :   Tests of the per-session bracket state for March Madness bracket app
+'''
+
+from bracket_state import BracketState
+from compact_bracket import NUM_GAMES, PARENTS, ROUND_OFFSETS
+
+
+def chalk_state(table) -> BracketState:
+    """State with every game picked for the higher seed"""
+    state = BracketState(table)
+    for index in range(NUM_GAMES):
+        state.set_pick(index, table.names[state.default_winner(index)])
+    return state
+
+
+def echo_defaults(state: BracketState):
+    """Settle a state the way the client does: re-send each undecided game's default until nothing changes"""
+    changed = True
+    while changed:
+        changed = False
+        for index in range(NUM_GAMES):
+            default = state.default_winner(index)
+            if state.winners[index] is None and default is not None:
+                state.set_pick(index, state.table.names[default])
+                changed = True
+
+
+def underdog(state: BracketState, index: int) -> str:
+    first, second = state.matchup(index)
+    favorite = state.default_winner(index)
+    return state.table.names[second if favorite == first else first]
+
+
+def test_set_pick_ignores_unknown_and_ineligible_teams(table):
+    state = chalk_state(table)
+    before = list(state.winners)
+    assert state.set_pick(0, "Not A Team") == []
+    assert state.set_pick(0, None) == []
+    # A team from another first round game is not in game 0's matchup
+    assert state.set_pick(0, table.names[5]) == []
+    assert state.winners == before
+
+
+def test_set_pick_clears_the_old_winners_path(table):
+    state = chalk_state(table)
+    champion = state.winners[NUM_GAMES - 1]
+    first_round_game = champion >> 1
+    changed = state.set_pick(first_round_game, underdog(state, first_round_game))
+
+    # The champion's whole path is cleared (one game per later round)
+    assert len(changed) == 5
+    assert all(state.winners[game] is None for game in changed)
+    assert champion not in state.winners
+
+
+def test_apply_pick_fills_completed_matchups_with_defaults(table):
+    state = BracketState(table)
+    state.apply_pick(0, table.names[1])
+    assert state.winners[ROUND_OFFSETS[2]] is None  # Still waiting on game 1
+
+    changed = state.apply_pick(1, table.names[2])
+    game = ROUND_OFFSETS[2]
+    assert changed == [game, PARENTS[game]]
+    assert state.winners[game] == state.default_winner(game)
+
+
+def test_apply_pick_cascade_matches_client_echoes(table):
+    for index in [0, 7, 31, ROUND_OFFSETS[2] + 3, ROUND_OFFSETS[4], NUM_GAMES - 1]:
+        state = chalk_state(table)
+        pick = underdog(state, index)
+        changed = state.apply_pick(index, pick)
+
+        expected = chalk_state(table)
+        expected.set_pick(index, pick)
+        echo_defaults(expected)
+        assert state.winners == expected.winners
+        assert changed == sorted(changed)
+        assert state.to_compact().is_complete
+
+
+def test_apply_pick_is_a_no_op_for_the_current_winner(table):
+    state = chalk_state(table)
+    assert state.apply_pick(0, state.winner_name(0)) == []
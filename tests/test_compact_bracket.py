@@ -0,0 +1,111 @@
+#!/usr/bin/env python
+# -*-coding:utf-8 -*-
+'''
+@File    :   test_compact_bracket.py
+@Time    :   2026/10/18
+@Author  :   Taylor Firman
+@Version :   1.0
+@Contact :   tefirman@gmail.com
+@Desc    :   Tests of the compact bracket encoding for March Madness bracket app
+'''
+
+import numpy as np
+import pytest
+
+from compact_bracket import (FEEDERS, FULL_MASK, GAME_IDS, NUM_GAMES, ROUND_NAMES, ROUND_OFFSETS, CompactBracket,
+                             valid_winner_slots)
+
+
+def test_empty_bracket_has_no_picks():
+    bracket = CompactBracket()
+    assert bracket.winner_slots() == [None] * NUM_GAMES
+    assert not bracket.is_complete
+
+
+def test_bytes_round_trip(simulated_brackets):
+    for slots in simulated_brackets[:50]:
+        bracket = CompactBracket.from_winner_slots(slots.tolist())
+        data = bracket.to_bytes()
+        assert len(data) == 16
+        assert CompactBracket.from_bytes(data) == bracket
+
+
+def test_partial_bracket_bytes_round_trip(simulated_brackets):
+    # Only the first two rounds picked
+    slots = simulated_brackets[0].tolist()[:ROUND_OFFSETS[3]] + [None] * (NUM_GAMES - ROUND_OFFSETS[3])
+    bracket = CompactBracket.from_winner_slots(slots)
+    restored = CompactBracket.from_bytes(bracket.to_bytes())
+    assert restored == bracket
+    assert restored.winner_slots() == slots
+
+
+def test_winner_slots_round_trip(simulated_brackets):
+    for slots in simulated_brackets[:50]:
+        bracket = CompactBracket.from_winner_slots(slots.tolist())
+        assert bracket.is_complete
+        assert bracket.mask == FULL_MASK
+        assert bracket.winner_slots() == slots.tolist()
+
+
+def test_picks_round_trip(table, simulated_brackets):
+    for slots in simulated_brackets[:50]:
+        bracket = CompactBracket.from_winner_slots(slots.tolist())
+        picks = bracket.to_picks(table)
+        assert set(picks) == set(GAME_IDS)
+        assert CompactBracket.from_picks(picks, table) == bracket
+
+
+def test_from_picks_ignores_unknown_and_missing_teams(table, simulated_brackets):
+    bracket = CompactBracket.from_winner_slots(simulated_brackets[0].tolist())
+    picks = bracket.to_picks(table)
+    picks[GAME_IDS[0]] = "Not A Team"
+    del picks[GAME_IDS[1]]
+    decoded = CompactBracket.from_picks(picks, table).winner_slots()
+    assert decoded[0] is None and decoded[1] is None
+    # The second round game fed by both is undecided too, the rest are kept
+    assert decoded[ROUND_OFFSETS[2]] is None
+    assert decoded[2:ROUND_OFFSETS[2]] == bracket.winner_slots()[2:ROUND_OFFSETS[2]]
+
+
+def test_from_winner_slots_drops_picks_outside_the_matchup(simulated_brackets):
+    slots = simulated_brackets[0].tolist()
+    game = ROUND_OFFSETS[2]
+    first, second = FEEDERS[game]
+    # A team that did not win either feeder game cannot win this one
+    losers = {2 * first, 2 * first + 1, 2 * second, 2 * second + 1} - {slots[first], slots[second]}
+    slots[game] = min(losers)
+    decoded = CompactBracket.from_winner_slots(slots).winner_slots()
+    assert decoded[game] is None
+    assert decoded[:game] == slots[:game]
+
+
+def test_valid_winner_slots_matches_scalar_encoding(simulated_brackets):
+    rng = np.random.default_rng(7)
+    corrupted = simulated_brackets[:100].copy()
+    # Undecide some games and move other picks to random teams
+    corrupted[rng.random(corrupted.shape) < 0.05] = -1
+    moved = rng.random(corrupted.shape) < 0.05
+    corrupted[moved] = rng.integers(0, 64, moved.sum())
+
+    batch = valid_winner_slots(corrupted)
+    for row, slots in zip(batch, corrupted):
+        expected = CompactBracket.from_winner_slots([None if slot < 0 else int(slot) for slot in slots])
+        assert [None if slot < 0 else int(slot) for slot in row] == expected.winner_slots()
+
+
+def test_results_round_trip(table, simulated_brackets):
+    bracket = CompactBracket.from_winner_slots(simulated_brackets[0].tolist())
+    results = bracket.to_results(table)
+    assert set(results) == set(ROUND_NAMES.values()) | {"Champion"}
+    assert [len(results[name]) for name in ROUND_NAMES.values()] == [32, 16, 8, 4, 2, 1]
+    assert CompactBracket.from_results(results, table) == bracket
+
+
+def test_log_probability_matches_bigdance(table, simulated_brackets):
+    for slots in simulated_brackets[:10]:
+        bracket = CompactBracket.from_winner_slots(slots.tolist())
+        total, by_round = bracket.log_probability(table)
+        reference = bracket.to_bracket(table)
+        assert total == pytest.approx(reference.calculate_log_probability(), rel=1e-9)
+        for round_name, value in reference.log_probability_by_round.items():
+            assert by_round[round_name] == pytest.approx(value, rel=1e-9, abs=1e-12)
@@ -0,0 +1,55 @@
+#!/usr/bin/env python
+# -*-coding:utf-8 -*-
+'''
+@File    :   test_optimizer.py
+@Time    :   2026/10/18
+@Author  :   Taylor Firman
+@Version :   1.0
+@Contact :   tefirman@gmail.com
+@Desc    :   Tests of the bracket optimizer's flip search for March Madness bracket app
+'''
+
+import numpy as np
+import pytest
+
+from compact_bracket import NUM_GAMES, CompactBracket
+from optimizer import _GAME_POINTS, _FlipSearch, complete_with_favorites
+from simulator import build_pool_sample
+
+
+@pytest.fixture(scope="module")
+def sample(model):
+    return build_pool_sample(model, 10, rng=np.random.default_rng(3), sims=200)
+
+
+def full_scores(sample, slots: np.ndarray) -> np.ndarray:
+    return (sample.actual == slots) @ _GAME_POINTS
+
+
+def test_flip_delta_matches_rescoring(sample, simulated_brackets):
+    for slots in simulated_brackets[:3]:
+        search = _FlipSearch(sample, slots)
+        for index in range(NUM_GAMES):
+            trial = _FlipSearch(sample, slots)
+            delta = trial.flip_delta(index)
+            trial.flip(index)
+
+            assert CompactBracket.from_winner_slots(trial.slots.tolist()).is_complete
+            assert trial.slots[index] != slots[index]
+            np.testing.assert_array_equal(full_scores(sample, trial.slots), search.scores + delta)
+            np.testing.assert_array_equal(trial.scores, full_scores(sample, trial.slots))
+
+
+def test_best_flip_matches_applied_flip(sample, simulated_brackets):
+    search = _FlipSearch(sample, simulated_brackets[0])
+    index, value = search.best_flip()
+    search.flip(index)
+    assert search.value == pytest.approx(value)
+
+
+def test_complete_with_favorites_keeps_picks(model, simulated_brackets):
+    winner_slots = [int(slot) for slot in simulated_brackets[0]]
+    winner_slots[40:] = [None] * (NUM_GAMES - 40)
+    completed = complete_with_favorites(model, winner_slots)
+    assert completed[:40].tolist() == winner_slots[:40]
+    assert CompactBracket.from_winner_slots(completed.tolist()).is_complete
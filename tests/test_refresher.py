@@ -0,0 +1,141 @@
+#!/usr/bin/env python
+# -*-coding:utf-8 -*-
+'''
+@File    :   test_refresher.py
+@Time    :   2026/10/18
+@Author  :   Taylor Firman
+@Version :   1.0
+@Contact :   tefirman@gmail.com
+@Desc    :   Tests of the background tournament data refresher for March Madness bracket app
+'''
+
+import copy
+import hashlib
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import data
+from refresher import TournamentRefresher
+
+
+class BracketPage:
+    """Local stand-in for the bracket page: serves a body with an ETag and answers conditional requests"""
+
+    def __init__(self, body: str):
+        self.body = body
+        self.etag = None
+        self.requests = []
+        page = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if_none_match = self.headers.get("If-None-Match")
+                page.requests.append(if_none_match)
+                etag = page.etag or '"' + hashlib.md5(page.body.encode()).hexdigest() + '"'
+                if if_none_match == etag:
+                    self.send_response(304)
+                    self.end_headers()
+                    return
+                body = page.body.encode()
+                self.send_response(200)
+                self.send_header("ETag", etag)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}/bracket"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def renamed_teams(suffix: str) -> dict:
+    """Current teams with the East 16 seed renamed, as a refreshed bracket would show a First Four winner"""
+    teams = copy.deepcopy(data.get_tournament_index().to_teams())
+    for team in teams["East"]:
+        if team["Seed"] == 16:
+            team["Team"] += suffix
+    return teams
+
+
+@pytest.fixture
+def page(restore_tournament):
+    page = BracketPage(json.dumps({"teams": renamed_teams(" (refreshed)")}))
+    yield page
+    page.close()
+
+
+@pytest.fixture
+def refresher(page):
+    # Pages are JSON here, so the test never needs the ESPN parser or its ratings source
+    return TournamentRefresher(url=page.url, parser=lambda body: json.loads(body)["teams"], save=False)
+
+
+def test_changed_page_swaps_in_new_data(page, refresher):
+    versions = []
+    data.add_data_listener(lambda index: versions.append(index.version))
+    previous = data.get_data_version()
+
+    result = refresher.refresh()
+
+    assert result["status"] == "updated"
+    assert result["version"] == data.get_data_version() > previous
+    assert versions == [result["version"]]
+    east_16 = [record.name for record in data.get_tournament_index().region_teams("East") if record.seed == 16]
+    assert east_16[0].endswith(" (refreshed)")
+
+
+def test_not_modified_page_is_skipped(page, refresher):
+    refresher.refresh()
+    version = data.get_data_version()
+
+    result = refresher.refresh()
+
+    assert result["status"] == "not_modified"
+    assert page.requests[-1] == refresher.etag
+    assert data.get_data_version() == version
+
+
+def test_identical_content_is_not_parsed_again(page, refresher):
+    refresher.refresh()
+    version = data.get_data_version()
+    page.etag = '"new-etag-same-content"'
+
+    parsed = []
+    parse = refresher.parser
+    refresher.parser = lambda body: parsed.append(body) or parse(body)
+    result = refresher.refresh()
+
+    assert result["status"] == "unchanged"
+    assert parsed == []
+    assert data.get_data_version() == version
+
+
+def test_updated_page_is_swapped_in(page, refresher):
+    refresher.refresh()
+    page.body = json.dumps({"teams": renamed_teams(" (second refresh)")})
+
+    result = refresher.refresh()
+
+    assert result["status"] == "updated"
+    names = data.get_tournament_index().names
+    assert any(name.endswith(" (second refresh)") for name in names)
+
+
+def test_invalid_page_keeps_current_data(page, refresher):
+    index = data.get_tournament_index()
+    page.body = json.dumps({"teams": {"East": []}})
+
+    result = refresher.refresh()
+
+    assert result["status"] == "error"
+    assert data.get_tournament_index() is index
@@ -0,0 +1,97 @@
+#!/usr/bin/env python
+# -*-coding:utf-8 -*-
+'''
+@File    :   test_simulator.py
+@Time    :   2026/10/18
+@Author  :   Taylor Firman
+@Version :   1.0
+@Contact :   tefirman@gmail.com
+@Desc    :   Tests of the vectorized simulator against bigdance for March Madness bracket app
+'''
+
+import numpy as np
+import pytest
+from bigdance.cbb_brackets import Bracket, Game, Pool
+
+from compact_bracket import ROUND_OFFSETS, CompactBracket
+from simulator import (ACTUAL_UPSET_FACTOR, advancement_probabilities, build_pool_sample, score_brackets,
+                       simulate_brackets)
+
+UPSET_FACTORS = [-1.0, -0.4, 0.0, 0.25, 0.7, 1.0]
+
+
+def test_game_probabilities_match_bigdance(table, model, monkeypatch):
+    """Each matchup's favorite and adjusted probability agree with Bracket.simulate_game"""
+    # First round games, cross-region games between equal seeds (decided by rating) and a few others
+    pairs = [(2 * game, 2 * game + 1) for game in range(32)]
+    pairs += [(first, second) for first in range(64) for second in range(first + 16, 64, 16)
+              if model.seeds[first] == model.seeds[second]]
+    pairs += [(0, 63), (40, 9), (17, 30)]
+    probabilities = model.game_probabilities(np.array(UPSET_FACTORS))
+    bracket = Bracket(list(table.teams))
+
+    for factor_index, factor in enumerate(UPSET_FACTORS):
+        for first, second in pairs:
+            team1, team2 = table.teams[first], table.teams[second]
+            game = Game(team1, team2, round=1, region=team1.region)
+            first_prob = probabilities[factor_index, first, second]
+            favorite, underdog = (team1, team2) if model.first_is_favorite[first, second] else (team2, team1)
+            favorite_prob = first_prob if favorite is team1 else 1 - first_prob
+            # bigdance's favorite wins exactly when its uniform draw falls below the favorite's probability
+            monkeypatch.setattr(np.random, "random", lambda: favorite_prob - 1e-9)
+            assert bracket.simulate_game(game, factor) is favorite
+            monkeypatch.setattr(np.random, "random", lambda: favorite_prob + 1e-9)
+            assert bracket.simulate_game(game, factor) is underdog
+
+
+def test_simulated_brackets_are_valid(simulated_brackets):
+    for slots in simulated_brackets:
+        assert CompactBracket.from_winner_slots(slots.tolist()).is_complete
+
+
+def test_advancement_probabilities_match_simulation(model):
+    advancement = advancement_probabilities(model)
+    assert advancement.sum(axis=0) == pytest.approx([32, 16, 8, 4, 2, 1])
+
+    rng = np.random.default_rng(11)
+    brackets = simulate_brackets(model, np.full(40_000, ACTUAL_UPSET_FACTOR), rng)
+    for round_num in range(1, 7):
+        games = brackets[:, ROUND_OFFSETS[round_num]:ROUND_OFFSETS[round_num + 1]]
+        frequency = np.bincount(games.ravel(), minlength=64) / len(brackets)
+        assert frequency == pytest.approx(advancement[:, round_num - 1], abs=0.015)
+
+
+def test_scores_match_bigdance(table, simulated_brackets):
+    actual = simulated_brackets[0]
+    entries = simulated_brackets[1:21]
+    pool = Pool(CompactBracket.from_winner_slots(actual.tolist()).to_bracket(table))
+    pool.actual_tournament = CompactBracket.from_winner_slots(actual.tolist()).to_results(table)
+
+    scores = score_brackets(entries, actual)
+    for entry, score in zip(entries, scores):
+        results = CompactBracket.from_winner_slots(entry.tolist()).to_results(table)
+        assert score == pool.score_bracket(results)
+
+
+def test_undecided_games_score_nothing(simulated_brackets):
+    actual = simulated_brackets[0]
+    entry = actual.copy()
+    # Leave the Final Four and championship undecided
+    entry[ROUND_OFFSETS[5]:] = -1
+    assert score_brackets(actual, actual) == 192
+    assert score_brackets(entry, actual) == 192 - 2 * 16 - 32
+
+
+def test_batch_win_probabilities_match_single_brackets(model, simulated_brackets):
+    sample = build_pool_sample(model, 10, rng=np.random.default_rng(5), sims=300)
+    brackets = simulated_brackets[:40].copy()
+    # Partial brackets and picks outside a game's matchup score nothing for those games
+    brackets[:10, ROUND_OFFSETS[3]:] = -1
+    brackets[10:15, ROUND_OFFSETS[2]] = 63
+
+    batch = sample.win_probabilities(brackets)
+    assert batch['sims'] == sample.sims == 300
+    for bracket, win_probability, std_error in zip(brackets, batch['win_probability'], batch['std_error']):
+        single = sample.win_probability([None if slot < 0 else int(slot) for slot in bracket])
+        assert win_probability == pytest.approx(single['win_probability'], abs=1e-12)
+        assert std_error == pytest.approx(single['std_error'], abs=1e-12)
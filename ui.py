@@ -15,6 +15,13 @@ def create_round_header(round_name: str) -> ui.tags.h4:
     """Create a header for a tournament round"""
     return ui.h4(round_name, class_="mt-4 mb-3")
 
+def create_round_games(region: str, round_num: int, num_games: int) -> ui.div:
+    """Create a column of per-game outputs so each game can be rendered and updated on its own"""
+    return ui.div(
+        {"class": "bracket-region"},
+        *[ui.output_ui(f"{region.lower()}_round{round_num}_game_{i}_ui") for i in range(num_games)]
+    )
+
 def create_region_column(region: str) -> ui.div:
     """Create a div containing a region's bracket with horizontal round layout"""
     return ui.div(
@@ -23,25 +30,25 @@ def create_region_column(region: str) -> ui.div:
             ui.column(
                 3,  # Each round takes 1/4 of the width
                 create_round_header("First Round"),
-                ui.output_ui(f"{region.lower()}_bracket_round1"),
+                create_round_games(region, 1, 8),
                 class_="round-column"
             ),
             ui.column(
                 3,
                 create_round_header("Second Round"),
-                ui.output_ui(f"{region.lower()}_bracket_round2"),
+                create_round_games(region, 2, 4),
                 class_="round-column"
             ),
             ui.column(
                 3,
                 create_round_header("Sweet 16"),
-                ui.output_ui(f"{region.lower()}_bracket_round3"),
+                create_round_games(region, 3, 2),
                 class_="round-column"
             ),
             ui.column(
                 3,
                 create_round_header("Elite Eight"),
-                ui.output_ui(f"{region.lower()}_bracket_round4"),
+                create_round_games(region, 4, 1),
                 class_="round-column"
             ),
             class_="region-rounds"
@@ -57,12 +64,12 @@ def create_final_rounds() -> ui.div:
             ui.column(
                 6,
                 create_round_header("Final Four"),
-                ui.output_ui("final_four_games")
+                create_round_games("final", 5, 2)
             ),
             ui.column(
                 6,
                 create_round_header("Championship"),
-                ui.output_ui("championship_game")
+                create_round_games("final", 6, 1)
             ),
             class_="final-rounds"
         ),
@@ -283,6 +290,11 @@ custom_css = """
 # JavaScript for region selector tabs
 region_tabs_js = """
 $(document).ready(function() {
+    // Tell the server which tab is showing, so outputs on hidden tabs can wait until they are shown
+    $(document).on("shiny:connected", function() {
+        Shiny.setInputValue("active_tab", $(".region-selector button.active").attr("data-region") || "east");
+    });
+    
     // Initially hide all content except the first one
     $(".region-content").removeClass("active").css('opacity', '0');
     $("#east-region").addClass("active").css('opacity', '1');
@@ -304,12 +316,7 @@ $(document).ready(function() {
         // Show the selected region content and enable interactions
         var regionId = $(this).attr("data-region");
         $("#" + regionId + "-region").addClass("active").css('opacity', '1');
-
-        // If switching to assessment tab, trigger Shiny to re-render the assessment
-        if ($(this).attr("data-region") === "assessment") {
-            // Force Shiny to recalculate the assessment output
-            Shiny.setInputValue('__forceAssessmentUpdate__', Math.random());
-        }
+        Shiny.setInputValue("active_tab", regionId);
     });
 });
 """
@@ -335,7 +342,8 @@ app_ui = ui.page_fluid(
     ui.div(
         ui.div(
             ui.tags.label("Pool Size: ", **{"for": "pool_size"}),
-            ui.input_select(
+            # Type any other size to add it (sizes without analysis data are simulated on first use)
+            ui.input_selectize(
                 "pool_size",
                 "",  # No label, as we're using the label tag above
                 choices={
@@ -344,7 +352,8 @@ app_ui = ui.page_fluid(
                     "50": "50 Entries",
                     "100": "100 Entries"
                 },
-                selected="100"
+                selected="100",
+                options={"create": True, "createOnBlur": True, "createFilter": "^[0-9]+$"}
             ),
             class_="pool-size-selector"
         )
@@ -379,6 +388,21 @@ app_ui = ui.page_fluid(
                         ui.output_ui("assessment_results"),  # Changed from output_text to output_ui
                         class_="assessment-results"
                     ),
+                    ui.div(
+                        ui.h4("Optimize"),
+                        ui.input_action_button("optimize_start", "Optimize my bracket", class_="btn-primary btn-sm"),
+                        ui.output_ui("optimize_results"),
+                        class_="assessment-results"
+                    ),
+                    ui.div(
+                        ui.h4("Live Simulation"),
+                        ui.p("Simulate fresh pools for your bracket and watch the estimates tighten. "
+                             "Stop whenever the ranges are narrow enough."),
+                        ui.input_action_button("stream_start", "Start", class_="btn-primary btn-sm"),
+                        ui.input_action_button("stream_stop", "Stop", class_="btn-outline-secondary btn-sm ms-2"),
+                        ui.output_ui("stream_results"),
+                        class_="assessment-results"
+                    ),
                     id="assessment-region", 
                     class_="region-content"
                 ),